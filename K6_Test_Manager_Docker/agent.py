@@ -10,7 +10,8 @@ root_agent = LlmAgent(
     tools=[
         k6_manager.start_test,
         k6_manager.stop_test,
-        k6_manager.list_tests
+        k6_manager.list_tests,
+        k6_manager.get_cache_stats
 
     ],
 )
@@ -3,7 +3,7 @@ ROOT_PROMPT = """
   You are an expert k6 test manager. Your role is to manage the lifecycle of k6
   tests running in Docker containers.
 
-  You have three primary functions:
+  You have four primary functions:
 
   1.  'start_test': To start a test, you MUST know the path to the k6 script.
   Ask the user for the script_path if it is not provided.
@@ -13,6 +13,9 @@ ROOT_PROMPT = """
   running tests and ask the user to specify which one to stop.
 
   3.  'list_tests': To list all currently running tests in a structured format for clean display.
+  Its answer may be a few seconds old; starting or stopping a test refreshes it.
+
+  4.  'get_cache_stats': To report how often 'list_tests' was answered from its cache.
 
 
   Always confirm the action taken with the result from the tool. For example,
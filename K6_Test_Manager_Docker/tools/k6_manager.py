@@ -2,6 +2,9 @@ import subprocess
 import uuid
 import os
 
+from tool_cache import cache_stats, cached_tool, invalidates
+
+@invalidates("containers")
 def start_test(script_path: str) -> str:
     """
     Starts a k6 test in a new Docker container with a unique name.
@@ -47,6 +50,7 @@ def start_test(script_path: str) -> str:
     except FileNotFoundError:
         return "Error: 'docker' command not found. Please ensure Docker is installed and in your PATH."
 
+@invalidates("containers")
 def stop_test(container_name: str) -> str:
     """
     Stops a running k6 test Docker container.
@@ -77,6 +81,8 @@ def stop_test(container_name: str) -> str:
     except FileNotFoundError:
         return "Error: 'docker' command not found. Please ensure Docker is installed and in your PATH."
 
+# 'docker ps' is asked at most every few seconds; starting or stopping a test refreshes it at once.
+@cached_tool(ttl=5, tags=("containers",), cache_if=lambda result: not result.startswith("Error"))
 def list_tests() -> str:
     """
     Lists all running k6 test containers.
@@ -108,3 +114,14 @@ def list_tests() -> str:
         return f"Error listing k6 containers: {error_message}"
     except FileNotFoundError:
         return "Error: 'docker' command not found. Please ensure Docker is installed and in your PATH."
+
+def get_cache_stats() -> str:
+    """
+    Reports how often 'list_tests' was answered from its short-lived cache.
+
+    Returns:
+        The cache's TTL, hits, misses, hit rate and invalidations.
+    """
+    stats = cache_stats(__package__)["list_tests"]
+    return (f"list_tests cache (TTL {stats['ttl_seconds']}s): {stats['hits']} hits, {stats['misses']} misses, "
+            f"hit rate {stats['hit_rate']:.0%}, invalidated {stats['invalidations']} times by starting or stopping tests.")
@@ -7,15 +7,21 @@ jmeter_agent = Agent(
     model='gemini-2.5-flash',
     name='jmeter_specialist',
     description='Specialist for JMeter test configurations.',
-    instruction="You handle JMeter specific requests. Use the 'start_jmeter_test' tool.",
-    tools=[tools.start_jmeter_test]
+    instruction=(
+        "You handle JMeter specific requests. Use the 'start_jmeter_test' tool. "
+        "Use 'summarize_jmeter_results' to report throughput, error rate and percentiles from a JTL file."
+    ),
+    tools=[tools.start_jmeter_test, tools.summarize_jmeter_results]
 )
 
 k6_agent = Agent(
     model='gemini-2.5-flash',
     name='k6_specialist',
     description='Specialist for K6 test configurations.',
-    instruction="You handle K6 specific requests. Use the 'start_k6_test' tool.",
+    instruction=(
+        "You handle K6 specific requests. Use the 'start_k6_test' tool. "
+        "When the requested load exceeds what one generator can produce, pass 'shards' to split it across containers."
+    ),
     tools=[tools.start_k6_test]
 )
 
@@ -23,8 +29,24 @@ locust_agent = Agent(
     model='gemini-2.5-flash',
     name='locust_specialist',
     description='Specialist for Locust test configurations.',
-    instruction="You handle Locust specific requests. Use the 'start_locust_test' tool.",
-    tools=[tools.start_locust_test]
+    instruction=(
+        "You handle Locust specific requests. Use the 'start_locust_test' tool. "
+        "Use 'get_locust_stats' to report live per-endpoint RPS and percentiles of a running Locust test."
+    ),
+    tools=[tools.start_locust_test, tools.get_locust_stats]
+)
+
+browser_agent = Agent(
+    model='gemini-2.5-flash',
+    name='browser_specialist',
+    description='Specialist for real-browser load tests measuring page timings (TTFB, FCP, LCP, CLS).',
+    instruction=(
+        "You handle browser-level performance requests. Use 'start_browser_test' to replay a recorded "
+        "user journey in concurrent headless Chromium contexts; pass 'stand_in_dir' to test against local "
+        "static pages instead of a live 'base_url'. Use 'summarize_browser_results' to report the page, "
+        "step and journey percentiles next to the protocol-level numbers of JMeter, K6 and Locust."
+    ),
+    tools=[tools.start_browser_test, tools.summarize_browser_results]
 )
 
 # 2. Infrastructure Specialists
@@ -32,16 +54,53 @@ monitoring_agent = Agent(
     model='gemini-2.5-flash',
     name='monitoring_specialist',
     description='Specialist for listing and monitoring active load tests.',
-    instruction="List currently running tests across all tools using 'list_running_tests'.",
-    tools=[tools.list_running_tests]
+    instruction=(
+        "List currently running tests across all tools using 'list_running_tests'. "
+        "Use 'list_test_runs' to group containers by run id, e.g. the shards of a k6 test. "
+        "Use 'get_locust_stats' for a per-endpoint breakdown of a running Locust test. "
+        "Use 'get_job_status' and 'list_jobs' for tests that are queued waiting for generator capacity. "
+        "Always report a 'generator-bound' verdict: it means the load generator was saturated and the "
+        "results do not reflect the system under test. Use 'get_generator_stats' to show why. "
+        "When the user gives SLOs (error rate, p95, minimum RPS) for a test, start an SLO watchdog "
+        "with 'watch_test_run' so a broken target aborts the test early; report aborts and their "
+        "reasons from 'get_watchdog_status'. Listings are cached for a few seconds and refreshed when tests "
+        "start or stop; 'get_tool_cache_stats' reports the cache's hit and miss counters."
+    ),
+    tools=[tools.list_running_tests, tools.list_test_runs, tools.get_locust_stats,
+           tools.get_job_status, tools.list_jobs, tools.get_generator_stats,
+           tools.watch_test_run, tools.get_watchdog_status, tools.get_tool_cache_stats]
 )
 
 execution_agent = Agent(
     model='gemini-2.5-flash',
     name='execution_specialist',
-    description='General specialist for stopping test containers.',
-    instruction="Stop running containers using 'stop_test'. Always require confirmation.",
-    tools=[FunctionTool(tools.stop_test, require_confirmation=True)]
+    description='General specialist for stopping test containers and preparing load generators.',
+    instruction=(
+        "Stop running containers using 'stop_test', or every container of a run using 'stop_test_run'. "
+        "Cancel tests still waiting for capacity using 'cancel_job'. Always require confirmation. "
+        "Before a test session, use 'prepare_generators' to pull and pin the generator images and warm the "
+        "container pool; use 'drain_generator_pool' to release the idle pool containers afterwards, and "
+        "'prune_staged_assets' to free the disk space of test assets staged by earlier tests."
+    ),
+    tools=[FunctionTool(tools.stop_test, require_confirmation=True),
+           FunctionTool(tools.stop_test_run, require_confirmation=True),
+           FunctionTool(tools.cancel_job, require_confirmation=True),
+           tools.prepare_generators,
+           FunctionTool(tools.drain_generator_pool, require_confirmation=True),
+           tools.prune_staged_assets]
+)
+
+results_agent = Agent(
+    model='gemini-2.5-flash',
+    name='results_specialist',
+    description='Specialist for storing finished runs and comparing results across runs.',
+    instruction=(
+        "Store finished runs with 'store_run_results', list stored runs with 'list_stored_runs' "
+        "and compare two runs with 'compare_test_runs'. Use 'aggregate_latency_percentiles' for "
+        "percentiles merged across all generator containers of a run."
+    ),
+    tools=[tools.store_run_results, tools.list_stored_runs, tools.compare_test_runs,
+           tools.aggregate_latency_percentiles]
 )
 
 # 3. Root Orchestrator
@@ -50,13 +109,15 @@ orchestrator_agent = Agent(
     name='performance_lead',
     description='Lead Performance Engineer coordinating multi-tool test lifecycles.',
     instruction=(
-        "You are the Lead Performance Engineer. You manage specialists for JMeter, K6, and Locust. "
-        "1. Delegate tool-specific start requests to 'jmeter_specialist', 'k6_specialist', or 'locust_specialist'. "
+        "You are the Lead Performance Engineer. You manage specialists for JMeter, K6, Locust and browser tests. "
+        "1. Delegate tool-specific start requests to 'jmeter_specialist', 'k6_specialist', 'locust_specialist' "
+        "or, for real-browser page timings, 'browser_specialist'. "
         "2. Delegate monitoring/listing requests to 'monitoring_specialist'. "
         "3. Delegate stop requests to 'execution_specialist'. "
+        "4. Delegate storing, listing and comparing finished runs to 'results_specialist'. "
         "Always summarize the actions taken by your team for the user."
     ),
-    sub_agents=[jmeter_agent, k6_agent, locust_agent, monitoring_agent, execution_agent]
+    sub_agents=[jmeter_agent, k6_agent, locust_agent, browser_agent, monitoring_agent, execution_agent, results_agent]
 )
 
 root_agent = orchestrator_agent
@@ -0,0 +1,128 @@
+"""
+Compares the Docker Engine API backend with the docker CLI backend.
+
+Both backends are pointed at a local stand-in daemon listening on a temporary
+Unix socket, so the numbers reflect client overhead only:
+
+    python -m Performance_Test_Lead.engine.benchmark_docker --calls 200
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+from .docker_api import DockerAPIClient
+from . import docker_utils
+
+FAKE_CONTAINERS = [
+    {"Id": f"{i:064x}", "Names": [f"/k6_{i:08x}"], "Image": "loadimpact/k6:latest", "Status": "Up 2 minutes"}
+    for i in range(5)
+]
+
+
+class StandInDockerHandler(BaseHTTPRequestHandler):
+    """Answers the handful of endpoints the list path needs."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status: int, body, content_type: str = "application/json"):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Api-Version", "1.41")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_HEAD(self):
+        self._send(200, b"", "text/plain")
+
+    def do_GET(self):
+        path = re.sub(r"^/v[\d.]+", "", self.path.split("?", 1)[0])
+        if path == "/_ping":
+            self._send(200, b"OK", "text/plain")
+        elif path == "/version":
+            self._send(200, {"ApiVersion": "1.41", "MinAPIVersion": "1.12", "Version": "stand-in"})
+        elif path == "/containers/json":
+            self._send(200, FAKE_CONTAINERS)
+        else:
+            self._send(404, {"message": f"page not found: {path}"})
+
+    def address_string(self):
+        return "stand-in"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _time_calls(label: str, calls: int, fn) -> dict:
+    fn()  # warm up
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        if result.get("status") != "success":
+            raise RuntimeError(f"{label} call failed: {result.get('message')}")
+    samples.sort()
+    return {
+        "backend": label,
+        "calls": calls,
+        "mean_ms": round(sum(samples) / calls, 3),
+        "p50_ms": round(samples[calls // 2], 3),
+        "p99_ms": round(samples[min(calls - 1, int(calls * 0.99))], 3),
+    }
+
+
+def run_benchmark(calls: int = 100) -> list:
+    """Runs list_containers against the stand-in daemon with each available backend."""
+    tmpdir = tempfile.mkdtemp(prefix="docker-bench-")
+    socket_path = os.path.join(tmpdir, "docker.sock")
+    server = StandInDockerServer(socket_path, StandInDockerHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = []
+    try:
+        client = DockerAPIClient(socket_path)
+        results.append(_time_calls("api", calls, lambda: docker_utils._list_containers_api(client, "loadimpact/k6")))
+        client.close()
+
+        if shutil.which("docker"):
+            previous = os.environ.get("DOCKER_HOST")
+            os.environ["DOCKER_HOST"] = f"unix://{socket_path}"
+            try:
+                results.append(_time_calls("cli", calls, lambda: docker_utils._list_containers_cli("loadimpact/k6")))
+            finally:
+                if previous is None:
+                    os.environ.pop("DOCKER_HOST", None)
+                else:
+                    os.environ["DOCKER_HOST"] = previous
+        else:
+            results.append({"backend": "cli", "skipped": "docker binary not found in PATH"})
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100, help="Timed calls per backend.")
+    args = parser.parse_args()
+    for row in run_benchmark(args.calls):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
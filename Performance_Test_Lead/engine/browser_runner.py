@@ -0,0 +1,262 @@
+"""
+Browser load generator, run inside the Playwright generator image.
+
+Replays a recorded user journey in N concurrent browser contexts spread over a
+small pool of headless Chromium instances. Every iteration gets a fresh,
+isolated context (no shared cookies, storage or cache), like a new user. Each
+page's navigation timing, TTFB, FCP, LCP and CLS, every step's duration and
+the whole journey's duration are appended to a CSV, one row per value.
+
+A journey is a JSON list of steps (or {"steps": [...]}), each one of:
+    {"goto": "/path"}                       navigate, relative to --base-url
+    {"click": "selector"}
+    {"fill": "selector", "value": "text"}
+    {"press": "selector", "key": "Enter"}
+    {"wait_for": "selector"}
+    {"wait_ms": 500}
+with an optional "name" used to label the step in the results.
+
+The engine stages this file next to the journey; it depends only on the
+standard library and Playwright.
+"""
+import argparse
+import asyncio
+import csv
+import functools
+import http.server
+import json
+import re
+import threading
+import time
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import async_playwright
+
+COLUMNS = ["timestamp", "context", "iteration", "step", "url", "metric", "value", "error"]
+
+# Installed in every page before its own scripts run; LCP and CLS are only
+# reported to observers, so they are collected as the page renders.
+OBSERVERS_JS = """
+window.__gadkPerf = {lcp: null, cls: 0};
+try {
+  new PerformanceObserver((list) => {
+    for (const entry of list.getEntries()) window.__gadkPerf.lcp = entry.startTime;
+  }).observe({type: 'largest-contentful-paint', buffered: true});
+  new PerformanceObserver((list) => {
+    for (const entry of list.getEntries()) if (!entry.hadRecentInput) window.__gadkPerf.cls += entry.value;
+  }).observe({type: 'layout-shift', buffered: true});
+} catch (e) {}
+"""
+
+# Reads the current document's timings, in ms since its navigation started.
+COLLECT_JS = """() => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  if (!nav) return null;
+  const fcp = performance.getEntriesByName('first-contentful-paint')[0];
+  const perf = window.__gadkPerf || {lcp: null, cls: null};
+  return {
+    origin: performance.timeOrigin, url: location.href,
+    ttfb: nav.responseStart, fcp: fcp ? fcp.startTime : null, lcp: perf.lcp, cls: perf.cls,
+    dom_content_loaded: nav.domContentLoadedEventEnd || null, load: nav.loadEventEnd || null,
+  };
+}"""
+
+PAGE_METRICS = ("ttfb", "fcp", "lcp", "dom_content_loaded", "load", "cls")
+ACTIONS = ("goto", "click", "fill", "press", "wait_for", "wait_ms")
+
+
+def parse_duration(value):
+    """Seconds in '90', '90s', '5m' or '1h'; 0 means no time limit"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", value or "0")
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration: {value}")
+    return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+def load_journey(path):
+    with open(path, encoding="utf-8") as f:
+        journey = json.load(f)
+    steps = journey.get("steps") if isinstance(journey, dict) else journey
+    if not isinstance(steps, list) or not steps:
+        raise ValueError(f"{path} has no steps")
+    for index, step in enumerate(steps):
+        action = next((a for a in ACTIONS if a in step), None)
+        if action is None:
+            raise ValueError(f"step {index} has none of {', '.join(ACTIONS)}: {step}")
+        step.setdefault("name", f"{index}_{action}")
+        step["action"] = action
+    return steps
+
+
+def serve_stand_in(directory):
+    """Serves a directory of static pages on a free local port; returns its base URL"""
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=directory)
+    handler.log_message = lambda *args: None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, name="stand-in", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+class Results:
+    """CSV sink shared by every context; flushed per row so the host can follow it live"""
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def add(self, context, iteration, step, url, metric, value, error=""):
+        self.writer.writerow([f"{time.time():.3f}", context, iteration, step, url, metric, f"{value:.3f}", error])
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class BrowserPool:
+    """A fixed number of Chromium instances shared by the contexts; a crashed one is relaunched"""
+
+    def __init__(self, playwright, size):
+        self.playwright = playwright
+        self.browsers = [None] * size
+        self.lock = asyncio.Lock()
+
+    async def get(self, context):
+        slot = context % len(self.browsers)
+        async with self.lock:
+            browser = self.browsers[slot]
+            if browser is None or not browser.is_connected():
+                browser = self.browsers[slot] = await self.playwright.chromium.launch(
+                    headless=True, args=["--disable-dev-shm-usage"])
+        return browser
+
+    async def close(self):
+        for browser in self.browsers:
+            if browser is not None and browser.is_connected():
+                await browser.close()
+
+
+async def run_step(page, step, timeout_ms):
+    action = step["action"]
+    if action == "goto":
+        await page.goto(step["goto"], wait_until="load", timeout=timeout_ms)
+    elif action == "click":
+        await page.click(step["click"], timeout=timeout_ms)
+        await page.wait_for_load_state("load", timeout=timeout_ms)
+    elif action == "fill":
+        await page.fill(step["fill"], str(step.get("value", "")), timeout=timeout_ms)
+    elif action == "press":
+        await page.press(step["press"], step.get("key", "Enter"), timeout=timeout_ms)
+        await page.wait_for_load_state("load", timeout=timeout_ms)
+    elif action == "wait_for":
+        await page.wait_for_selector(step["wait_for"], timeout=timeout_ms)
+    else:
+        await page.wait_for_timeout(float(step["wait_ms"]))
+
+
+async def snapshot(page, documents):
+    """Records the current document's timings, keeping the latest reading per document"""
+    try:
+        timings = await page.evaluate(COLLECT_JS)
+    except PlaywrightError:
+        return
+    if timings:
+        documents[timings["origin"]] = timings
+
+
+def first_line(error):
+    return (str(error).splitlines() or [type(error).__name__])[0][:200]
+
+
+async def iteration(pool, context_id, number, steps, args, results):
+    try:
+        browser = await pool.get(context_id)
+        context = await browser.new_context(base_url=args.base_url, ignore_https_errors=True)
+        await context.add_init_script(OBSERVERS_JS)
+    except PlaywrightError as e:
+        results.add(context_id, number, "context", "", "error", 1, first_line(e))
+        # Give a crashed browser a moment before the next relaunch.
+        await asyncio.sleep(1)
+        return
+    documents = {}
+    started = time.perf_counter()
+    step, page = None, None
+    try:
+        page = await context.new_page()
+        for step in steps:
+            # LCP and CLS keep changing until the page is left, and any step (a click on a
+            # link, a key press submitting a form) may leave it, so read them before each one.
+            await snapshot(page, documents)
+            step_started = time.perf_counter()
+            await run_step(page, step, args.timeout * 1000)
+            results.add(context_id, number, step["name"], page.url, "step",
+                        (time.perf_counter() - step_started) * 1000)
+        await snapshot(page, documents)
+        results.add(context_id, number, "journey", "", "journey", (time.perf_counter() - started) * 1000)
+    except (PlaywrightError, asyncio.TimeoutError) as e:
+        results.add(context_id, number, step["name"] if step else "", page.url if page else "", "error", 1,
+                    first_line(e))
+    finally:
+        try:
+            await context.close()
+        except PlaywrightError:
+            pass
+    for timings in documents.values():
+        for metric in PAGE_METRICS:
+            if timings.get(metric) is not None:
+                results.add(context_id, number, "page", timings["url"], metric, timings[metric])
+
+
+async def virtual_user(pool, context_id, steps, args, results, deadline):
+    await asyncio.sleep(args.ramp_up * context_id / args.contexts)
+    number = 0
+    while (not args.iterations or number < args.iterations) and (not deadline or time.monotonic() < deadline):
+        await iteration(pool, context_id, number, steps, args, results)
+        number += 1
+        if args.think_time_ms:
+            await asyncio.sleep(args.think_time_ms / 1000)
+
+
+async def run(args):
+    steps = load_journey(args.journey)
+    if args.stand_in:
+        args.base_url = serve_stand_in(args.stand_in)
+    deadline = time.monotonic() + args.duration if args.duration else None
+    results = Results(args.output)
+    try:
+        async with async_playwright() as playwright:
+            pool = BrowserPool(playwright, max(1, min(args.browsers, args.contexts)))
+            try:
+                await asyncio.gather(*(virtual_user(pool, context_id, steps, args, results, deadline)
+                                       for context_id in range(args.contexts)))
+            finally:
+                await pool.close()
+    finally:
+        results.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a user journey in concurrent headless browser contexts")
+    parser.add_argument("--journey", required=True, help="Journey JSON file")
+    parser.add_argument("--output", required=True, help="CSV file to write the timings to")
+    parser.add_argument("--base-url", help="URL the journey's paths are relative to")
+    parser.add_argument("--stand-in", metavar="DIR", help="Serve this directory locally and use it as the base URL")
+    parser.add_argument("--contexts", type=int, default=5, help="Concurrent browser contexts (virtual users)")
+    parser.add_argument("--browsers", type=int, default=1, help="Chromium instances the contexts are spread over")
+    parser.add_argument("--iterations", type=int, default=0, help="Journeys per context; 0 repeats until --duration")
+    parser.add_argument("--duration", type=parse_duration, default=parse_duration("1m"),
+                        help="Test duration, e.g. 90s or 5m; 0 runs --iterations only")
+    parser.add_argument("--ramp-up", type=parse_duration, default=0.0, help="Time over which contexts are started")
+    parser.add_argument("--think-time-ms", type=int, default=0, help="Pause between journeys of a context")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds a step may take")
+    args = parser.parse_args()
+    if not args.iterations and not args.duration:
+        parser.error("give --iterations, --duration or both")
+    if not args.base_url and not args.stand_in:
+        parser.error("give --base-url or --stand-in")
+    args.contexts = max(args.contexts, 1)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import http.client
+import json
+import os
+import queue
+import socket
+from typing import Iterator, Optional
+from urllib.parse import quote, urlencode
+
+DOCKER_SOCKET = os.environ.get("DOCKER_SOCKET", "/var/run/docker.sock")
+API_VERSION = "v1.41"
+
+# Errors that mean the pooled keep-alive connection went stale and the request
+# can safely be retried once on a fresh connection.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class DockerAPIError(Exception):
+    """Raised when the Docker daemon answers a request with an error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP/1.1 connection over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerAPIClient:
+    """
+    Minimal Docker Engine API client with a pool of keep-alive connections.
+
+    Each request borrows a connection from the pool and returns it afterwards,
+    so polling many containers reuses a handful of sockets instead of forking
+    a `docker` process per call.
+    """
+
+    def __init__(self, socket_path: str = DOCKER_SOCKET, pool_size: int = 4, timeout: float = 30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _acquire(self) -> UnixHTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+
+    def _release(self, conn: UnixHTTPConnection):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        """Closes every pooled connection."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def available(self) -> bool:
+        """Returns True if the daemon socket exists and answers a ping."""
+        if not os.path.exists(self.socket_path):
+            return False
+        try:
+            self.request("GET", "/_ping", versioned=False)
+            return True
+        except (OSError, http.client.HTTPException, DockerAPIError):
+            return False
+
+    def _build_url(self, path: str, params: Optional[dict], versioned: bool) -> str:
+        url = f"/{API_VERSION}{path}" if versioned else path
+        if params:
+            encoded = {k: json.dumps(v) if isinstance(v, dict) else v for k, v in params.items() if v is not None}
+            url += "?" + urlencode(encoded)
+        return url
+
+    def request(self, method: str, path: str, params: Optional[dict] = None, body: Optional[dict] = None,
+                timeout: Optional[float] = None, versioned: bool = True):
+        """
+        Sends a request on a pooled connection and returns the decoded body.
+
+        Args:
+            method: HTTP method.
+            path: API path without the version prefix, e.g. '/containers/json'.
+            params: Query parameters. Dict values (such as 'filters') are JSON encoded.
+            body: Optional JSON request body.
+            timeout: Socket timeout override for slow calls such as container stop.
+            versioned: Whether to prefix the path with the API version.
+        """
+        url = self._build_url(path, params, versioned)
+        headers = {"Host": "docker"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+
+        for attempt in range(2):
+            conn = self._acquire()
+            if timeout is not None:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+            try:
+                conn.request(method, url, body=payload, headers=headers)
+                response = conn.getresponse()
+                raw = response.read()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if timeout is not None:
+                conn.timeout = self.timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(self.timeout)
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return self._decode(response, raw)
+
+    def _decode(self, response: http.client.HTTPResponse, raw: bytes):
+        data = raw
+        if raw and "json" in (response.getheader("Content-Type") or ""):
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                # Streaming endpoints (e.g. image pulls) send one JSON document per line
+                # under the same content type; they have to be read with stream().
+                text = raw.decode("utf-8", errors="replace").strip()
+                raise DockerAPIError(response.status, f"Expected a single JSON document, got: {text[:200]}")
+        elif raw:
+            data = raw.decode("utf-8", errors="replace")
+        if response.status >= 400:
+            message = data.get("message", "") if isinstance(data, dict) else str(data)
+            raise DockerAPIError(response.status, message.strip())
+        return data
+
+    def stream(self, method: str, path: str, params: Optional[dict] = None) -> Iterator[dict]:
+        """
+        Yields JSON objects from a streaming endpoint such as /events or /containers/{id}/stats.
+
+        Streams hold their connection for their whole lifetime, so they use a
+        dedicated connection outside the pool.
+        """
+        conn = UnixHTTPConnection(self.socket_path, timeout=None)
+        try:
+            conn.request(method, self._build_url(path, params, True), headers={"Host": "docker"})
+            response = conn.getresponse()
+            if response.status >= 400:
+                self._decode(response, response.read())
+            while True:
+                line = response.readline()
+                if not line:
+                    return
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+
+def container_endpoint(container_name: str, action: str = "") -> str:
+    """Builds a /containers/{name}/{action} path with the name safely quoted."""
+    path = f"/containers/{quote(container_name, safe='')}"
+    return f"{path}/{action}" if action else path
@@ -1,26 +1,108 @@
 import subprocess
 import os
+import http.client
+import json
 from typing import List, Optional
+from urllib.parse import quote
+from .docker_api import DockerAPIClient, DockerAPIError, container_endpoint
 
-def run_container(image: str, command: List[str], container_name: str, volumes: Optional[dict] = None) -> dict:
-    """
-    Generic Docker run utility.
+# "api" talks to the Docker Engine API over the daemon socket, "cli" forks the
+# docker binary, "auto" uses the API when the socket answers and the CLI otherwise.
+DOCKER_BACKEND = os.environ.get("DOCKER_BACKEND", "auto").lower()
 
-    Args:
-        image: The Docker image to use.
-        command: List of commands/arguments to pass to the container.
-        container_name: The name for the container.
-        volumes: Dict of {host_path: container_path} mappings.
-    """
+_api_client = None
+
+
+def get_api_client() -> Optional[DockerAPIClient]:
+    """Returns the shared API client, or None when the CLI backend should be used."""
+    global _api_client
+    if DOCKER_BACKEND == "cli":
+        return None
+    if _api_client is None:
+        client = DockerAPIClient()
+        if DOCKER_BACKEND != "api" and not client.available():
+            return None
+        _api_client = client
+    return _api_client
+
+
+def _split_image(image: str):
+    """Splits 'repo:tag' or 'repo@digest' into (repo, tag), leaving registry ports intact."""
+    repo, sep, digest = image.partition("@")
+    if sep:
+        # A digest pins the image on its own; any tag in front of it is dropped, as docker pull does.
+        return _split_image(repo)[0], digest
+    repo, sep, tag = image.rpartition(":")
+    if not sep or "/" in tag:
+        return image, "latest"
+    return repo, tag
+
+
+def _run_container_api(client: DockerAPIClient, image: str, command: List[str], container_name: str,
+                       volumes: Optional[dict] = None, labels: Optional[dict] = None,
+                       cpus: Optional[float] = None, memory_mb: Optional[int] = None,
+                       entrypoint: Optional[str] = None) -> dict:
+    body = {
+        "Image": image,
+        "Cmd": command,
+        "Labels": labels or {},
+        "HostConfig": {
+            "AutoRemove": True,
+            "Binds": [f"{host_path}:{container_path}" for host_path, container_path in (volumes or {}).items()],
+        },
+    }
+    if entrypoint:
+        body["Entrypoint"] = [entrypoint]
+    if cpus:
+        body["HostConfig"]["NanoCpus"] = int(cpus * 1e9)
+    if memory_mb:
+        body["HostConfig"]["Memory"] = int(memory_mb) * 1024 * 1024
+    try:
+        try:
+            created = client.request("POST", "/containers/create", params={"name": container_name}, body=body)
+        except DockerAPIError as e:
+            if e.status != 404:
+                raise
+            # Image is not present locally; pull it like `docker run` would.
+            _pull_image_api(client, image)
+            created = client.request("POST", "/containers/create", params={"name": container_name}, body=body)
+        client.request("POST", container_endpoint(created["Id"], "start"))
+        return {
+            "status": "success",
+            "message": f"Container {container_name} started successfully.",
+            "container_name": container_name
+        }
+    except DockerAPIError as e:
+        return {
+            "status": "error",
+            "message": f"Failed to start container {container_name}: {e.message}"
+        }
+
+
+def _run_container_cli(image: str, command: List[str], container_name: str, volumes: Optional[dict] = None,
+                       labels: Optional[dict] = None, cpus: Optional[float] = None,
+                       memory_mb: Optional[int] = None, entrypoint: Optional[str] = None) -> dict:
     docker_command = ["docker", "run", "--detach", "--name", container_name, "--rm"]
-    
+
+    if entrypoint:
+        docker_command.extend(["--entrypoint", entrypoint])
+
+    if cpus:
+        docker_command.extend(["--cpus", str(cpus)])
+    if memory_mb:
+        docker_command.extend(["--memory", f"{int(memory_mb)}m"])
+
     if volumes:
         for host_path, container_path in volumes.items():
             docker_command.extend(["-v", f"{host_path}:{container_path}"])
-            
+
+    if labels:
+        for key, value in labels.items():
+            docker_command.extend(["--label", f"{key}={value}"])
+
     docker_command.append(image)
     docker_command.extend(command)
-    
+
     try:
         subprocess.run(docker_command, check=True, capture_output=True, text=True)
         return {
@@ -34,32 +116,278 @@ def run_container(image: str, command: List[str], container_name: str, volumes:
             "message": f"Failed to start container {container_name}: {e.stderr or str(e)}"
         }
 
-def stop_container(container_name: str) -> dict:
-    """Generic Docker stop utility."""
+
+def run_container(image: str, command: List[str], container_name: str, volumes: Optional[dict] = None,
+                  labels: Optional[dict] = None, cpus: Optional[float] = None, memory_mb: Optional[int] = None,
+                  entrypoint: Optional[str] = None) -> dict:
+    """
+    Generic Docker run utility.
+
+    Args:
+        image: The Docker image to use.
+        command: List of commands/arguments to pass to the container.
+        container_name: The name for the container.
+        volumes: Dict of {host_path: container_path} mappings.
+        labels: Dict of container labels, used to identify test containers.
+        cpus: Optional CPU limit for the container.
+        memory_mb: Optional memory limit for the container, in MiB.
+        entrypoint: Optional executable replacing the image's entrypoint.
+    """
+    client = get_api_client()
+    if client:
+        try:
+            return _run_container_api(client, image, command, container_name, volumes, labels, cpus, memory_mb,
+                                      entrypoint)
+        except (OSError, http.client.HTTPException):
+            pass
+    return _run_container_cli(image, command, container_name, volumes, labels, cpus, memory_mb, entrypoint)
+
+
+def _stop_container_api(client: DockerAPIClient, container_name: str) -> dict:
+    try:
+        # Allow for the daemon's 10 second graceful stop period.
+        client.request("POST", container_endpoint(container_name, "stop"), timeout=40)
+        return {"status": "success", "message": f"Successfully stopped container: {container_name}"}
+    except DockerAPIError as e:
+        return {"status": "error", "message": f"Failed to stop container {container_name}: {e.message}"}
+
+
+def _stop_container_cli(container_name: str) -> dict:
     try:
         subprocess.run(["docker", "stop", container_name], check=True, capture_output=True, text=True)
         return {"status": "success", "message": f"Successfully stopped container: {container_name}"}
     except subprocess.CalledProcessError as e:
         return {"status": "error", "message": f"Failed to stop container {container_name}: {e.stderr or str(e)}"}
 
-def list_containers(image_pattern: str, container_name: Optional[str] = None) -> dict:
-    """Generic Docker list utility filtered by image pattern."""
+
+def stop_container(container_name: str) -> dict:
+    """Generic Docker stop utility."""
+    client = get_api_client()
+    if client:
+        try:
+            return _stop_container_api(client, container_name)
+        except (OSError, http.client.HTTPException):
+            pass
+    return _stop_container_cli(container_name)
+
+
+def _rename_container_api(client: DockerAPIClient, container_name: str, new_name: str) -> dict:
+    try:
+        client.request("POST", container_endpoint(container_name, "rename"), params={"name": new_name})
+        return {"status": "success", "message": f"Renamed container {container_name} to {new_name}"}
+    except DockerAPIError as e:
+        return {"status": "error", "message": f"Failed to rename container {container_name}: {e.message}"}
+
+
+def _rename_container_cli(container_name: str, new_name: str) -> dict:
+    try:
+        subprocess.run(["docker", "rename", container_name, new_name], check=True, capture_output=True, text=True)
+        return {"status": "success", "message": f"Renamed container {container_name} to {new_name}"}
+    except subprocess.CalledProcessError as e:
+        return {"status": "error", "message": f"Failed to rename container {container_name}: {e.stderr or str(e)}"}
+
+
+def rename_container(container_name: str, new_name: str) -> dict:
+    """Renames a container."""
+    client = get_api_client()
+    if client:
+        try:
+            return _rename_container_api(client, container_name, new_name)
+        except (OSError, http.client.HTTPException):
+            pass
+    return _rename_container_cli(container_name, new_name)
+
+
+def _update_container_api(client: DockerAPIClient, container_name: str, cpus: Optional[float],
+                          memory_mb: Optional[int]) -> dict:
+    body = {}
+    if cpus:
+        body["NanoCpus"] = int(cpus * 1e9)
+    if memory_mb:
+        body["Memory"] = body["MemorySwap"] = int(memory_mb) * 1024 * 1024
+    try:
+        client.request("POST", container_endpoint(container_name, "update"), body=body)
+        return {"status": "success", "message": f"Updated resources of container {container_name}"}
+    except DockerAPIError as e:
+        return {"status": "error", "message": f"Failed to update container {container_name}: {e.message}"}
+
+
+def _update_container_cli(container_name: str, cpus: Optional[float], memory_mb: Optional[int]) -> dict:
+    command = ["docker", "update"]
+    if cpus:
+        command.extend(["--cpus", str(cpus)])
+    if memory_mb:
+        command.extend(["--memory", f"{int(memory_mb)}m", "--memory-swap", f"{int(memory_mb)}m"])
+    try:
+        subprocess.run(command + [container_name], check=True, capture_output=True, text=True)
+        return {"status": "success", "message": f"Updated resources of container {container_name}"}
+    except subprocess.CalledProcessError as e:
+        return {"status": "error", "message": f"Failed to update container {container_name}: {e.stderr or str(e)}"}
+
+
+def update_container_resources(container_name: str, cpus: Optional[float] = None,
+                               memory_mb: Optional[int] = None) -> dict:
+    """Changes the CPU and memory limits of a running container."""
+    if not cpus and not memory_mb:
+        return {"status": "success", "message": "Nothing to update"}
+    client = get_api_client()
+    if client:
+        try:
+            return _update_container_api(client, container_name, cpus, memory_mb)
+        except (OSError, http.client.HTTPException):
+            pass
+    return _update_container_cli(container_name, cpus, memory_mb)
+
+
+def _pull_image_api(client: DockerAPIClient, image: str):
+    """Pulls an image, reading the progress stream to its end; a failed pull only shows up in that stream."""
+    repo, tag = _split_image(image)
+    for progress in client.stream("POST", "/images/create", params={"fromImage": repo, "tag": tag}):
+        if progress.get("errorDetail") or progress.get("error"):
+            detail = progress.get("errorDetail") or {}
+            raise DockerAPIError(500, detail.get("message") or progress.get("error") or f"Failed to pull {image}")
+
+
+def _image_reference_api(client: DockerAPIClient, image: str, pull: bool) -> dict:
+    try:
+        if pull:
+            _pull_image_api(client, image)
+        info = client.request("GET", f"/images/{quote(image, safe='/:@')}/json")
+    except DockerAPIError as e:
+        return {"status": "error", "message": f"Failed to resolve image {image}: {e.message}"}
+    return {"status": "success", "repo_digests": info.get("RepoDigests") or [], "image_id": info["Id"],
+            "entrypoint": (info.get("Config") or {}).get("Entrypoint") or []}
+
+
+def _image_reference_cli(image: str, pull: bool) -> dict:
+    try:
+        if pull:
+            subprocess.run(["docker", "pull", "--quiet", image], check=True, capture_output=True, text=True)
+        result = subprocess.run(["docker", "image", "inspect", "--format",
+                                 "{{json .RepoDigests}}\t{{.Id}}\t{{json .Config.Entrypoint}}", image],
+                                check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as e:
+        return {"status": "error", "message": f"Failed to resolve image {image}: {e.stderr or str(e)}"}
+    digests, image_id, entrypoint = result.stdout.strip().split("\t")
+    return {"status": "success", "repo_digests": json.loads(digests) or [], "image_id": image_id,
+            "entrypoint": json.loads(entrypoint) or []}
+
+
+def image_reference(image: str, pull: bool = False) -> dict:
+    """
+    Looks up a local image's registry digests, ID and entrypoint, optionally pulling it first.
+
+    Args:
+        image: Image reference, e.g. 'loadimpact/k6:latest'.
+        pull: Pull the tag from its registry before inspecting it.
+    """
+    client = get_api_client()
+    if client:
+        try:
+            return _image_reference_api(client, image, pull)
+        except (OSError, http.client.HTTPException):
+            pass
+    return _image_reference_cli(image, pull)
+
+
+def _list_containers_api(client: DockerAPIClient, image_pattern: str, container_name: Optional[str] = None) -> dict:
+    filters = {"ancestor": [image_pattern]}
+    if container_name:
+        filters["name"] = [container_name]
+    try:
+        result = client.request("GET", "/containers/json", params={"filters": filters})
+    except DockerAPIError as e:
+        return {"status": "error", "message": f"Failed to list containers: {e.message}"}
+
+    if not result:
+        return {"status": "success", "message": "No matching containers found.", "containers": []}
+    containers = [
+        {"container_name": c["Names"][0].lstrip("/"), "status": c["Status"], "image": c["Image"]}
+        for c in result
+    ]
+    return {"status": "success", "containers": containers}
+
+
+def _list_containers_cli(image_pattern: str, container_name: Optional[str] = None) -> dict:
     command = ["docker", "ps", "--format", "{{.Names}}\t{{.Status}}\t{{.Image}}", "--filter", f"ancestor={image_pattern}"]
     if container_name:
         command.extend(["--filter", f"name={container_name}"])
-        
+
     try:
         result = subprocess.run(command, check=True, capture_output=True, text=True)
         output = result.stdout.strip().split('\n')
         if not output or output == ['']:
             return {"status": "success", "message": "No matching containers found.", "containers": []}
-        
+
         containers = []
         for line in output:
             if line:
                 name, status, image = line.split('\t')
                 containers.append({"container_name": name, "status": status, "image": image})
-        
+
         return {"status": "success", "containers": containers}
     except subprocess.CalledProcessError as e:
         return {"status": "error", "message": f"Failed to list containers: {e.stderr or str(e)}"}
+
+
+def list_containers(image_pattern: str, container_name: Optional[str] = None) -> dict:
+    """Generic Docker list utility filtered by image pattern."""
+    client = get_api_client()
+    if client:
+        try:
+            return _list_containers_api(client, image_pattern, container_name)
+        except (OSError, http.client.HTTPException):
+            pass
+    return _list_containers_cli(image_pattern, container_name)
+
+
+def _list_labeled_containers_api(client: DockerAPIClient, label: str) -> dict:
+    try:
+        result = client.request("GET", "/containers/json", params={"filters": {"label": [label]}})
+    except DockerAPIError as e:
+        return {"status": "error", "message": f"Failed to list containers: {e.message}"}
+    containers = [
+        {
+            "container_name": c["Names"][0].lstrip("/"),
+            "status": c["Status"],
+            "image": c["Image"],
+            "labels": c.get("Labels") or {},
+        }
+        for c in result
+    ]
+    return {"status": "success", "containers": containers}
+
+
+def _list_labeled_containers_cli(label: str, label_keys: List[str]) -> dict:
+    label_format = "\t".join(f'{{{{.Label "{key}"}}}}' for key in label_keys)
+    command = ["docker", "ps", "--format", f"{{{{.Names}}}}\t{{{{.Status}}}}\t{{{{.Image}}}}\t{label_format}",
+               "--filter", f"label={label}"]
+    try:
+        result = subprocess.run(command, check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as e:
+        return {"status": "error", "message": f"Failed to list containers: {e.stderr or str(e)}"}
+
+    containers = []
+    for line in result.stdout.splitlines():
+        if line:
+            name, status, image, *values = line.split('\t')
+            labels = {key: value for key, value in zip(label_keys, values) if value}
+            containers.append({"container_name": name, "status": status, "image": image, "labels": labels})
+    return {"status": "success", "containers": containers}
+
+
+def list_labeled_containers(label: str, label_keys: Optional[List[str]] = None) -> dict:
+    """
+    Lists running containers carrying the given label, with their labels.
+
+    Args:
+        label: Label key (or key=value) to filter on.
+        label_keys: Label keys to read back when the CLI backend is used.
+    """
+    client = get_api_client()
+    if client:
+        try:
+            return _list_labeled_containers_api(client, label)
+        except (OSError, http.client.HTTPException):
+            pass
+    return _list_labeled_containers_cli(label, label_keys or [label.split("=", 1)[0]])
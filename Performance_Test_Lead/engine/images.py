@@ -0,0 +1,105 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .docker_utils import image_reference
+
+# Generator image per tool, as configured tags.
+GENERATOR_IMAGES = {
+    "jmeter": os.environ.get("JMETER_IMAGE", "custmeter:latest"),
+    "k6": os.environ.get("K6_IMAGE", "loadimpact/k6:latest"),
+    "locust": os.environ.get("LOCUST_IMAGE", "locustio/locust:latest"),
+    "browser": os.environ.get("BROWSER_IMAGE", "mcr.microsoft.com/playwright/python:v1.47.0-jammy"),
+}
+
+# Pin tags to the digest they pointed at when first resolved, so every run of a
+# session uses the same image even if ':latest' moves underneath it.
+PIN_IMAGES = os.environ.get("GENERATOR_PIN_IMAGES", "1") != "0"
+
+
+def _pinned_reference(image: str, reference: dict) -> str:
+    """Picks the digest reference matching the tag's repository, or the image ID for local builds."""
+    repo = image.rsplit(":", 1)[0] if "/" not in image.rsplit(":", 1)[-1] else image
+    for digest in reference["repo_digests"]:
+        if digest.split("@", 1)[0] in (repo, f"docker.io/{repo}", f"docker.io/library/{repo}"):
+            return digest
+    if reference["repo_digests"]:
+        return reference["repo_digests"][0]
+    return reference["image_id"]
+
+
+class ImagePins:
+    """Resolves generator image tags to digests once and serves the cached pin afterwards."""
+
+    def __init__(self):
+        self._pins = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, image: str) -> str:
+        """Returns the pinned reference for a tag, pulling it the first time if it is not present locally."""
+        if not PIN_IMAGES:
+            return image
+        with self._lock:
+            pinned = self._pins.get(image)
+        if pinned:
+            return pinned
+        try:
+            reference = image_reference(image)
+            if reference["status"] != "success":
+                reference = image_reference(image, pull=True)
+        except Exception as e:
+            reference = {"status": "error", "message": str(e)}
+        if reference["status"] != "success":
+            # Leave the tag as is; run_container reports the real error.
+            return image
+        pinned = _pinned_reference(image, reference)
+        with self._lock:
+            self._pins[image] = pinned
+        return pinned
+
+    def prepull(self, images: Optional[list] = None, refresh: bool = False) -> dict:
+        """
+        Pulls images in parallel ahead of the first test and pins them.
+
+        Args:
+            images: Tags to pull; defaults to every generator image.
+            refresh: Re-pull tags that are already pinned, moving the pin to the newest digest.
+        """
+        images = images or list(GENERATOR_IMAGES.values())
+
+        def pull(image):
+            with self._lock:
+                pinned = self._pins.get(image)
+            if pinned and not refresh:
+                return image, {"status": "success", "pinned": pinned, "pulled": False}
+            try:
+                reference = image_reference(image, pull=True)
+            except Exception as e:
+                # One bad image must not abort the pulls of the others.
+                reference = {"status": "error", "message": f"Failed to pull image {image}: {e}"}
+            if reference["status"] != "success":
+                return image, reference
+            pinned = _pinned_reference(image, reference)
+            with self._lock:
+                self._pins[image] = pinned
+            return image, {"status": "success", "pinned": pinned, "pulled": True}
+
+        with ThreadPoolExecutor(max_workers=len(images)) as pool:
+            return dict(pool.map(pull, images))
+
+    def pins(self) -> dict:
+        with self._lock:
+            return dict(self._pins)
+
+
+_pins = ImagePins()
+
+
+def resolve_image(image: str) -> str:
+    """Returns the digest-pinned reference of an image tag."""
+    return _pins.resolve(image)
+
+
+def get_image_pins() -> ImagePins:
+    return _pins
@@ -0,0 +1,183 @@
+import http.client
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+from .docker_api import DockerAPIError
+from .docker_utils import get_api_client, list_labeled_containers
+from .stats import get_sampler
+
+# Labels stamped on every container started by the providers.
+LABEL_TOOL = "gadk.tool"
+LABEL_RUN_ID = "gadk.run_id"
+LABEL_SCRIPT = "gadk.script"
+# Set on warm pool containers: the host directory holding their claim and command files.
+LABEL_POOL = "gadk.pool"
+LABEL_KEYS = [LABEL_TOOL, LABEL_RUN_ID, LABEL_SCRIPT, LABEL_POOL]
+POOL_CLAIM_FILE = "claim.json"
+
+# Container events that end a container's life as a running test.
+_EXIT_ACTIONS = {"die", "destroy"}
+
+
+def test_labels(tool: str, run_id: str, script: str) -> dict:
+    """Builds the label set a provider stamps on its containers."""
+    return {LABEL_TOOL: tool, LABEL_RUN_ID: run_id, LABEL_SCRIPT: script}
+
+
+def read_pool_claim(control_dir: str) -> Optional[dict]:
+    """Returns the labels a claimed pool container runs under, or None while it is idle."""
+    try:
+        with open(os.path.join(control_dir, POOL_CLAIM_FILE), encoding="utf-8") as f:
+            return json.load(f)["labels"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class ContainerInventory:
+    """
+    In-process view of running test containers.
+
+    The inventory is seeded with a single labelled listing and then kept
+    current from the Docker events stream, so reads never touch the daemon.
+    Without the API backend there is no events stream; reads then fall back
+    to one labelled listing per call.
+    """
+
+    def __init__(self, reconnect_delay: float = 2.0):
+        self.reconnect_delay = reconnect_delay
+        self._containers = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._watcher = None
+
+    def _record(self, name: str, image: str, status: str, labels: dict) -> Optional[dict]:
+        if labels.get(LABEL_POOL):
+            # Idle pool containers are not tests; claimed ones carry their test's labels in the claim file.
+            claimed = read_pool_claim(labels[LABEL_POOL])
+            if claimed is None:
+                return None
+            labels = {**labels, **claimed}
+        return {
+            "container_name": name,
+            "status": status,
+            "image": image,
+            "tool": labels.get(LABEL_TOOL),
+            "run_id": labels.get(LABEL_RUN_ID),
+            "script": labels.get(LABEL_SCRIPT),
+        }
+
+    def _load(self) -> dict:
+        result = list_labeled_containers(LABEL_TOOL, LABEL_KEYS)
+        if result["status"] != "success":
+            return result
+        records = [self._record(c["container_name"], c["image"], c["status"], c["labels"])
+                   for c in result["containers"]]
+        with self._lock:
+            self._containers = {record["container_name"]: record for record in records if record}
+        return result
+
+    def _sample_all(self):
+        """Starts resource sampling of every known container, re-attaching to tests that outlived an agent restart."""
+        with self._lock:
+            names = list(self._containers)
+        sampler = get_sampler()
+        for name in names:
+            sampler.watch(name)
+
+    def start(self):
+        """Starts the background events watcher if the API backend is available."""
+        if self._watcher is not None:
+            return
+        if get_api_client() is None:
+            if self._load()["status"] == "success":
+                self._sample_all()
+            return
+        self._watcher = threading.Thread(target=self._watch, name="container-inventory", daemon=True)
+        self._watcher.start()
+        self._synced.wait(timeout=5)
+
+    def _watch(self):
+        while True:
+            client = get_api_client()
+            since = int(time.time())
+            try:
+                if self._load()["status"] == "success":
+                    self._sample_all()
+                    self._synced.set()
+                # Replay from just before the seed listing so nothing is missed in between.
+                events = client.stream("GET", "/events", params={
+                    "since": since,
+                    "filters": {"type": ["container"], "label": [LABEL_TOOL]},
+                })
+                for event in events:
+                    self._apply(event)
+            except (OSError, http.client.HTTPException, DockerAPIError, ValueError):
+                pass
+            self._synced.clear()
+            time.sleep(self.reconnect_delay)
+
+    def _apply(self, event: dict):
+        action = event.get("Action") or event.get("status", "")
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        name = attributes.get("name")
+        if not name:
+            return
+        with self._lock:
+            if action in ("start", "rename"):
+                # Claimed pool containers appear under the test's name through a rename.
+                self._containers.pop(attributes.get("oldName", "").lstrip("/"), None)
+                record = self._record(name, attributes.get("image", event.get("from", "")), "running", attributes)
+                if record:
+                    self._containers[name] = record
+            elif action in ("pause", "unpause") and name in self._containers:
+                self._containers[name]["status"] = "paused" if action == "pause" else "running"
+            elif action in _EXIT_ACTIONS:
+                self._containers.pop(name, None)
+
+    def add(self, name: str, image: str, labels: dict):
+        """Records a container this process just started, ahead of its start event."""
+        with self._lock:
+            self._containers[name] = self._record(name, image, "running", labels)
+
+    def remove(self, name: str):
+        """Drops a container this process just stopped, ahead of its die event."""
+        with self._lock:
+            self._containers.pop(name, None)
+
+    def snapshot(self, tool: Optional[str] = None, run_id: Optional[str] = None) -> List[dict]:
+        """Returns copies of the tracked containers, optionally filtered by tool or run id."""
+        if not self._synced.is_set():
+            self._load()
+        with self._lock:
+            records = [dict(c) for c in self._containers.values()]
+        if tool:
+            records = [c for c in records if c["tool"] == tool]
+        if run_id:
+            records = [c for c in records if c["run_id"] == run_id]
+        return records
+
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+
+def get_inventory() -> ContainerInventory:
+    """Returns the shared inventory, starting its events watcher on first use."""
+    global _inventory
+    with _inventory_lock:
+        if _inventory is None:
+            _inventory = ContainerInventory()
+            _inventory.start()
+    return _inventory
+
+
+def track_started(result: dict, image: str, labels: dict) -> dict:
+    """Adds a successfully started container to the inventory, starts sampling its resource usage and passes the result through."""
+    if result.get("status") == "success":
+        get_inventory().add(result["container_name"], image, labels)
+        get_sampler().watch(result["container_name"])
+        result["run_id"] = labels[LABEL_RUN_ID]
+    return result
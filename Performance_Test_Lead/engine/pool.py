@@ -0,0 +1,271 @@
+import json
+import os
+import re
+import shlex
+import shutil
+import threading
+from typing import List, Optional
+
+from .docker_utils import image_reference, list_labeled_containers, rename_container, run_container, \
+    stop_container, update_container_resources
+from .images import GENERATOR_IMAGES, resolve_image
+from .inventory import LABEL_KEYS, LABEL_POOL, LABEL_TOOL, POOL_CLAIM_FILE, track_started
+from .results.output import OUTPUT_TMPFS, RESULTS_DIR
+from .scheduler import _parse_limits, container_limits
+from .staging import STAGING_DIR
+
+# Idle containers kept ready per tool, e.g. "k6=2,locust=1,jmeter=1". Empty disables the pool.
+POOL_SIZES = _parse_limits(os.environ.get("GENERATOR_POOL_SIZE", ""))
+POOL_DIR = os.path.join(RESULTS_DIR, ".pool")
+
+# Entrypoints set on fresh containers of images whose own entrypoint is not the generator.
+ENTRYPOINTS = {"browser": "python3"}
+
+# Run once while a container idles. A JVM cannot be handed a new test plan
+# once started, so for JMeter this loads the JDK and JMeter jars into the
+# page cache and lets the JVM write its class data, which is what makes a
+# cold first start slow.
+WARMUP = {"jmeter": "jmeter --version"}
+
+
+# A pool container cannot know a test's mounts in advance, so it mounts the roots
+# every test's mounts live under; a claim rewrites the test's paths onto them.
+def _pool_mounts() -> list:
+    """Returns (host root, pool mount, read-only) for every root a claimed test may use."""
+    mounts = [(os.path.realpath(STAGING_DIR), "/staging", True), (os.path.realpath(RESULTS_DIR), "/runs", False)]
+    if OUTPUT_TMPFS:
+        mounts.append((os.path.realpath(OUTPUT_TMPFS), "/runs-tmpfs", False))
+    return mounts
+
+
+def _translate(volumes: dict) -> Optional[dict]:
+    """Maps each of a test's container paths to the same host directory under the pool mounts, or None."""
+    paths = {}
+    for host_path, container_path in volumes.items():
+        host_path = os.path.realpath(host_path)
+        container_path = container_path.split(":", 1)[0]
+        for root, mount, _ in _pool_mounts():
+            if host_path == root or host_path.startswith(root + os.sep):
+                paths[container_path] = mount + host_path[len(root):]
+                break
+        else:
+            return None
+    return paths
+
+
+def _entrypoint(tool: str, image: str) -> Optional[list]:
+    """The entrypoint a fresh container runs the tool's arguments with, or None if the image is not inspectable."""
+    if tool in ENTRYPOINTS:
+        return [ENTRYPOINTS[tool]]
+    reference = image_reference(image)
+    return reference["entrypoint"] if reference["status"] == "success" else None
+
+
+def _rewrite(argument: str, paths: dict) -> str:
+    for container_path, pool_path in paths.items():
+        argument = re.sub(rf"(^|=){re.escape(container_path)}(?=/|$)", lambda m: m.group(1) + pool_path, argument)
+    return argument
+
+
+_IDLE_SCRIPT = """{warmup}
+while [ ! -f /pool/command ]; do sleep 0.1; done
+exec sh /pool/command
+"""
+
+
+class GeneratorPool:
+    """
+    Pre-created, already running generator containers that a test can claim.
+
+    A pool container starts with a shell that waits for a command file in
+    its control directory (mounted at /pool). Claiming it renames it to the
+    test's container name, applies the test's resource limits and writes
+    the command file, after which the shell execs the image's entrypoint
+    with the test's arguments, as a fresh container would. No image
+    pull or container creation is left on the start path, and the
+    container's lifecycle is the test's, exactly like a freshly run one.
+
+    Pool containers mount the staging and results roots rather than one
+    test's directories, and the paths in a claimed command are rewritten
+    onto them. A script that hard-codes an absolute /tests path therefore
+    needs a fresh container (LOAD_TEST_STAGE_ASSETS=0 disables claiming).
+    """
+
+    def __init__(self, sizes: Optional[dict] = None):
+        self.sizes = POOL_SIZES if sizes is None else sizes
+        self._idle = {tool: [] for tool in self.sizes}
+        self._lock = threading.Lock()
+        self._filling = set()
+        self._adopted = False
+
+    def _control_dir(self, name: str) -> str:
+        return os.path.join(os.getcwd(), POOL_DIR, name)
+
+    def _adopt(self):
+        """Picks up idle pool containers left running by an earlier agent session."""
+        result = list_labeled_containers(LABEL_POOL, LABEL_KEYS)
+        if result["status"] != "success":
+            return
+        in_use = set()
+        for container in result["containers"]:
+            labels = container["labels"]
+            control_dir = labels.get(LABEL_POOL)
+            tool = labels.get(LABEL_TOOL)
+            in_use.add(os.path.basename(control_dir or ""))
+            if tool in self._idle and control_dir and not os.path.exists(os.path.join(control_dir, POOL_CLAIM_FILE)):
+                entrypoint = _entrypoint(tool, container["image"])
+                if entrypoint is None:
+                    stop_container(container["container_name"])
+                    continue
+                self._idle[tool].append({"name": container["container_name"], "image": container["image"],
+                                         "control_dir": control_dir, "entrypoint": entrypoint})
+        # Control directories of pool containers that have since finished their test.
+        if os.path.isdir(POOL_DIR):
+            for entry in os.scandir(POOL_DIR):
+                if entry.is_dir() and entry.name not in in_use:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+    def fill(self, tool: Optional[str] = None) -> dict:
+        """Tops the pool up to its configured size and returns the number of idle containers per tool."""
+        with self._lock:
+            if not self._adopted:
+                self._adopted = True
+                self._adopt()
+        for pool_tool in ([tool] if tool else list(self.sizes)):
+            if pool_tool not in self.sizes:
+                continue
+            image = resolve_image(GENERATOR_IMAGES[pool_tool])
+            while True:
+                with self._lock:
+                    idle = self._idle[pool_tool]
+                    # Drop containers of an image that has since been re-pinned.
+                    for stale in [c for c in idle if c["image"] != image]:
+                        idle.remove(stale)
+                        stop_container(stale["name"])
+                    if len(idle) >= self.sizes[pool_tool]:
+                        break
+                container = self._create(pool_tool, image)
+                if container is None:
+                    break
+                with self._lock:
+                    self._idle[pool_tool].append(container)
+        return self.status()
+
+    def _create(self, tool: str, image: str) -> Optional[dict]:
+        entrypoint = _entrypoint(tool, image)
+        if entrypoint is None:
+            return None
+        name = f"pool_{tool}_{os.urandom(4).hex()}"
+        control_dir = self._control_dir(name)
+        os.makedirs(control_dir, exist_ok=True)
+        script = _IDLE_SCRIPT.format(warmup=f"{WARMUP[tool]} >/dev/null 2>&1" if tool in WARMUP else ":")
+        volumes = {root: f"{mount}:ro" if read_only else mount for root, mount, read_only in _pool_mounts()}
+        for root in volumes:
+            os.makedirs(root, exist_ok=True)
+        volumes[control_dir] = "/pool"
+        result = run_container(image, ["-c", script], name, volumes,
+                               {LABEL_TOOL: tool, LABEL_POOL: control_dir}, entrypoint="sh",
+                               **container_limits(tool))
+        if result["status"] != "success":
+            shutil.rmtree(control_dir, ignore_errors=True)
+            return None
+        return {"name": name, "image": image, "control_dir": control_dir, "entrypoint": entrypoint}
+
+    def _refill_later(self, tool: str):
+        with self._lock:
+            if tool in self._filling:
+                return
+            self._filling.add(tool)
+
+        def refill():
+            try:
+                self.fill(tool)
+            finally:
+                with self._lock:
+                    self._filling.discard(tool)
+        threading.Thread(target=refill, name=f"pool-fill-{tool}", daemon=True).start()
+
+    def claim(self, tool: str, image: str, command: List[str], container_name: str, labels: dict, volumes: dict,
+              cpus: Optional[float] = None, memory_mb: Optional[int] = None) -> Optional[dict]:
+        """Starts a test in an idle pool container; returns None when none is available or usable."""
+        paths = _translate(volumes)
+        if paths is None:
+            return None
+        with self._lock:
+            idle = self._idle.get(tool) or []
+            container = next((c for c in idle if c["image"] == image), None)
+            if container is None:
+                return None
+            idle.remove(container)
+        self._refill_later(tool)
+
+        control_dir = container["control_dir"]
+        if (cpus or memory_mb) and {"cpus": cpus, "memory_mb": memory_mb} != container_limits(tool):
+            if update_container_resources(container["name"], cpus, memory_mb)["status"] != "success":
+                # The test would run with the pool's limits, not its own; start it in a fresh container instead.
+                stop_container(container["name"])
+                shutil.rmtree(control_dir, ignore_errors=True)
+                return None
+        with open(os.path.join(control_dir, POOL_CLAIM_FILE), "w", encoding="utf-8") as f:
+            json.dump({"container_name": container_name, "labels": labels}, f)
+        renamed = rename_container(container["name"], container_name)
+        if renamed["status"] != "success":
+            stop_container(container["name"])
+            return {"status": "error", "message": f"Failed to start container {container_name}: {renamed['message']}"}
+        # Write then rename, so the waiting shell never runs a half-written command.
+        command_file = os.path.join(control_dir, "command")
+        with open(f"{command_file}.tmp", "w", encoding="utf-8") as f:
+            f.write(f"exec {shlex.join([*container['entrypoint'], *(_rewrite(arg, paths) for arg in command)])}\n")
+        os.replace(f"{command_file}.tmp", command_file)
+        return {
+            "status": "success",
+            "message": f"Container {container_name} started successfully from the warm pool.",
+            "container_name": container_name,
+        }
+
+    def drain(self) -> int:
+        """Stops every idle pool container and returns how many were stopped."""
+        with self._lock:
+            containers = [c for idle in self._idle.values() for c in idle]
+            for idle in self._idle.values():
+                idle.clear()
+        for container in containers:
+            stop_container(container["name"])
+            shutil.rmtree(container["control_dir"], ignore_errors=True)
+        return len(containers)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {tool: {"idle": len(self._idle[tool]), "size": self.sizes[tool]} for tool in self.sizes}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> GeneratorPool:
+    """Returns the shared pool, filling it in the background on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = GeneratorPool()
+            if _pool.sizes:
+                threading.Thread(target=_pool.fill, name="pool-fill", daemon=True).start()
+    return _pool
+
+
+def start_generator(tool: str, command: List[str], container_name: str, labels: dict, volumes: dict,
+                    resources: Optional[dict] = None) -> dict:
+    """
+    Starts a generator container for a test, from the warm pool when possible.
+
+    The image tag is pinned to its digest, so a pulled ':latest' is not
+    re-resolved (or re-pulled) on every run.
+    """
+    resources = resources or {}
+    image = resolve_image(GENERATOR_IMAGES[tool])
+    result = get_pool().claim(tool, image, command, container_name, labels, volumes, **resources)
+    if result is None:
+        result = run_container(image, command, container_name, volumes, labels, entrypoint=ENTRYPOINTS.get(tool),
+                               **resources)
+    return track_started(result, image, labels)
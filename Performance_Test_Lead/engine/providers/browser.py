@@ -0,0 +1,65 @@
+import os
+import re
+from typing import Optional
+from ..inventory import test_labels
+from ..pool import start_generator
+from ..results.output import BROWSER_CSV_SUFFIX, run_output_dir
+from ..staging import STAGE_ASSETS, TESTS_MOUNT, stage_assets
+
+# The runner ships with the engine and is staged next to the journey, under a
+# name no test asset uses.
+RUNNER_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "browser_runner.py")
+RUNNER_PATH = ".gadk/browser_runner.py"
+
+def duration_seconds(value: str) -> Optional[float]:
+    """Seconds in a runner duration such as '90', '90s', '5m' or '1h'; None when it is not one."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", value or "0")
+    if not match:
+        return None
+    return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+def _stand_in_files(stand_in_dir: str) -> list:
+    """Every file of a stand-in site directory, relative to the working directory."""
+    files = []
+    for dirpath, _, filenames in os.walk(stand_in_dir):
+        files.extend(os.path.relpath(os.path.join(dirpath, name)) for name in filenames)
+    return files
+
+def browser_runner(journey_file: str, container_name: str, base_url: Optional[str], contexts: int, browsers: int,
+                   iterations: int, duration: str, ramp_up: str = "0", think_time_ms: int = 0,
+                   stand_in_dir: Optional[str] = None, run_id: Optional[str] = None, resources: Optional[dict] = None,
+                   data_files: Optional[list] = None) -> dict:
+    """Browser-load runner configuration writing page and journey timings as CSV to the run's output directory."""
+    run_id = run_id or container_name
+    if not base_url and not stand_in_dir:
+        return {"status": "error", "message": "Give a base_url or a stand_in_dir to serve locally."}
+    if stand_in_dir and not os.path.isdir(stand_in_dir):
+        return {"status": "error", "message": f"Stand-in directory not found: {stand_in_dir}"}
+    data_files = list(data_files or []) + (_stand_in_files(stand_in_dir) if stand_in_dir else [])
+    staged = stage_assets(journey_file, data_files, {RUNNER_PATH: RUNNER_FILE})
+    if staged["status"] != "success":
+        return staged
+    host_dir, container_dir = run_output_dir(run_id)
+    volumes = {staged["path"]: f"{TESTS_MOUNT}:ro", host_dir: container_dir}
+    runner = f"{TESTS_MOUNT}/{RUNNER_PATH}"
+    if not STAGE_ASSETS:
+        # The working directory is mounted as is, so the runner needs its own mount.
+        runner = "/runner/browser_runner.py"
+        volumes[RUNNER_FILE] = f"{runner}:ro"
+    command = [
+        runner,
+        "--journey", f"{TESTS_MOUNT}/{journey_file}",
+        "--output", f"{container_dir}/{container_name}{BROWSER_CSV_SUFFIX}",
+        "--contexts", str(contexts),
+        "--browsers", str(browsers),
+        "--iterations", str(iterations),
+        "--duration", duration,
+        "--ramp-up", ramp_up,
+        "--think-time-ms", str(think_time_ms),
+    ]
+    if stand_in_dir:
+        command.extend(["--stand-in", f"{TESTS_MOUNT}/{os.path.relpath(stand_in_dir)}"])
+    else:
+        command.extend(["--base-url", base_url])
+    labels = test_labels("browser", run_id, journey_file)
+    return start_generator("browser", command, container_name, labels, volumes, resources)
@@ -1,14 +1,35 @@
-import os
-from ..docker_utils import run_container
+from typing import Optional
+from ..inventory import test_labels
+from ..pool import start_generator
+from ..results.output import run_output_dir, run_output_file
+from ..staging import TESTS_MOUNT, stage_assets
 
-def jmeter_runner(test_plan: str, jtl_file: str, report_name: str, container_name: str) -> dict:
-    """JMeter-specific runner configuration."""
-    pwd = os.getcwd()
-    image = "custmeter:latest"
+def jmeter_runner(test_plan: str, jtl_file: str, report_name: Optional[str], container_name: str, run_id: Optional[str] = None,
+                  resources: Optional[dict] = None, data_files: Optional[list] = None) -> dict:
+    """
+    JMeter-specific runner configuration. The HTML dashboard is only generated when report_name is set.
+
+    The test plan and the files it references are mounted read-only; the JTL and the
+    dashboard are written to the run's output directory.
+    """
+    run_id = run_id or container_name
+    staged = stage_assets(test_plan, data_files)
+    if staged["status"] != "success":
+        return staged
+    host_dir, container_dir = run_output_dir(run_id)
+    _, container_jtl, results_jtl = run_output_file(run_id, jtl_file)
     command = [
-        "-n", "-t", f"/tests/{test_plan}",
-        "-l", f"/tests/{jtl_file}",
-        "-e", "-o", f"/tests/{report_name}"
+        "-n", "-t", f"{TESTS_MOUNT}/{test_plan}",
+        "-l", container_jtl
     ]
-    volumes = {pwd: "/tests"}
-    return run_container(image, command, container_name, volumes)
+    if report_name:
+        _, container_report, results_report = run_output_file(run_id, report_name)
+        command.extend(["-e", "-o", container_report])
+    volumes = {staged["path"]: f"{TESTS_MOUNT}:ro", host_dir: container_dir}
+    labels = test_labels("jmeter", run_id, test_plan)
+    result = start_generator("jmeter", command, container_name, labels, volumes, resources)
+    if result["status"] == "success":
+        result["jtl_file"] = results_jtl
+        if report_name:
+            result["report_dir"] = results_report
+    return result
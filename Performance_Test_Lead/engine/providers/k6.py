@@ -1,10 +1,34 @@
-import os
-from ..docker_utils import run_container
+from typing import Optional
+from ..inventory import test_labels
+from ..pool import start_generator
+from ..results.output import run_output_dir
+from ..staging import TESTS_MOUNT, stage_assets
 
-def k6_runner(test_script: str, container_name: str) -> dict:
-    """K6-specific runner configuration."""
-    pwd = os.getcwd()
-    image = "loadimpact/k6:latest"
-    command = ["run", f"/tests/{test_script}"]
-    volumes = {pwd: "/tests"}
-    return run_container(image, command, container_name, volumes)
+def execution_segments(shards: int) -> tuple:
+    """
+    Splits a k6 test into equal execution segments.
+
+    Returns (segments, sequence): one '--execution-segment' value per shard and the
+    shared '--execution-segment-sequence' that makes the shards add up to exactly
+    the scripted load.
+    """
+    points = ["0"] + [f"{i}/{shards}" for i in range(1, shards)] + ["1"]
+    segments = [f"{points[i]}:{points[i + 1]}" for i in range(shards)]
+    return segments, ",".join(points)
+
+def k6_runner(test_script: str, container_name: str, run_id: Optional[str] = None,
+              segment: Optional[str] = None, segment_sequence: Optional[str] = None,
+              resources: Optional[dict] = None, data_files: Optional[list] = None) -> dict:
+    """K6-specific runner configuration writing per-request samples as CSV to the run's output directory."""
+    run_id = run_id or container_name
+    staged = stage_assets(test_script, data_files)
+    if staged["status"] != "success":
+        return staged
+    host_dir, container_dir = run_output_dir(run_id)
+    command = ["run", "--out", f"csv={container_dir}/{container_name}.csv"]
+    if segment:
+        command.extend(["--execution-segment", segment, "--execution-segment-sequence", segment_sequence])
+    command.append(f"{TESTS_MOUNT}/{test_script}")
+    volumes = {staged["path"]: f"{TESTS_MOUNT}:ro", host_dir: container_dir}
+    labels = test_labels("k6", run_id, test_script)
+    return start_generator("k6", command, container_name, labels, volumes, resources)
@@ -1,17 +1,32 @@
 import os
-from ..docker_utils import run_container
+from typing import Optional
+from ..inventory import test_labels
+from ..pool import start_generator
+from ..results import locust as locust_results
+from ..results.output import run_output_dir
+from ..staging import TESTS_MOUNT, stage_assets
 
-def locust_runner(locust_file: str, container_name: str, host: str, users: int, spawn_rate: int, run_time: str) -> dict:
-    """Locust-specific runner configuration (headless mode)."""
-    pwd = os.getcwd()
-    image = "locustio/locust:latest"
+def locust_runner(locust_file: str, container_name: str, host: str, users: int, spawn_rate: int, run_time: str,
+                  run_id: Optional[str] = None, resources: Optional[dict] = None, data_files: Optional[list] = None) -> dict:
+    """Locust-specific runner configuration (headless mode) writing CSV stats history to the run's output directory."""
+    run_id = run_id or container_name
+    staged = stage_assets(locust_file, data_files)
+    if staged["status"] != "success":
+        return staged
+    host_dir, container_dir = run_output_dir(run_id)
     command = [
-        "-f", f"/tests/{locust_file}",
+        "-f", f"{TESTS_MOUNT}/{locust_file}",
         "--host", host,
         "--users", str(users),
         "--spawn-rate", str(spawn_rate),
         "--run-time", run_time,
-        "--headless"
+        "--headless",
+        "--csv", f"{container_dir}/{container_name}",
+        "--csv-full-history"
     ]
-    volumes = {pwd: "/tests"}
-    return run_container(image, command, container_name, volumes)
+    volumes = {staged["path"]: f"{TESTS_MOUNT}:ro", host_dir: container_dir}
+    labels = test_labels("locust", run_id, locust_file)
+    result = start_generator("locust", command, container_name, labels, volumes, resources)
+    if result["status"] == "success":
+        locust_results.follow(container_name, os.path.join(host_dir, container_name))
+    return result
@@ -0,0 +1,70 @@
+import csv
+from collections import Counter
+
+from .histogram import DEFAULT_SUB_BUCKET_BITS, LatencyHistogram
+from .latency import percentile_report
+
+# Page metrics the browser runner records: milliseconds since navigation start,
+# except CLS, which is a unitless layout-shift score.
+PAGE_METRICS = ("ttfb", "fcp", "lcp", "dom_content_loaded", "load", "cls")
+
+# CLS is recorded in thousandths so the integer histogram keeps three decimals.
+CLS_SCALE = 1000
+
+
+def _score_report(histogram: LatencyHistogram) -> dict:
+    """percentile_report for a histogram of scaled scores, scaled back and without the '_ms' units."""
+    report = {}
+    for key, value in percentile_report(histogram).items():
+        if key.endswith("_ms"):
+            report[key[:-3]] = round(value / CLS_SCALE, 4) if value is not None else None
+        else:
+            report[key] = value
+    return report
+
+
+def summarize_browser_csv(csv_files: list, sub_bucket_bits: int = DEFAULT_SUB_BUCKET_BITS) -> dict:
+    """
+    Aggregates browser runner CSVs into percentile summaries.
+
+    Page metrics are summarised over every page view, step durations per
+    journey step and whole journeys on their own, all as the percentile
+    figures the protocol-level tools report.
+    """
+    pages = {metric: LatencyHistogram(sub_bucket_bits) for metric in PAGE_METRICS}
+    steps = {}
+    journeys = LatencyHistogram(sub_bucket_bits)
+    errors = Counter()
+    contexts = set()
+    for csv_file in csv_files:
+        with open(csv_file, newline="", encoding="utf-8", errors="replace") as f:
+            for row in csv.DictReader(f):
+                try:
+                    value = float(row["value"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                metric = row.get("metric")
+                contexts.add((csv_file, row.get("context")))
+                if metric == "error":
+                    errors[f"{row.get('step')}: {row.get('error')}"] += 1
+                elif metric == "journey":
+                    journeys.record(round(value))
+                elif metric == "step":
+                    steps.setdefault(row.get("step"), LatencyHistogram(sub_bucket_bits)).record(round(value))
+                elif metric == "cls":
+                    pages[metric].record(round(value * CLS_SCALE))
+                elif metric in pages:
+                    pages[metric].record(round(value))
+
+    failed = sum(errors.values())
+    return {
+        "contexts": len(contexts),
+        "journeys": journeys.total,
+        "failed_journeys": failed,
+        "error_rate": round(failed / (journeys.total + failed), 4) if journeys.total + failed else 0.0,
+        "journey": percentile_report(journeys),
+        "pages": {metric: _score_report(histogram) if metric == "cls" else percentile_report(histogram)
+                  for metric, histogram in pages.items() if histogram.total},
+        "steps": {step: percentile_report(histogram) for step, histogram in steps.items()},
+        "errors": dict(errors.most_common(10)),
+    }
@@ -0,0 +1,195 @@
+import base64
+import math
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; fall back to pure Python
+    np = None
+
+# Values below 2**sub_bucket_bits get their own bucket; above that each power
+# of two is split into 2**(sub_bucket_bits - 1) linear buckets, which bounds
+# the relative error of any reported percentile to 2**(1 - sub_bucket_bits).
+DEFAULT_SUB_BUCKET_BITS = 7
+MAX_EXPONENT = 32
+# Back-filled coordinated-omission samples are generated at most this many at a
+# time, as a long stall at a short expected interval implies millions of them.
+OMITTED_BATCH = 1 << 20
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear histogram of non-negative integer latencies (HDR-style).
+
+    Memory depends only on the configured precision, never on the number of
+    samples, and two histograms with the same precision merge exactly, so
+    per-container or per-hour histograms can be combined into one.
+    """
+
+    def __init__(self, sub_bucket_bits: int = DEFAULT_SUB_BUCKET_BITS):
+        if not 2 <= sub_bucket_bits <= 16:
+            raise ValueError("sub_bucket_bits must be between 2 and 16")
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_buckets = 1 << sub_bucket_bits
+        self.half = self.sub_buckets // 2
+        self.bucket_count = self.sub_buckets + MAX_EXPONENT * self.half
+        self.counts = np.zeros(self.bucket_count, dtype=np.int64) if np is not None else [0] * self.bucket_count
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.sum = 0
+
+    @classmethod
+    def for_relative_error(cls, relative_error: float) -> "LatencyHistogram":
+        """Creates a histogram whose percentiles are within the given relative error (e.g. 0.01)."""
+        bits = max(2, math.ceil(1 - math.log2(relative_error)))
+        return cls(sub_bucket_bits=bits)
+
+    @property
+    def relative_error(self) -> float:
+        return 2.0 ** (1 - self.sub_bucket_bits)
+
+    def bucket_index(self, value: int) -> int:
+        """Maps a non-negative integer value to its bucket."""
+        if value < self.sub_buckets:
+            return max(value, 0)
+        shift = value.bit_length() - self.sub_bucket_bits
+        index = self.sub_buckets + (shift - 1) * self.half + ((value >> shift) - self.half)
+        return min(index, self.bucket_count - 1)
+
+    def bucket_indices(self, values):
+        """Vectorised bucket_index for a NumPy integer array."""
+        values = np.maximum(values.astype(np.int64), 0)
+        small = values < self.sub_buckets
+        shifts = np.zeros_like(values)
+        # bit_length - sub_bucket_bits, computed without a Python loop.
+        shifts[~small] = np.floor(np.log2(values[~small])).astype(np.int64) + 1 - self.sub_bucket_bits
+        indices = np.where(small, values,
+                           self.sub_buckets + (shifts - 1) * self.half + ((values >> shifts) - self.half))
+        return np.minimum(indices, self.bucket_count - 1)
+
+    def bucket_value(self, index: int) -> float:
+        """Returns the midpoint of the value range covered by a bucket."""
+        if index < self.sub_buckets:
+            return float(index)
+        shift = (index - self.sub_buckets) // self.half + 1
+        mantissa = (index - self.sub_buckets) % self.half + self.half
+        return (mantissa << shift) + ((1 << shift) - 1) / 2
+
+    def _track(self, count: int, value_sum: int, low: int, high: int):
+        self.total += count
+        self.sum += value_sum
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def record(self, value: int, count: int = 1):
+        value = int(value)
+        self.counts[self.bucket_index(value)] += count
+        self._track(count, value * count, value, value)
+
+    def record_corrected(self, value: int, expected_interval: int):
+        """
+        Records a value and back-fills the samples a stalled closed-loop generator never sent.
+
+        This is the coordinated-omission correction: a response that took k
+        expected intervals implies k - 1 requests that would have waited
+        value - interval, value - 2 * interval, ...
+        """
+        self.record(value)
+        if expected_interval <= 0:
+            return
+        missing = int(value) - expected_interval
+        while missing >= expected_interval:
+            self.record(missing)
+            missing -= expected_interval
+
+    def record_array(self, values, expected_interval: int = 0):
+        """Records a NumPy array of values in one vectorised pass, optionally with coordinated-omission correction."""
+        if len(values) == 0:
+            return
+        values = np.asarray(values, dtype=np.int64)
+        self._record_values(values)
+        if expected_interval > 0:
+            for omitted in _omitted_samples(values, expected_interval):
+                self._record_values(omitted)
+
+    def _record_values(self, values):
+        self.counts += np.bincount(self.bucket_indices(values), minlength=self.bucket_count)
+        self._track(int(len(values)), int(values.sum()), int(values.min()), int(values.max()))
+
+    def merge(self, other: "LatencyHistogram"):
+        """Adds another histogram's samples into this one."""
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        if np is not None:
+            self.counts += np.asarray(other.counts, dtype=np.int64)
+        else:
+            self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        if other.total:
+            self._track(other.total, other.sum, other.min, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """Returns the value at the given percentile (0-100)."""
+        if self.total == 0:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100 * self.total))
+        if np is not None:
+            index = int(np.searchsorted(np.cumsum(self.counts), rank))
+            return min(self.bucket_value(index), float(self.max))
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= rank:
+                return min(self.bucket_value(index), float(self.max))
+        return float(self.max)
+
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+    def to_dict(self) -> dict:
+        """Serialises the histogram compactly (zlib-compressed bucket counts)."""
+        if np is not None:
+            raw = np.asarray(self.counts, dtype="<i8").tobytes()
+        else:
+            raw = b"".join(int(c).to_bytes(8, "little", signed=True) for c in self.counts)
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "total": self.total,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "counts": base64.b64encode(zlib.compress(raw, 6)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls(sub_bucket_bits=data["sub_bucket_bits"])
+        raw = zlib.decompress(base64.b64decode(data["counts"]))
+        if np is not None:
+            histogram.counts = np.frombuffer(raw, dtype="<i8").astype(np.int64)
+        else:
+            histogram.counts = [int.from_bytes(raw[i:i + 8], "little", signed=True) for i in range(0, len(raw), 8)]
+        histogram.total = data["total"]
+        histogram.sum = data["sum"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+def _omitted_samples(values, expected_interval: int, batch: int = OMITTED_BATCH):
+    """
+    Yields the back-fill values of record_array's coordinated-omission correction in arrays of at most batch.
+
+    Value i implies repeats[i] omitted samples; they are numbered
+    consecutively across all values and generated one window of that
+    numbering at a time, so memory stays bounded however long the stalls.
+    """
+    repeats = np.maximum(values // expected_interval - 1, 0)
+    ends = np.cumsum(repeats)
+    total = int(ends[-1])
+    for first in range(0, total, batch):
+        positions = np.arange(first, min(first + batch, total), dtype=np.int64)
+        owners = np.searchsorted(ends, positions, side="right")
+        # Step j within each value's group runs 1..repeats[i].
+        steps = positions - (ends[owners] - repeats[owners]) + 1
+        yield values[owners] - steps * expected_interval
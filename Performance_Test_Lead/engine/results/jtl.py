@@ -0,0 +1,146 @@
+import csv
+from typing import Iterator, Optional
+
+from .histogram import LatencyHistogram, np
+
+# Column order JMeter uses when a JTL is written without a header row.
+DEFAULT_COLUMNS = [
+    "timeStamp", "elapsed", "label", "responseCode", "responseMessage", "threadName", "dataType",
+    "success", "failureMessage", "bytes", "sentBytes", "grpThreads", "allThreads", "URL",
+    "Latency", "IdleTime", "Connect",
+]
+PERCENTILES = (50, 90, 95, 99)
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+class LabelStats:
+    """Running aggregates for one sampler label."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.first_ts = None
+        self.last_end_ts = None
+
+    @property
+    def count(self) -> int:
+        return self.histogram.total
+
+    def add_window(self, first_ts: int, last_end_ts: int):
+        self.first_ts = first_ts if self.first_ts is None else min(self.first_ts, first_ts)
+        self.last_end_ts = last_end_ts if self.last_end_ts is None else max(self.last_end_ts, last_end_ts)
+
+    def summary(self) -> dict:
+        duration_s = max((self.last_end_ts - self.first_ts) / 1000, 0.001) if self.count else 0
+        result = {
+            "samples": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 4) if self.count else 0.0,
+            "throughput_rps": round(self.count / duration_s, 2) if duration_s else 0.0,
+            "mean_ms": round(self.histogram.mean(), 2),
+            "min_ms": self.histogram.min,
+            "max_ms": self.histogram.max,
+        }
+        for pct in PERCENTILES:
+            result[f"p{pct}_ms"] = round(self.histogram.percentile(pct), 1)
+        return result
+
+
+def iter_jtl_chunks(jtl_file: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[dict]:
+    """
+    Reads a CSV JTL and yields column chunks of at most chunk_rows rows.
+
+    Each chunk is a dict with 'timeStamp', 'elapsed', 'success' and 'label'
+    lists; only these columns are kept so memory stays bounded.
+    """
+    with open(jtl_file, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return
+        if first and first[0].isdigit():
+            columns, pending = DEFAULT_COLUMNS, [first]
+        else:
+            columns, pending = first, []
+        ts_col = columns.index("timeStamp")
+        elapsed_col = columns.index("elapsed")
+        label_col = columns.index("label")
+        success_col = columns.index("success")
+        width = max(ts_col, elapsed_col, label_col, success_col)
+
+        def empty_chunk():
+            return {"timeStamp": [], "elapsed": [], "label": [], "success": []}
+
+        chunk = empty_chunk()
+        for row in _chain(pending, reader):
+            if len(row) <= width or not row[ts_col].isdigit():
+                continue
+            chunk["timeStamp"].append(int(row[ts_col]))
+            chunk["elapsed"].append(int(row[elapsed_col] or 0))
+            chunk["label"].append(row[label_col])
+            chunk["success"].append(row[success_col] == "true")
+            if len(chunk["timeStamp"]) >= chunk_rows:
+                yield chunk
+                chunk = empty_chunk()
+        if chunk["timeStamp"]:
+            yield chunk
+
+
+def _chain(first_rows: list, reader) -> Iterator[list]:
+    yield from first_rows
+    yield from reader
+
+
+def _aggregate_chunk_numpy(stats: dict, chunk: dict):
+    timestamps = np.asarray(chunk["timeStamp"], dtype=np.int64)
+    elapsed = np.asarray(chunk["elapsed"], dtype=np.int64)
+    success = np.asarray(chunk["success"], dtype=bool)
+    labels, label_ids = np.unique(np.asarray(chunk["label"], dtype=object), return_inverse=True)
+    order = np.argsort(label_ids, kind="stable")
+    boundaries = np.flatnonzero(np.diff(label_ids[order])) + 1
+    for label, rows in zip(labels, np.split(order, boundaries)):
+        entry = stats.setdefault(label, LabelStats())
+        entry.histogram.record_array(elapsed[rows])
+        entry.errors += int(np.count_nonzero(~success[rows]))
+        entry.add_window(int(timestamps[rows].min()), int((timestamps[rows] + elapsed[rows]).max()))
+
+
+def _aggregate_chunk_python(stats: dict, chunk: dict):
+    for ts, elapsed, label, success in zip(chunk["timeStamp"], chunk["elapsed"], chunk["label"], chunk["success"]):
+        entry = stats.setdefault(label, LabelStats())
+        entry.histogram.record(elapsed)
+        if not success:
+            entry.errors += 1
+        entry.add_window(ts, ts + elapsed)
+
+
+def summarize_jtl(jtl_file: str, chunk_rows: int = DEFAULT_CHUNK_ROWS, labels: Optional[list] = None) -> dict:
+    """
+    Computes per-label and overall throughput, error rate and latency percentiles.
+
+    Args:
+        jtl_file: Path to a CSV JTL written by JMeter.
+        chunk_rows: Rows parsed per chunk; bounds peak memory.
+        labels: Optional list of sampler labels to restrict the summary to.
+    """
+    aggregate = _aggregate_chunk_numpy if np is not None else _aggregate_chunk_python
+    stats = {}
+    wanted = set(labels) if labels else None
+    for chunk in iter_jtl_chunks(jtl_file, chunk_rows):
+        if wanted is not None:
+            keep = [i for i, label in enumerate(chunk["label"]) if label in wanted]
+            chunk = {key: [values[i] for i in keep] for key, values in chunk.items()}
+            if not keep:
+                continue
+        aggregate(stats, chunk)
+
+    total = LabelStats()
+    for entry in stats.values():
+        total.histogram.merge(entry.histogram)
+        total.errors += entry.errors
+        total.add_window(entry.first_ts, entry.last_end_ts)
+
+    return {
+        "labels": {label: entry.summary() for label, entry in sorted(stats.items())},
+        "total": total.summary(),
+    }
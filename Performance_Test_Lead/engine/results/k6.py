@@ -0,0 +1,26 @@
+import csv
+from typing import Iterator
+
+
+def iter_k6_csv_chunks(csv_file: str, chunk_rows: int = 100_000) -> Iterator[dict]:
+    """Yields http_req_duration samples from a k6 --out csv file in column chunks."""
+    with open(csv_file, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.DictReader(f)
+        chunk = {"timeStamp": [], "elapsed": [], "label": [], "success": []}
+        for row in reader:
+            if row.get("metric_name") != "http_req_duration":
+                continue
+            try:
+                ts_ms = int(float(row["timestamp"]) * 1000)
+                elapsed = int(round(float(row["metric_value"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+            chunk["timeStamp"].append(ts_ms - elapsed)
+            chunk["elapsed"].append(elapsed)
+            chunk["label"].append(row.get("name") or row.get("url") or "")
+            chunk["success"].append(row.get("expected_response", "true") == "true")
+            if len(chunk["timeStamp"]) >= chunk_rows:
+                yield chunk
+                chunk = {"timeStamp": [], "elapsed": [], "label": [], "success": []}
+        if chunk["timeStamp"]:
+            yield chunk
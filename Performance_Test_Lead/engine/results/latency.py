@@ -0,0 +1,135 @@
+import csv
+import json
+import os
+from typing import Optional
+
+from .histogram import DEFAULT_SUB_BUCKET_BITS, LatencyHistogram, np
+from .jtl import iter_jtl_chunks
+from .k6 import iter_k6_csv_chunks
+from .output import run_result_files
+
+# Percentile columns in Locust's stats CSVs, in ascending order.
+LOCUST_PERCENTILES = (50, 66, 75, 80, 90, 95, 98, 99, 99.9, 99.99, 100)
+REPORT_PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+def _record_chunks(histogram: LatencyHistogram, chunks, expected_interval_ms: int) -> LatencyHistogram:
+    for chunk in chunks:
+        if np is not None:
+            histogram.record_array(np.asarray(chunk["elapsed"], dtype=np.int64), expected_interval_ms)
+        else:
+            for value in chunk["elapsed"]:
+                histogram.record_corrected(value, expected_interval_ms)
+    return histogram
+
+
+def histogram_from_jtl(jtl_file: str, sub_bucket_bits: int = DEFAULT_SUB_BUCKET_BITS,
+                       expected_interval_ms: int = 0) -> LatencyHistogram:
+    """Builds a histogram from every sample in a JMeter CSV JTL."""
+    return _record_chunks(LatencyHistogram(sub_bucket_bits), iter_jtl_chunks(jtl_file), expected_interval_ms)
+
+
+def histogram_from_k6_csv(csv_file: str, sub_bucket_bits: int = DEFAULT_SUB_BUCKET_BITS,
+                          expected_interval_ms: int = 0) -> LatencyHistogram:
+    """Builds a histogram from the http_req_duration samples of a k6 CSV output."""
+    return _record_chunks(LatencyHistogram(sub_bucket_bits), iter_k6_csv_chunks(csv_file), expected_interval_ms)
+
+
+def histogram_from_locust_history(history_file: str, sub_bucket_bits: int = DEFAULT_SUB_BUCKET_BITS,
+                                  expected_interval_ms: int = 0) -> LatencyHistogram:
+    """
+    Approximates a histogram from the final aggregate row of a Locust stats history.
+
+    Locust does not write per-request samples, so the request count is spread
+    over its percentile columns. The result merges with exact histograms but is
+    only as precise as Locust's own percentiles, and coordinated-omission
+    correction cannot be applied.
+    """
+    histogram = LatencyHistogram(sub_bucket_bits)
+    final = None
+    with open(history_file, newline="", encoding="utf-8", errors="replace") as f:
+        for row in csv.DictReader(f):
+            if row.get("Name") == "Aggregated":
+                final = row
+    if final is None:
+        return histogram
+
+    total = int(float(final.get("Total Request Count") or 0))
+    previous_value = float(final.get("Total Min Response Time") or 0)
+    recorded = 0
+    for pct in LOCUST_PERCENTILES:
+        raw = final.get(f"{pct}%")
+        if raw in (None, "", "N/A"):
+            continue
+        value = float(raw)
+        count = round(total * pct / 100) - recorded
+        if count > 0:
+            histogram.record(int(round((previous_value + value) / 2)) if pct != 100 else int(value), count)
+            recorded += count
+        previous_value = value
+    return histogram
+
+
+_BUILDERS = {
+    "jmeter": histogram_from_jtl,
+    "k6": histogram_from_k6_csv,
+    "locust": histogram_from_locust_history,
+}
+
+
+def cached_histogram(tool: str, source_file: str, sub_bucket_bits: int = DEFAULT_SUB_BUCKET_BITS,
+                     expected_interval_ms: int = 0) -> LatencyHistogram:
+    """
+    Returns the histogram of a result file, reusing a serialised copy stored next to it.
+
+    The cache is keyed on the source's size and modification time, so a file
+    is parsed once and later merges only read a few kilobytes.
+    """
+    stat = os.stat(source_file)
+    key = [stat.st_size, stat.st_mtime_ns, sub_bucket_bits, expected_interval_ms]
+    cache_file = f"{source_file}.hist.json"
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return LatencyHistogram.from_dict(cached["histogram"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    histogram = _BUILDERS[tool](source_file, sub_bucket_bits, expected_interval_ms)
+    try:
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "histogram": histogram.to_dict()}, f)
+    except OSError:
+        pass
+    return histogram
+
+
+def run_histogram(run_id: str, jtl_files: Optional[list] = None, sub_bucket_bits: int = DEFAULT_SUB_BUCKET_BITS,
+                  expected_interval_ms: int = 0):
+    """
+    Merges the histograms of every result file a run produced.
+
+    Returns (histogram, sources) where sources lists the files that were merged.
+    """
+    files = run_result_files(run_id)
+    sources = [("jmeter", f) for f in (jtl_files or files["jmeter"])]
+    sources += [("k6", f) for f in files["k6"]] + [("locust", f) for f in files["locust"]]
+    merged = LatencyHistogram(sub_bucket_bits)
+    for tool, source_file in sources:
+        merged.merge(cached_histogram(tool, source_file, sub_bucket_bits, expected_interval_ms))
+    return merged, [source_file for _, source_file in sources]
+
+
+def percentile_report(histogram: LatencyHistogram) -> dict:
+    """Summarises a histogram as the percentile figures reported to users."""
+    report = {
+        "samples": histogram.total,
+        "mean_ms": round(histogram.mean(), 2),
+        "min_ms": histogram.min,
+        "max_ms": histogram.max,
+        "relative_error": histogram.relative_error,
+    }
+    for pct in REPORT_PERCENTILES:
+        report[f"p{pct:g}_ms"] = round(histogram.percentile(pct), 1)
+    return report
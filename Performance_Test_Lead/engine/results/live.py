@@ -0,0 +1,130 @@
+import csv
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from .jtl import DEFAULT_COLUMNS
+
+DEFAULT_WINDOW_SECONDS = 30
+# Most bytes a poll reads. A tail attached late, or one that fell behind, skips
+# ahead to the newest data; rows older than the window would be dropped anyway.
+MAX_READ_BYTES = 16 << 20
+MAX_HEADER_BYTES = 64 << 10
+
+
+def k6_sample(row: dict):
+    """Parses an http_req_duration row of a k6 CSV into (end time s, latency ms, ok)."""
+    if row.get("metric_name") != "http_req_duration":
+        return None
+    return float(row["timestamp"]), float(row["metric_value"]), row.get("expected_response", "true") == "true"
+
+
+def jtl_sample(row: dict):
+    """Parses a JTL row into (end time s, latency ms, ok)."""
+    elapsed = float(row["elapsed"])
+    return (float(row["timeStamp"]) + elapsed) / 1000, elapsed, row.get("success", "true").lower() == "true"
+
+
+class SampleTail:
+    """
+    Follows a per-request sample CSV while it is being written.
+
+    Like the Locust history follower, each poll() only reads the appended
+    bytes, and at most MAX_READ_BYTES of them; only samples from the last
+    window_seconds are kept.
+    """
+
+    def __init__(self, path: str, parse: Callable[[dict], Optional[tuple]],
+                 window_seconds: float = DEFAULT_WINDOW_SECONDS, default_columns: Optional[list] = None):
+        self.path = path
+        self.parse = parse
+        self.window_seconds = window_seconds
+        self.default_columns = default_columns
+        self._offset = 0
+        self._partial = b""
+        self._skipping = False
+        self._columns = None
+        self._samples = deque()
+        self._lock = threading.Lock()
+
+    def _read_header(self, f) -> bool:
+        """Takes the columns from the first line; False until that line is complete."""
+        line = f.readline(MAX_HEADER_BYTES)
+        if not line.endswith(b"\n"):
+            return False
+        row = next(csv.reader([line.decode("utf-8", errors="replace")]), [])
+        # Header-less JTLs start straight with a numeric timestamp.
+        if self.default_columns and row and row[0].isdigit():
+            self._columns = self.default_columns
+        else:
+            self._columns = row
+            self._offset = len(line)
+        return True
+
+    def poll(self):
+        with self._lock:
+            data = b""
+            try:
+                with open(self.path, "rb") as f:
+                    if self._columns is not None or self._read_header(f):
+                        size = os.fstat(f.fileno()).st_size
+                        if size - self._offset > MAX_READ_BYTES:
+                            self._offset = size - MAX_READ_BYTES
+                            self._partial = b""
+                            self._skipping = True
+                        f.seek(self._offset)
+                        data = f.read(size - self._offset)
+            except FileNotFoundError:
+                pass
+            self._offset += len(data)
+            if self._skipping:
+                # After skipping ahead, the first line read is only the tail of a row.
+                _, newline, data = data.partition(b"\n")
+                self._skipping = not newline
+            data = self._partial + data
+            complete, _, self._partial = data.rpartition(b"\n")
+            for row in csv.reader(complete.decode("utf-8", errors="replace").splitlines()):
+                if len(row) != len(self._columns or ()):
+                    continue
+                try:
+                    sample = self.parse(dict(zip(self._columns, row)))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if sample is not None:
+                    self._samples.append(sample)
+            cutoff = time.time() - self.window_seconds
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+
+    def samples(self) -> list:
+        self.poll()
+        with self._lock:
+            return list(self._samples)
+
+
+def jtl_tail(jtl_file: str, window_seconds: float = DEFAULT_WINDOW_SECONDS) -> SampleTail:
+    return SampleTail(jtl_file, jtl_sample, window_seconds, DEFAULT_COLUMNS)
+
+
+def k6_tail(csv_file: str, window_seconds: float = DEFAULT_WINDOW_SECONDS) -> SampleTail:
+    return SampleTail(csv_file, k6_sample, window_seconds)
+
+
+def window_stats(samples: list, window_seconds: float = DEFAULT_WINDOW_SECONDS) -> dict:
+    """
+    Summarises the samples of the last window as rps, error_rate and p95_ms.
+
+    Throughput is taken over the whole window against wall-clock time, so a
+    target that stops answering shows up as falling RPS rather than as stale
+    figures from before it stalled.
+    """
+    count = len(samples)
+    result = {"samples": count, "rps": round(count / window_seconds, 2)}
+    if count:
+        latencies = sorted(sample[1] for sample in samples)
+        result["error_rate"] = round(sum(1 for sample in samples if not sample[2]) / count, 4)
+        result["p95_ms"] = latencies[max(math.ceil(0.95 * count), 1) - 1]
+    return result
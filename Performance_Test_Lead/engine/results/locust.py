@@ -0,0 +1,131 @@
+import csv
+import threading
+from collections import deque
+from typing import Optional
+
+# Percentile columns Locust writes to <prefix>_stats_history.csv.
+PERCENTILE_COLUMNS = {"50%": "p50_ms", "90%": "p90_ms", "95%": "p95_ms", "99%": "p99_ms"}
+DEFAULT_WINDOW_ROWS = 30
+
+
+def _number(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class LocustHistoryFollower:
+    """
+    Tail-follows a Locust --csv-full-history file.
+
+    Each poll() only reads the bytes appended since the previous poll and
+    keeps a rolling window of the most recent rows per endpoint, so the
+    cost of a status query does not grow with the length of the run.
+    """
+
+    def __init__(self, history_file: str, window_rows: int = DEFAULT_WINDOW_ROWS):
+        self.history_file = history_file
+        self.window_rows = window_rows
+        self._offset = 0
+        self._partial = b""
+        self._columns = None
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def poll(self) -> int:
+        """Parses any newly appended rows and returns how many were read."""
+        with self._lock:
+            try:
+                with open(self.history_file, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+            except FileNotFoundError:
+                return 0
+            if not data:
+                return 0
+            self._offset += len(data)
+            data = self._partial + data
+            complete, _, self._partial = data.rpartition(b"\n")
+            if not complete:
+                return 0
+
+            lines = complete.decode("utf-8", errors="replace").splitlines()
+            rows = 0
+            for row in csv.reader(lines):
+                if self._columns is None:
+                    self._columns = row
+                    continue
+                if len(row) != len(self._columns):
+                    continue
+                self._ingest(dict(zip(self._columns, row)))
+                rows += 1
+            return rows
+
+    def _ingest(self, row: dict):
+        key = (row.get("Type", ""), row.get("Name", ""))
+        window = self._endpoints.get(key)
+        if window is None:
+            window = self._endpoints[key] = deque(maxlen=self.window_rows)
+        window.append(row)
+
+    def _summarize(self, window: deque) -> dict:
+        latest = window[-1]
+        rates = [_number(r.get("Requests/s")) or 0.0 for r in window]
+        failures = [_number(r.get("Failures/s")) or 0.0 for r in window]
+        summary = {
+            "user_count": int(_number(latest.get("User Count")) or 0),
+            "current_rps": _number(latest.get("Requests/s")) or 0.0,
+            "rolling_rps": round(sum(rates) / len(rates), 2),
+            "rolling_failures_per_s": round(sum(failures) / len(failures), 2),
+            "total_requests": int(_number(latest.get("Total Request Count")) or 0),
+            "total_failures": int(_number(latest.get("Total Failure Count")) or 0),
+        }
+        for column, name in PERCENTILE_COLUMNS.items():
+            summary[name] = _number(latest.get(column))
+        return summary
+
+    def snapshot(self) -> dict:
+        """Returns the latest rolling figures per endpoint and for the aggregate row."""
+        self.poll()
+        with self._lock:
+            endpoints = {}
+            aggregate = None
+            for (request_type, name), window in self._endpoints.items():
+                if not window:
+                    continue
+                if name == "Aggregated":
+                    aggregate = self._summarize(window)
+                else:
+                    endpoints[f"{request_type} {name}".strip()] = self._summarize(window)
+        return {"aggregate": aggregate, "endpoints": endpoints}
+
+
+_followers = {}
+_followers_lock = threading.Lock()
+
+
+def history_file_for(csv_prefix: str) -> str:
+    """Returns the history CSV Locust writes for a given --csv prefix."""
+    return f"{csv_prefix}_stats_history.csv"
+
+
+def follow(container_name: str, csv_prefix: str) -> LocustHistoryFollower:
+    """Registers a follower for a container's history CSV (host-side --csv prefix)."""
+    with _followers_lock:
+        follower = _followers.get(container_name)
+        if follower is None:
+            follower = _followers[container_name] = LocustHistoryFollower(history_file_for(csv_prefix))
+        return follower
+
+
+def get_follower(container_name: str) -> Optional[LocustHistoryFollower]:
+    """Returns the follower registered for a container, if any."""
+    with _followers_lock:
+        return _followers.get(container_name)
+
+
+def forget(container_name: str):
+    """Drops the follower for a container once it is no longer needed."""
+    with _followers_lock:
+        _followers.pop(container_name, None)
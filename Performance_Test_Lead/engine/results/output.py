@@ -0,0 +1,85 @@
+import glob
+import os
+from typing import Optional
+
+# CSV files Locust writes next to its stats history; other CSVs in a run directory are k6 output.
+LOCUST_CSV_SUFFIXES = ("_stats.csv", "_stats_history.csv", "_failures.csv", "_exceptions.csv")
+
+# Suffix of the page and journey timings the browser runner writes.
+BROWSER_CSV_SUFFIX = "_browser.csv"
+
+# Directory, relative to the working directory, that runs write results into.
+RESULTS_DIR = os.environ.get("LOAD_TEST_RESULTS_DIR", "results")
+
+# Optional directory on a tmpfs (e.g. /dev/shm/gadk-results) to write run output to,
+# keeping result I/O off the disk while a test runs. RESULTS_DIR/<run_id> then links
+# to it; it does not survive a reboot, so keep runs with 'store_run_results'.
+OUTPUT_TMPFS = os.environ.get("LOAD_TEST_OUTPUT_TMPFS")
+
+# Where a run's output directory is mounted inside the generator containers.
+OUTPUT_MOUNT = "/results"
+
+
+def run_output_dir(run_id: str):
+    """
+    Creates the output directory for a run and returns (host_path, container_path).
+
+    The directory is mounted read-write on its own at /results, so test
+    output never goes to the (read-only) staged test assets.
+    """
+    link_path = os.path.join(os.getcwd(), RESULTS_DIR, run_id)
+    if not OUTPUT_TMPFS:
+        os.makedirs(link_path, exist_ok=True)
+        return link_path, OUTPUT_MOUNT
+    host_path = os.path.join(OUTPUT_TMPFS, run_id)
+    os.makedirs(host_path, exist_ok=True)
+    if not os.path.lexists(link_path):
+        os.makedirs(os.path.dirname(link_path), exist_ok=True)
+        os.symlink(host_path, link_path)
+    return os.path.realpath(link_path), OUTPUT_MOUNT
+
+
+def _relative_output(name: str) -> str:
+    """Keeps an output name inside the run directory."""
+    name = os.path.normpath(name)
+    return os.path.basename(name) if os.path.isabs(name) or name.startswith("..") else name
+
+
+def run_output_file(run_id: str, name: str):
+    """
+    Returns (host_path, container_path, results_path) of a file a run writes to its output directory.
+
+    results_path is the path relative to the working directory, under RESULTS_DIR.
+    """
+    name = _relative_output(name)
+    host_dir, container_dir = run_output_dir(run_id)
+    os.makedirs(os.path.dirname(os.path.join(host_dir, name)), exist_ok=True)
+    return os.path.join(host_dir, name), f"{container_dir}/{name}", os.path.join(RESULTS_DIR, run_id, name)
+
+
+def resolve_output(path: str, run_id: Optional[str] = None) -> str:
+    """
+    Finds an output file given by the name it was started with, e.g. a JMeter JTL.
+
+    Runs write into RESULTS_DIR/<run_id>, so a bare name is looked up there:
+    in the given run, or else in the most recently written run that has it.
+    """
+    if run_id:
+        in_run = os.path.join(RESULTS_DIR, run_id, _relative_output(path))
+        return path if os.path.exists(path) and not os.path.exists(in_run) else in_run
+    if os.path.exists(path):
+        return path
+    matches = glob.glob(os.path.join(RESULTS_DIR, "*", _relative_output(path)))
+    return max(matches, key=os.path.getmtime) if matches else path
+
+
+def run_result_files(run_id: str) -> dict:
+    """Returns the JMeter JTL, Locust history, k6 CSV and browser timing files a run has written, by tool."""
+    run_dir = os.path.join(os.getcwd(), RESULTS_DIR, run_id)
+    csv_files = sorted(glob.glob(os.path.join(run_dir, "*.csv")))
+    return {
+        "jmeter": sorted(glob.glob(os.path.join(run_dir, "**", "*.jtl"), recursive=True)),
+        "locust": [f for f in csv_files if f.endswith("_stats_history.csv")],
+        "k6": [f for f in csv_files if not f.endswith(LOCUST_CSV_SUFFIXES + (BROWSER_CSV_SUFFIX,))],
+        "browser": [f for f in csv_files if f.endswith(BROWSER_CSV_SUFFIX)],
+    }
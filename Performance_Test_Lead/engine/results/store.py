@@ -0,0 +1,452 @@
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import time
+from typing import Iterator, Optional
+
+from .histogram import LatencyHistogram, np
+from .jtl import PERCENTILES, iter_jtl_chunks
+from .k6 import iter_k6_csv_chunks
+from .output import RESULTS_DIR
+
+STORE_DIR = os.environ.get("LOAD_TEST_STORE_DIR", os.path.join(RESULTS_DIR, "store"))
+
+# Per-request samples and per-second rollups are stored one raw little-endian
+# column file per field, so any column can be memory-mapped on its own.
+SAMPLE_COLUMNS = {
+    "ts_ms": "<i8",
+    "elapsed_ms": "<i4",
+    "label": "<u4",
+    "success": "|b1",
+}
+ROLLUP_COLUMNS = {
+    "second": "<i8",
+    "label": "<u4",
+    "count": "<i8",
+    "errors": "<i8",
+    "elapsed_sum": "<i8",
+    "elapsed_max": "<i4",
+}
+# Runs stored before label ids were widened to 32 bits have no label_dtype in their meta.json.
+LEGACY_LABEL_DTYPE = "<u2"
+SCAN_ROWS = 1_000_000
+# Upper bound on the per-label histogram counts held while summarising a run;
+# runs with more labels than fit are scanned once per group of labels.
+SUMMARY_MEMORY_BYTES = 64 << 20
+
+_CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    tool TEXT,
+    started_ms INTEGER,
+    ended_ms INTEGER,
+    samples INTEGER,
+    errors INTEGER,
+    throughput_rps REAL,
+    p50_ms REAL,
+    p95_ms REAL,
+    p99_ms REAL,
+    stored_at REAL
+);
+CREATE INDEX IF NOT EXISTS runs_tool_started ON runs (tool, started_ms);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_ms);
+"""
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("The result store requires NumPy to be installed.")
+
+
+def _run_dir(run_id: str, store_dir: str) -> str:
+    if not run_id or os.sep in run_id or run_id.startswith("."):
+        raise ValueError(f"Invalid run id: {run_id!r}")
+    return os.path.join(store_dir, "runs", run_id)
+
+
+def _catalog(store_dir: str) -> sqlite3.Connection:
+    os.makedirs(store_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(store_dir, "catalog.db"))
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_CATALOG_SCHEMA)
+    return conn
+
+
+def _summary(histogram: LatencyHistogram, errors: int, first_ms: Optional[int], last_ms: Optional[int]) -> dict:
+    count = histogram.total
+    duration_s = max((last_ms - first_ms) / 1000, 0.001) if count and first_ms is not None else 0
+    result = {
+        "samples": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / duration_s, 2) if duration_s else 0.0,
+        "mean_ms": round(histogram.mean(), 2),
+        "max_ms": histogram.max,
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}_ms"] = round(histogram.percentile(pct), 1)
+    return result
+
+
+class RunWriter:
+    """
+    Appends one run's samples to the store and finalises it into the catalog.
+
+    Samples are written column by column as they arrive; per-second rollups
+    and per-label histograms are accumulated in memory, whose size depends
+    on the run's duration and label count but not on its sample count.
+
+    The run is written to a temporary directory that replaces any earlier
+    copy of it only when close() succeeds, so a failed re-ingest leaves the
+    stored run intact; abort() discards it.
+    """
+
+    def __init__(self, run_id: str, tool: str, store_dir: str = STORE_DIR):
+        _require_numpy()
+        self.run_id = run_id
+        self.tool = tool
+        self.store_dir = store_dir
+        self.final_path = _run_dir(run_id, store_dir)
+        # Run ids cannot start with '.', so the temporary name never collides with a stored run.
+        self.path = os.path.join(os.path.dirname(self.final_path), f".{run_id}.tmp-{os.urandom(4).hex()}")
+        os.makedirs(self.path)
+        self._files = {name: open(os.path.join(self.path, f"samples.{name}"), "wb") for name in SAMPLE_COLUMNS}
+        self._labels = {}
+        self._rollup = {}
+        self._histograms = {}
+        self._errors = {}
+        self._first_ms = None
+        self._last_ms = None
+        self.samples = 0
+
+    def _label_ids(self, labels) -> "np.ndarray":
+        names, inverse = np.unique(np.asarray(labels, dtype=object), return_inverse=True)
+        mapping = np.array([self._labels.setdefault(name, len(self._labels)) for name in names], dtype=np.uint32)
+        return mapping[inverse]
+
+    def _label_id(self, label: str) -> int:
+        return self._labels.setdefault(label, len(self._labels))
+
+    def _window(self, first_ms: int, last_ms: int):
+        self._first_ms = first_ms if self._first_ms is None else min(self._first_ms, first_ms)
+        self._last_ms = last_ms if self._last_ms is None else max(self._last_ms, last_ms)
+
+    def append(self, timestamps_ms, elapsed_ms, labels, success):
+        """Appends a chunk of per-request samples (sequences of equal length)."""
+        if len(timestamps_ms) == 0:
+            return
+        columns = {
+            "ts_ms": np.asarray(timestamps_ms, dtype=np.int64),
+            "elapsed_ms": np.asarray(elapsed_ms, dtype=np.int64).astype(np.int32),
+            "label": self._label_ids(labels),
+            "success": np.asarray(success, dtype=bool),
+        }
+        for name, dtype in SAMPLE_COLUMNS.items():
+            columns[name].astype(dtype, copy=False).tofile(self._files[name])
+        self.samples += len(columns["ts_ms"])
+        self._window(int(columns["ts_ms"].min()), int((columns["ts_ms"] + columns["elapsed_ms"]).max()))
+
+        elapsed = columns["elapsed_ms"].astype(np.int64)
+        failed = ~columns["success"]
+        keys = np.stack([columns["ts_ms"] // 1000, columns["label"].astype(np.int64)], axis=1)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        counts = np.bincount(inverse)
+        errors = np.bincount(inverse, weights=failed).astype(np.int64)
+        sums = np.bincount(inverse, weights=elapsed).astype(np.int64)
+        maxes = np.zeros(len(unique), dtype=np.int64)
+        np.maximum.at(maxes, inverse, elapsed)
+        for key, c, e, s, m in zip(unique.tolist(), counts.tolist(), errors.tolist(), sums.tolist(), maxes.tolist()):
+            self._add_rollup(tuple(key), c, e, s, m)
+
+        for label_id in np.unique(columns["label"]).tolist():
+            rows = columns["label"] == label_id
+            histogram = self._histograms.setdefault(label_id, LatencyHistogram())
+            histogram.record_array(elapsed[rows])
+            self._errors[label_id] = self._errors.get(label_id, 0) + int(np.count_nonzero(failed[rows]))
+
+    def _add_rollup(self, key: tuple, count: int, errors: int, elapsed_sum: int, elapsed_max: int):
+        entry = self._rollup.get(key)
+        if entry is None:
+            self._rollup[key] = [count, errors, elapsed_sum, elapsed_max]
+        else:
+            entry[0] += count
+            entry[1] += errors
+            entry[2] += elapsed_sum
+            entry[3] = max(entry[3], elapsed_max)
+
+    def append_rollup(self, second: int, label: str, count: int, errors: int, elapsed_sum: int, elapsed_max: int):
+        """Appends a pre-aggregated per-second row, for tools that do not emit per-request samples."""
+        self._add_rollup((second, self._label_id(label)), count, errors, elapsed_sum, elapsed_max)
+        self._window(second * 1000, second * 1000 + 1000)
+
+    def _replace(self):
+        """Moves the finished run into place, replacing an earlier copy of it."""
+        previous = None
+        if os.path.exists(self.final_path):
+            previous = f"{self.path}-old"
+            os.rename(self.final_path, previous)
+        os.rename(self.path, self.final_path)
+        self.path = self.final_path
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+
+    def abort(self):
+        """Discards a run that failed to ingest, keeping any earlier copy of it."""
+        for f in self._files.values():
+            f.close()
+        if self.path != self.final_path:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def close(self, summary_override: Optional[dict] = None, meta: Optional[dict] = None) -> dict:
+        """Writes rollups and metadata, records the run in the catalog and returns its summary."""
+        for f in self._files.values():
+            f.close()
+
+        keys = sorted(self._rollup)
+        rollup = {
+            "second": np.array([k[0] for k in keys], dtype=np.int64),
+            "label": np.array([k[1] for k in keys], dtype=np.uint32),
+            "count": np.array([self._rollup[k][0] for k in keys], dtype=np.int64),
+            "errors": np.array([self._rollup[k][1] for k in keys], dtype=np.int64),
+            "elapsed_sum": np.array([self._rollup[k][2] for k in keys], dtype=np.int64),
+            "elapsed_max": np.array([self._rollup[k][3] for k in keys], dtype=np.int32),
+        }
+        for name, dtype in ROLLUP_COLUMNS.items():
+            rollup[name].astype(dtype, copy=False).tofile(os.path.join(self.path, f"rollup.{name}"))
+
+        total = LatencyHistogram()
+        for histogram in self._histograms.values():
+            total.merge(histogram)
+        summary = _summary(total, sum(self._errors.values()), self._first_ms, self._last_ms)
+        summary.update(summary_override or {})
+
+        labels = [name for name, _ in sorted(self._labels.items(), key=lambda item: item[1])]
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "run_id": self.run_id,
+                "tool": self.tool,
+                "labels": labels,
+                "label_dtype": SAMPLE_COLUMNS["label"],
+                "samples": self.samples,
+                "rollup_rows": len(keys),
+                "started_ms": self._first_ms,
+                "ended_ms": self._last_ms,
+                "summary": summary,
+                **(meta or {}),
+            }, f, indent=2)
+        self._replace()
+
+        with _catalog(self.store_dir) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.run_id, self.tool, self._first_ms, self._last_ms, summary.get("samples"), summary.get("errors"),
+                 summary.get("throughput_rps"), summary.get("p50_ms"), summary.get("p95_ms"), summary.get("p99_ms"),
+                 time.time()),
+            )
+        return summary
+
+
+class StoredRun:
+    """Read-only, memory-mapped view of a stored run."""
+
+    def __init__(self, run_id: str, store_dir: str = STORE_DIR):
+        _require_numpy()
+        self.path = _run_dir(run_id, store_dir)
+        with open(os.path.join(self.path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.labels = self.meta["labels"]
+        label_dtype = {"label": self.meta.get("label_dtype", LEGACY_LABEL_DTYPE)}
+        self.samples = self._map("samples", {**SAMPLE_COLUMNS, **label_dtype}, self.meta["samples"])
+        self.rollup = self._map("rollup", {**ROLLUP_COLUMNS, **label_dtype}, self.meta["rollup_rows"])
+
+    def _map(self, prefix: str, columns: dict, rows: int) -> dict:
+        if rows == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in columns.items()}
+        return {
+            name: np.memmap(os.path.join(self.path, f"{prefix}.{name}"), dtype=dtype, mode="r", shape=(rows,))
+            for name, dtype in columns.items()
+        }
+
+    def label_summaries(self) -> dict:
+        """Scans the mapped samples in slices and returns per-label statistics."""
+        label_count = len(self.labels)
+        bucket_count = LatencyHistogram().bucket_count
+        group = max(1, SUMMARY_MEMORY_BYTES // (bucket_count * 8))
+        result = {}
+        for low in range(0, label_count, group):
+            result.update(self._summarise_labels(low, min(low + group, label_count)))
+        return {name: result[name] for name in self.labels if name in result}
+
+    def _summarise_labels(self, low: int, high: int) -> dict:
+        """Per-label statistics of the labels with ids in [low, high)."""
+        label_count = high - low
+        template = LatencyHistogram()
+        bucket_count = template.bucket_count
+        counts = np.zeros((label_count, bucket_count), dtype=np.int64)
+        totals = np.zeros((label_count, 4), dtype=np.int64)  # samples, errors, elapsed sum, elapsed max
+        first = np.full(label_count, np.iinfo(np.int64).max)
+        last = np.zeros(label_count, dtype=np.int64)
+        whole = low == 0 and high == len(self.labels)
+        for start in range(0, self.meta["samples"], SCAN_ROWS):
+            window = slice(start, start + SCAN_ROWS)
+            labels = self.samples["label"][window].astype(np.int64)
+            elapsed = self.samples["elapsed_ms"][window].astype(np.int64)
+            ts = self.samples["ts_ms"][window]
+            failed = ~self.samples["success"][window]
+            if not whole:
+                rows = (labels >= low) & (labels < high)
+                labels, elapsed, ts, failed = labels[rows] - low, elapsed[rows], ts[rows], failed[rows]
+            combined = labels * bucket_count + template.bucket_indices(elapsed)
+            counts += np.bincount(combined, minlength=label_count * bucket_count).reshape(label_count, bucket_count)
+            totals[:, 0] += np.bincount(labels, minlength=label_count)
+            totals[:, 1] += np.bincount(labels, weights=failed, minlength=label_count).astype(np.int64)
+            totals[:, 2] += np.bincount(labels, weights=elapsed, minlength=label_count).astype(np.int64)
+            np.maximum.at(totals[:, 3], labels, elapsed)
+            np.minimum.at(first, labels, ts)
+            np.maximum.at(last, labels, ts + elapsed)
+
+        result = {}
+        for offset, name in enumerate(self.labels[low:high]):
+            if totals[offset, 0] == 0:
+                continue
+            histogram = LatencyHistogram()
+            histogram.counts = counts[offset]
+            histogram.total = int(totals[offset, 0])
+            histogram.sum = int(totals[offset, 2])
+            histogram.min = 0
+            histogram.max = int(totals[offset, 3])
+            result[name] = _summary(histogram, int(totals[offset, 1]), int(first[offset]), int(last[offset]))
+        return result
+
+    def rollup_rows(self) -> Iterator[dict]:
+        """Yields the per-second rollup rows with label names resolved."""
+        for i in range(self.meta["rollup_rows"]):
+            yield {
+                "second": int(self.rollup["second"][i]),
+                "label": self.labels[int(self.rollup["label"][i])],
+                "count": int(self.rollup["count"][i]),
+                "errors": int(self.rollup["errors"][i]),
+                "elapsed_sum": int(self.rollup["elapsed_sum"][i]),
+                "elapsed_max": int(self.rollup["elapsed_max"][i]),
+            }
+
+
+def ingest_jtl(run_id: str, jtl_file: str, store_dir: str = STORE_DIR) -> dict:
+    """Stores a JMeter CSV JTL under the given run id."""
+    writer = RunWriter(run_id, "jmeter", store_dir)
+    try:
+        for chunk in iter_jtl_chunks(jtl_file):
+            writer.append(chunk["timeStamp"], chunk["elapsed"], chunk["label"], chunk["success"])
+        return writer.close(meta={"source": os.path.abspath(jtl_file)})
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def ingest_k6_csv(run_id: str, csv_files: list, store_dir: str = STORE_DIR) -> dict:
+    """Stores the http_req_duration samples of one or more k6 CSV outputs under the given run id."""
+    writer = RunWriter(run_id, "k6", store_dir)
+    try:
+        for csv_file in csv_files:
+            for chunk in iter_k6_csv_chunks(csv_file):
+                writer.append(chunk["timeStamp"], chunk["elapsed"], chunk["label"], chunk["success"])
+        return writer.close(meta={"source": [os.path.abspath(f) for f in csv_files]})
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def ingest_locust_history(run_id: str, history_files: list, store_dir: str = STORE_DIR) -> dict:
+    """
+    Stores Locust stats history under the given run id.
+
+    Locust only writes per-interval aggregates, so the run gets rollup rows
+    (latency sums are approximated from each interval's median) and no
+    per-request samples.
+    """
+    writer = RunWriter(run_id, "locust", store_dir)
+    try:
+        final = {}
+        for history_file in history_files:
+            with open(history_file, newline="", encoding="utf-8", errors="replace") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        second = int(row["Timestamp"])
+                        count = int(round(float(row["Requests/s"])))
+                        errors = int(round(float(row["Failures/s"])))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if row.get("Name") == "Aggregated":
+                        final[history_file] = row
+                        continue
+                    median = float(row["50%"]) if row.get("50%") not in (None, "", "N/A") else 0.0
+                    peak = float(row["100%"]) if row.get("100%") not in (None, "", "N/A") else 0.0
+                    label = f"{row.get('Type', '')} {row.get('Name', '')}".strip()
+                    writer.append_rollup(second, label, count, errors, int(median * count), int(peak))
+
+        override = {"samples": 0, "errors": 0}
+        for row in final.values():
+            override["samples"] += int(float(row.get("Total Request Count") or 0))
+            override["errors"] += int(float(row.get("Total Failure Count") or 0))
+        if override["samples"]:
+            duration_s = max((writer._last_ms - writer._first_ms) / 1000, 1)
+            override["error_rate"] = round(override["errors"] / override["samples"], 4)
+            override["throughput_rps"] = round(override["samples"] / duration_s, 2)
+        if len(final) == 1:
+            # Percentiles of separate generators cannot be combined from their summaries.
+            row = next(iter(final.values()))
+            override["mean_ms"] = round(float(row.get("Total Average Response Time") or 0), 2)
+            override["max_ms"] = float(row.get("Total Max Response Time") or 0)
+            for pct in PERCENTILES:
+                value = row.get(f"{pct}%")
+                override[f"p{pct}_ms"] = float(value) if value not in (None, "", "N/A") else None
+        return writer.close(summary_override=override, meta={"source": [os.path.abspath(f) for f in history_files]})
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def list_runs(tool: Optional[str] = None, limit: int = 20, store_dir: str = STORE_DIR) -> list:
+    """Returns catalog rows for the most recent stored runs."""
+    if not os.path.exists(os.path.join(store_dir, "catalog.db")):
+        return []
+    query = "SELECT * FROM runs"
+    params = []
+    if tool:
+        query += " WHERE tool = ?"
+        params.append(tool)
+    query += " ORDER BY started_ms DESC LIMIT ?"
+    params.append(limit)
+    with _catalog(store_dir) as conn:
+        return [dict(row) for row in conn.execute(query, params)]
+
+
+def compare_runs(baseline_run_id: str, candidate_run_id: str, store_dir: str = STORE_DIR) -> dict:
+    """Compares per-label statistics of two stored runs."""
+    baseline = StoredRun(baseline_run_id, store_dir)
+    candidate = StoredRun(candidate_run_id, store_dir)
+    if not baseline.meta["samples"] or not candidate.meta["samples"]:
+        # Rollup-only runs (Locust) can only be compared on their overall summary.
+        base_labels = {"total": baseline.meta["summary"]}
+        cand_labels = {"total": candidate.meta["summary"]}
+    else:
+        base_labels = baseline.label_summaries()
+        cand_labels = candidate.label_summaries()
+        base_labels["total"] = baseline.meta["summary"]
+        cand_labels["total"] = candidate.meta["summary"]
+
+    comparison = {}
+    for label in sorted(set(base_labels) | set(cand_labels)):
+        before, after = base_labels.get(label), cand_labels.get(label)
+        entry = {"baseline": before, "candidate": after}
+        if before and after:
+            entry["change_pct"] = {
+                key: round((after[key] - before[key]) / before[key] * 100, 1)
+                for key in ("throughput_rps", "error_rate", "p50_ms", "p95_ms", "p99_ms")
+                if before.get(key) and after.get(key) is not None
+            }
+        comparison[label] = entry
+    return comparison
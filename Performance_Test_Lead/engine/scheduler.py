@@ -0,0 +1,295 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from .inventory import get_inventory
+
+# Resources reserved per generator container when the caller does not say otherwise.
+# JMeter's image runs with a 4 GB heap, so it needs headroom above that.
+DEFAULT_RESOURCES = {
+    "jmeter": {"cpus": 2.0, "memory_mb": 5120},
+    "k6": {"cpus": 1.0, "memory_mb": 1024},
+    "locust": {"cpus": 1.0, "memory_mb": 1024},
+    "browser": {"cpus": 2.0, "memory_mb": 4096},
+}
+
+# The defaults above only size the scheduler's reservation; containers get
+# Docker limits when the caller asks for them, or for every job with this set.
+LIMIT_TO_RESERVATION = os.environ.get("GENERATOR_LIMIT_TO_RESERVATION", "0") == "1"
+
+# Finished jobs kept for get_job_status before the oldest are forgotten.
+MAX_FINISHED_JOBS = 500
+
+# Share of the host kept free for the agent itself and the OS.
+HOST_HEADROOM = float(os.environ.get("SCHEDULER_HOST_HEADROOM", "0.2"))
+
+
+def _parse_limits(spec: str) -> dict:
+    """Parses 'jmeter=2,k6=4' into {'jmeter': 2, 'k6': 4}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        tool, _, value = item.partition("=")
+        limits[tool.strip().lower()] = int(value)
+    return limits
+
+
+def container_limits(tool: str, cpus: Optional[float] = None, memory_mb: Optional[int] = None) -> dict:
+    """Returns a generator container's Docker limits: the explicit ones, plus the defaults with LIMIT_TO_RESERVATION."""
+    if LIMIT_TO_RESERVATION:
+        cpus = cpus or DEFAULT_RESOURCES[tool]["cpus"]
+        memory_mb = memory_mb or DEFAULT_RESOURCES[tool]["memory_mb"]
+    return {"cpus": cpus, "memory_mb": memory_mb}
+
+
+def _host_memory_mb() -> int:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 8192
+
+
+class Job:
+    """A request to start a load test, tracked from queueing until its containers exit."""
+
+    def __init__(self, job_id: str, tool: str, launch: Callable[[], dict], cpus: float, memory_mb: int,
+                 priority: int, description: str):
+        self.job_id = job_id
+        self.tool = tool
+        self.launch = launch
+        self.cpus = cpus
+        self.memory_mb = memory_mb
+        self.priority = priority
+        self.description = description
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.containers = []
+        self.sequence = None
+
+    def to_dict(self) -> dict:
+        data = {
+            "job_id": self.job_id,
+            "tool": self.tool,
+            "status": self.status,
+            "priority": self.priority,
+            "cpus": self.cpus,
+            "memory_mb": self.memory_mb,
+            "description": self.description,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.result is not None:
+            data["result"] = self.result
+        return data
+
+
+class JobScheduler:
+    """
+    Admission control for test starts.
+
+    Jobs are admitted in priority order (higher first, FIFO within a
+    priority) while the host CPU and memory budgets and the per-tool
+    concurrency limits allow. A job blocked only by its tool's limit lets
+    other tools' jobs pass; a job blocked by the host budget holds back
+    everything behind it so large tests are not starved by small ones.
+    Reserved resources are released once all of a job's containers have
+    left the container inventory.
+    """
+
+    def __init__(self, cpu_budget: Optional[float] = None, memory_budget_mb: Optional[int] = None,
+                 tool_limits: Optional[dict] = None, poll_interval: float = 2.0):
+        self.cpu_budget = cpu_budget or float(os.environ.get(
+            "SCHEDULER_CPU_BUDGET", (os.cpu_count() or 1) * (1 - HOST_HEADROOM)))
+        self.memory_budget_mb = memory_budget_mb or int(os.environ.get(
+            "SCHEDULER_MEMORY_BUDGET_MB", _host_memory_mb() * (1 - HOST_HEADROOM)))
+        self.tool_limits = tool_limits if tool_limits is not None else _parse_limits(
+            os.environ.get("SCHEDULER_TOOL_LIMITS", "jmeter=2,k6=8,locust=8,browser=2"))
+        self.poll_interval = poll_interval
+        self._queue = []
+        self._jobs = {}
+        self._running = {}
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+        self._thread.start()
+
+    def _usage(self):
+        cpus = sum(job.cpus for job in self._running.values())
+        memory = sum(job.memory_mb for job in self._running.values())
+        per_tool = {}
+        for job in self._running.values():
+            per_tool[job.tool] = per_tool.get(job.tool, 0) + 1
+        return cpus, memory, per_tool
+
+    def submit(self, tool: str, launch: Callable[[], dict], cpus: float, memory_mb: int, priority: int = 0,
+               description: str = "") -> Job:
+        """
+        Queues a job and, if it is the next one admissible, starts it on the caller's thread.
+
+        The caller only ever launches its own job; others that became
+        admissible are left to the scheduler thread, which is woken for them.
+        """
+        job = Job(f"job_{os.urandom(4).hex()}", tool, launch, cpus, memory_mb, priority, description)
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+            if cpus > self.cpu_budget or memory_mb > self.memory_budget_mb:
+                job.status = "rejected"
+                job.finished_at = time.time()
+                job.result = {"status": "error", "message": (
+                    f"Job needs {cpus} CPUs / {memory_mb} MiB but the host budget is "
+                    f"{self.cpu_budget:g} CPUs / {self.memory_budget_mb} MiB.")}
+                return job
+            job.sequence = next(self._sequence)
+            heapq.heappush(self._queue, (-priority, job.sequence, job))
+            admitted = self._next_admissible()
+            if admitted is not job:
+                if admitted is not None:
+                    heapq.heappush(self._queue, (-admitted.priority, admitted.sequence, admitted))
+                    self._wakeup.set()
+                return job
+            self._admit(job)
+        self._launch(job)
+        return job
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        if len(finished) > MAX_FINISHED_JOBS:
+            finished.sort(key=lambda job: job.finished_at)
+            for job in finished[:len(finished) - MAX_FINISHED_JOBS]:
+                del self._jobs[job.job_id]
+
+    def _next_admissible(self) -> Optional[Job]:
+        cpus, memory, per_tool = self._usage()
+        deferred = []
+        admitted = None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            job = entry[2]
+            if job.status != "queued":
+                continue
+            limit = self.tool_limits.get(job.tool)
+            if limit is not None and per_tool.get(job.tool, 0) >= limit:
+                deferred.append(entry)
+                continue
+            if cpus + job.cpus > self.cpu_budget or memory + job.memory_mb > self.memory_budget_mb:
+                deferred.append(entry)
+                break
+            admitted = job
+            break
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+        return admitted
+
+    def _admit(self, job: Job):
+        job.status = "starting"
+        job.started_at = time.time()
+        self._running[job.job_id] = job
+
+    def _launch(self, job: Job):
+        try:
+            result = job.launch()
+        except Exception as e:
+            result = {"status": "error", "message": f"Failed to start job: {e}"}
+        with self._lock:
+            job.result = result
+            if result.get("status") == "success":
+                job.status = "running"
+                job.containers = result.get("containers") or [result["container_name"]]
+            else:
+                job.status = "failed"
+                job.finished_at = time.time()
+                self._running.pop(job.job_id, None)
+
+    def _dispatch(self):
+        """Starts queued jobs, in order, while they fit; runs on the scheduler thread."""
+        while True:
+            with self._lock:
+                job = self._next_admissible()
+                if job is None:
+                    return
+                self._admit(job)
+            self._launch(job)
+
+    def _reconcile(self):
+        live = {test["container_name"] for test in get_inventory().snapshot()}
+        released = False
+        with self._lock:
+            for job in list(self._running.values()):
+                if job.status == "running" and not any(name in live for name in job.containers):
+                    job.status = "finished"
+                    job.finished_at = time.time()
+                    del self._running[job.job_id]
+                    released = True
+        return released
+
+    def _loop(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                self._reconcile()
+                self._dispatch()
+            except Exception:
+                # Keep the scheduler alive; the next tick retries.
+                pass
+
+    def notify(self):
+        """Wakes the scheduler, e.g. after a test was stopped, so queued jobs start promptly."""
+        self._wakeup.set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued job. Running jobs must be stopped through their containers."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            return True
+
+    def jobs(self, include_finished: bool = False) -> list:
+        with self._lock:
+            active = ("queued", "starting", "running")
+            return [job.to_dict() for job in self._jobs.values() if include_finished or job.status in active]
+
+    def capacity(self) -> dict:
+        with self._lock:
+            cpus, memory, per_tool = self._usage()
+            return {
+                "cpu_budget": self.cpu_budget,
+                "cpus_reserved": cpus,
+                "memory_budget_mb": self.memory_budget_mb,
+                "memory_reserved_mb": memory,
+                "running_per_tool": per_tool,
+                "tool_limits": self.tool_limits,
+                "queued": sum(1 for _, _, job in self._queue if job.status == "queued"),
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> JobScheduler:
+    """Returns the shared scheduler, creating it on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+    return _scheduler
@@ -0,0 +1,259 @@
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Optional
+
+# Where staged test assets are kept, relative to the working directory. Files are
+# stored once per content hash under objects/; every distinct set of assets gets a
+# tree under trees/ that is mounted read-only at /tests.
+STAGING_DIR = os.environ.get("LOAD_TEST_STAGING_DIR", ".staging")
+
+# Set to 0 to mount the whole working directory (read-only) instead, e.g. for
+# scripts that build file paths at runtime.
+STAGE_ASSETS = os.environ.get("LOAD_TEST_STAGE_ASSETS", "1") != "0"
+
+TESTS_MOUNT = "/tests"
+
+# Trees not used for this long are pruned, together with the objects no
+# remaining tree links to. It must exceed the longest test, whose container
+# still has its tree mounted.
+STAGING_MAX_AGE_HOURS = float(os.environ.get("LOAD_TEST_STAGING_MAX_AGE_HOURS", "24"))
+# New trees prune the staging directory at most this often.
+PRUNE_INTERVAL = 3600
+
+# Script types that are scanned for further references; anything else is data.
+_SCANNED_SUFFIXES = (".js", ".mjs", ".ts", ".py", ".jmx")
+_QUOTED = re.compile(r"""["']([^"'\n]{1,255})["']""")
+_XML_TEXT = re.compile(r">([^<>\n]{1,255})<")
+_PY_IMPORT = re.compile(r"^\s*(?:from\s+([\w.]+)\s+import|import\s+([\w.]+))", re.M)
+
+_hashes = {}
+_hashes_lock = threading.Lock()
+# Held while building or pruning, so a prune never removes an object a tree is being linked to.
+_staging_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def _file_hash(path: str) -> str:
+    """SHA-256 of a file, re-read only when its size or modification time changes."""
+    st = os.stat(path)
+    with _hashes_lock:
+        cached = _hashes.get(path)
+    if cached and cached[0] == (st.st_size, st.st_mtime_ns):
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with _hashes_lock:
+        _hashes[path] = ((st.st_size, st.st_mtime_ns), digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _local_file(candidate: str, script_dir: str, root: str) -> Optional[str]:
+    """Returns a referenced path relative to root if it names a file inside it."""
+    candidate = candidate.strip()
+    if not candidate or "://" in candidate:
+        return None
+    bases = (script_dir, root)
+    if candidate.startswith(f"{TESTS_MOUNT}/"):
+        candidate, bases = candidate[len(TESTS_MOUNT) + 1:], (root,)
+    elif os.path.isabs(candidate):
+        return None
+    staging_root = os.path.join(root, STAGING_DIR) + os.sep
+    for base in bases:
+        path = os.path.realpath(os.path.join(base, candidate))
+        if path.startswith(root + os.sep) and not path.startswith(staging_root) and os.path.isfile(path):
+            return os.path.relpath(path, root)
+    return None
+
+
+def _references(path: str, root: str) -> set:
+    """Files inside root that a script mentions: quoted paths, JMX property values and local Python imports."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    script_dir = os.path.dirname(path)
+    candidates = _QUOTED.findall(text)
+    if path.endswith(".jmx"):
+        candidates += _XML_TEXT.findall(text)
+    if path.endswith(".py"):
+        for module in _PY_IMPORT.findall(text):
+            module_path = (module[0] or module[1]).replace(".", os.sep)
+            candidates += [f"{module_path}.py", os.path.join(module_path, "__init__.py")]
+    return {rel for rel in (_local_file(c, script_dir, root) for c in candidates) if rel}
+
+
+def referenced_files(script: str, data_files: Optional[list] = None, root: Optional[str] = None) -> list:
+    """
+    Collects a test script and every file it references, transitively.
+
+    Args:
+        script: The script, relative to root; it must resolve to a file inside root.
+        data_files: Extra files to include, for paths the script builds at runtime.
+        root: The directory the script's paths are relative to; defaults to the working directory.
+    """
+    root = os.path.realpath(root or os.getcwd())
+    script_path = os.path.realpath(os.path.join(root, script))
+    if not script_path.startswith(root + os.sep) or script_path.startswith(os.path.join(root, STAGING_DIR) + os.sep):
+        # Its relative path would start with '..' and link it outside the staged tree.
+        raise ValueError(f"Test script {script} is outside the working directory {root}")
+    pending = [os.path.relpath(script_path, root)]
+    for data_file in data_files or []:
+        rel = _local_file(data_file, root, root)
+        if rel is None:
+            raise FileNotFoundError(data_file)
+        pending.append(rel)
+    found = set()
+    while pending:
+        rel = pending.pop()
+        if rel in found:
+            continue
+        found.add(rel)
+        if rel.endswith(_SCANNED_SUFFIXES):
+            pending.extend(_references(os.path.join(root, rel), root) - found)
+    return sorted(found)
+
+
+def _store_object(source: str, digest: str, objects_dir: str) -> str:
+    obj = os.path.join(objects_dir, digest[:2], digest)
+    if not os.path.exists(obj):
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        tmp = f"{obj}.tmp-{os.urandom(4).hex()}"
+        shutil.copyfile(source, tmp)
+        # Trees hard-link objects, so an object must never change in place.
+        os.chmod(tmp, 0o444)
+        os.replace(tmp, obj)
+    return obj
+
+
+def _build_tree(tree: str, sources: dict, digests: dict, objects_dir: str):
+    tmp = f"{tree}.tmp-{os.urandom(4).hex()}"
+    for rel, digest in digests.items():
+        obj = _store_object(sources[rel], digest, objects_dir)
+        dest = os.path.join(tmp, rel)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        try:
+            os.link(obj, dest)
+        except OSError:
+            shutil.copyfile(obj, dest)
+    try:
+        os.rename(tmp, tree)
+    except OSError:
+        # Another start staged the same assets first; its tree is identical.
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def stage_assets(script: str, data_files: Optional[list] = None, extra_files: Optional[dict] = None) -> dict:
+    """
+    Stages a test script and the files it references into a content-addressed tree.
+
+    The tree is keyed by the hash of every staged path and file content, so a
+    repeated run of unchanged assets reuses the existing tree without copying.
+    The returned path is meant to be mounted read-only at /tests; scripts see
+    the same relative paths as in the working directory.
+
+    Args:
+        script: The test script, relative to the working directory.
+        data_files: Extra files to stage, relative to the working directory.
+        extra_files: Files from outside the working directory, as {path in the tree: source path},
+            e.g. a runner script shipped with the engine. Tree paths must be relative and stay inside it.
+    """
+    root = os.path.realpath(os.getcwd())
+    if not STAGE_ASSETS:
+        return {"status": "success", "path": root, "key": None, "files": None, "cached": True}
+    if not os.path.isfile(os.path.join(root, script)):
+        return {"status": "error", "message": f"Test script not found: {script}"}
+    try:
+        files = referenced_files(script, data_files, root)
+        sources = {rel: os.path.join(root, rel) for rel in files}
+        sources.update(extra_files or {})
+        digests = {rel: _file_hash(source) for rel, source in sources.items()}
+    except FileNotFoundError as e:
+        return {"status": "error", "message": f"Data file not found: {e}"}
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    for rel in sources:
+        if os.path.isabs(rel) or os.path.normpath(rel).split(os.sep)[0] == os.pardir:
+            return {"status": "error", "message": f"Cannot stage {rel}: it would be placed outside the staged tree."}
+    manifest = "".join(f"{rel}\0{digest}\n" for rel, digest in sorted(digests.items()))
+    key = hashlib.sha256(manifest.encode("utf-8")).hexdigest()[:32]
+    staging_root = os.path.join(root, STAGING_DIR)
+    tree = os.path.join(staging_root, "trees", key)
+    with _staging_lock:
+        cached = os.path.isdir(tree)
+        try:
+            if cached:
+                # A tree's modification time records its last use, for pruning.
+                os.utime(tree)
+            else:
+                os.makedirs(os.path.dirname(tree), exist_ok=True)
+                _build_tree(tree, sources, digests, os.path.join(staging_root, "objects"))
+        except OSError as e:
+            return {"status": "error", "message": f"Failed to stage assets of {script}: {e}"}
+    global _last_prune
+    if not cached and time.monotonic() - _last_prune > PRUNE_INTERVAL:
+        _last_prune = time.monotonic()
+        threading.Thread(target=prune_staging, name="staging-prune", daemon=True).start()
+    return {"status": "success", "path": tree, "key": key, "files": sorted(sources), "cached": cached}
+
+
+def _freed_size(path: str) -> int:
+    """Bytes freed by deleting a file: none while another hard link to it remains."""
+    st = os.lstat(path)
+    return st.st_size if st.st_nlink == 1 else 0
+
+
+def _remove(path: str) -> int:
+    """Deletes a file or directory tree and returns the bytes it freed."""
+    if os.path.isdir(path):
+        freed = sum(_freed_size(os.path.join(dirpath, name)) for dirpath, _, names in os.walk(path) for name in names)
+        shutil.rmtree(path, ignore_errors=True)
+        return freed
+    freed = _freed_size(path)
+    os.unlink(path)
+    return freed
+
+
+def prune_staging(max_age_hours: Optional[float] = None, root: Optional[str] = None) -> dict:
+    """
+    Removes staged trees that have not been used for max_age_hours, then every object no tree links to.
+
+    Trees hard-link their objects, so an object with a single link is used by
+    none; trees that fell back to copies do not need the object either.
+
+    Args:
+        max_age_hours: Age of the last use after which a tree is removed; defaults to STAGING_MAX_AGE_HOURS.
+        root: The working directory the staging directory is in.
+    """
+    max_age_hours = STAGING_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    staging_root = os.path.join(os.path.realpath(root or os.getcwd()), STAGING_DIR)
+    cutoff = time.time() - max_age_hours * 3600
+    trees_removed, objects_removed, freed = 0, 0, 0
+    try:
+        with _staging_lock:
+            trees_dir = os.path.join(staging_root, "trees")
+            if os.path.isdir(trees_dir):
+                for entry in os.scandir(trees_dir):
+                    if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                        freed += _remove(entry.path)
+                        trees_removed += 1
+            objects_dir = os.path.join(staging_root, "objects")
+            if os.path.isdir(objects_dir):
+                for prefix in os.scandir(objects_dir):
+                    if not prefix.is_dir(follow_symlinks=False):
+                        continue
+                    for entry in os.scandir(prefix.path):
+                        st = entry.stat(follow_symlinks=False)
+                        # Leftover temporary copies are removed once they are as old as a stale tree.
+                        if st.st_nlink == 1 and (".tmp-" not in entry.name or st.st_mtime < cutoff):
+                            freed += _remove(entry.path)
+                            objects_removed += 1
+                    if not os.listdir(prefix.path):
+                        os.rmdir(prefix.path)
+    except OSError as e:
+        return {"status": "error", "message": f"Failed to prune {staging_root}: {e}"}
+    return {"status": "success", "trees_removed": trees_removed, "objects_removed": objects_removed,
+            "bytes_freed": freed}
@@ -0,0 +1,309 @@
+import http.client
+import json
+import os
+import subprocess
+import threading
+import time
+from array import array
+from typing import Optional
+
+from .docker_api import DockerAPIError, container_endpoint
+from .docker_utils import get_api_client
+
+# A generator is flagged when, over the last WINDOW_SAMPLES samples, it spent
+# most of the time above CPU_THRESHOLD of its CPU limit, was throttled in more
+# than THROTTLE_THRESHOLD of its CFS periods, or came close to its memory limit.
+# Containers without a CPU limit are measured against the CPUs the scheduler
+# reserved for their tool instead, since they are never throttled.
+CPU_THRESHOLD = float(os.environ.get("GENERATOR_CPU_THRESHOLD", "0.9"))
+THROTTLE_THRESHOLD = float(os.environ.get("GENERATOR_THROTTLE_THRESHOLD", "0.1"))
+MEMORY_THRESHOLD = float(os.environ.get("GENERATOR_MEMORY_THRESHOLD", "0.95"))
+WINDOW_SAMPLES = 10
+MIN_SAMPLES = 5
+SUSTAINED_FRACTION = 0.8
+
+# Docker emits one stats sample per second; an hour fits before the oldest half is dropped.
+MAX_SAMPLES = 3600
+CLI_POLL_INTERVAL = 2.0
+MAX_FINISHED_SERIES = 100
+
+_UNITS = {"b": 1, "kb": 1e3, "mb": 1e6, "gb": 1e9, "tb": 1e12,
+          "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3, "tib": 1024 ** 4}
+
+
+class StatsSeries:
+    """
+    Compact resource time series for one generator container.
+
+    Samples are kept in typed arrays (a few dozen bytes each) rather than
+    per-sample dicts. The generator-bound verdict is sticky: once a run's
+    generator saturated, its results stay suspect even if it later recovers.
+    """
+
+    def __init__(self, container_name: str):
+        self.container_name = container_name
+        self.started = time.time()
+        self.elapsed = array("f")
+        self.cpu = array("f")         # share of the container's CPU limit (or reservation), 1.0 = saturated
+        self.memory_mb = array("f")
+        self.memory_limit_mb = 0.0
+        self.rx_bytes = array("d")
+        self.tx_bytes = array("d")
+        self.throttled = array("f")   # share of CFS periods in which the container was throttled
+        self.finished = None
+        self.bound_since = None
+        self.reasons = []
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, cpu: float, memory_mb: float, memory_limit_mb: float,
+               rx_bytes: float, tx_bytes: float, throttled: float):
+        with self._lock:
+            if len(self.elapsed) >= MAX_SAMPLES:
+                for column in (self.elapsed, self.cpu, self.memory_mb, self.rx_bytes, self.tx_bytes, self.throttled):
+                    del column[:MAX_SAMPLES // 2]
+            self.elapsed.append(timestamp - self.started)
+            self.cpu.append(cpu)
+            self.memory_mb.append(memory_mb)
+            self.memory_limit_mb = memory_limit_mb or self.memory_limit_mb
+            self.rx_bytes.append(rx_bytes)
+            self.tx_bytes.append(tx_bytes)
+            self.throttled.append(throttled)
+            self._evaluate()
+
+    def _evaluate(self):
+        if self.bound_since is not None or len(self.cpu) < MIN_SAMPLES:
+            return
+        cpu = self.cpu[-WINDOW_SAMPLES:]
+        throttled = self.throttled[-WINDOW_SAMPLES:]
+        reasons = []
+        busy = sum(1 for value in cpu if value >= CPU_THRESHOLD)
+        if busy >= SUSTAINED_FRACTION * len(cpu):
+            reasons.append(f"CPU above {CPU_THRESHOLD:.0%} of its limit in {busy} of the last {len(cpu)} samples")
+        mean_throttled = sum(throttled) / len(throttled)
+        if mean_throttled > THROTTLE_THRESHOLD:
+            reasons.append(f"CPU throttled in {mean_throttled:.0%} of scheduler periods")
+        if self.memory_limit_mb and self.memory_mb[-1] >= MEMORY_THRESHOLD * self.memory_limit_mb:
+            reasons.append(f"memory at {self.memory_mb[-1] / self.memory_limit_mb:.0%} of its limit")
+        if reasons:
+            self.bound_since = self.started + self.elapsed[-1]
+            self.reasons = reasons
+
+    def verdict(self) -> dict:
+        """Returns the generator verdict with the latest figures."""
+        with self._lock:
+            count = len(self.elapsed)
+            if self.bound_since is not None:
+                verdict = "generator-bound"
+            elif count < MIN_SAMPLES:
+                verdict = "warming-up"
+            else:
+                verdict = "ok"
+            result = {"verdict": verdict, "samples": count}
+            if self.reasons:
+                result["reasons"] = list(self.reasons)
+                result["bound_since"] = self.bound_since
+            if count:
+                result["cpu_pct_of_limit"] = round(self.cpu[-1] * 100, 1)
+                result["memory_mb"] = round(self.memory_mb[-1], 1)
+                if self.memory_limit_mb:
+                    result["memory_pct_of_limit"] = round(self.memory_mb[-1] / self.memory_limit_mb * 100, 1)
+                result["throttled_pct"] = round(self.throttled[-1] * 100, 1)
+            if count >= 2:
+                first = max(count - WINDOW_SAMPLES, 0)
+                span = (self.elapsed[-1] - self.elapsed[first]) or 1.0
+                result["rx_bytes_per_s"] = round((self.rx_bytes[-1] - self.rx_bytes[first]) / span)
+                result["tx_bytes_per_s"] = round((self.tx_bytes[-1] - self.tx_bytes[first]) / span)
+            return result
+
+    def to_dict(self, points: int = 60) -> dict:
+        """Returns the series downsampled to at most the given number of points."""
+        with self._lock:
+            step = max(1, -(-len(self.elapsed) // max(points, 1)))
+            return {
+                "container_name": self.container_name,
+                "started": self.started,
+                "memory_limit_mb": self.memory_limit_mb,
+                "elapsed_s": [round(v, 1) for v in self.elapsed[::step]],
+                "cpu_pct_of_limit": [round(v * 100, 1) for v in self.cpu[::step]],
+                "memory_mb": [round(v, 1) for v in self.memory_mb[::step]],
+                "rx_bytes": list(self.rx_bytes[::step]),
+                "tx_bytes": list(self.tx_bytes[::step]),
+                "throttled_pct": [round(v * 100, 1) for v in self.throttled[::step]],
+            }
+
+
+def _reserved_cpus(labels: Optional[dict]) -> float:
+    """CPUs the scheduler reserves for a generator, by its tool label; 0 for other containers."""
+    # Imported here: the inventory and the scheduler both import this module, directly or not.
+    from .inventory import LABEL_TOOL
+    from .scheduler import DEFAULT_RESOURCES
+    return DEFAULT_RESOURCES.get((labels or {}).get(LABEL_TOOL), {}).get("cpus", 0.0)
+
+
+def _parse_api_sample(sample: dict, cpu_limit: float):
+    """Turns one /containers/{id}/stats document into StatsSeries.append arguments."""
+    cpu, previous = sample.get("cpu_stats", {}), sample.get("precpu_stats", {})
+    cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - previous.get("cpu_usage", {}).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - previous.get("system_cpu_usage", 0)
+    online = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+    cores = cpu_delta / system_delta * online if system_delta > 0 and cpu_delta > 0 else 0.0
+
+    throttling, previous_throttling = cpu.get("throttling_data", {}), previous.get("throttling_data", {})
+    periods = throttling.get("periods", 0) - previous_throttling.get("periods", 0)
+    throttled = throttling.get("throttled_periods", 0) - previous_throttling.get("throttled_periods", 0)
+
+    memory = sample.get("memory_stats", {})
+    stats = memory.get("stats", {})
+    # Page cache is reclaimable; docker stats subtracts it the same way (cgroup v2, then v1).
+    cache = stats.get("inactive_file", stats.get("total_inactive_file", stats.get("cache", 0)))
+    networks = (sample.get("networks") or {}).values()
+    return (
+        time.time(),
+        cores / (cpu_limit or online),
+        max(memory.get("usage", 0) - cache, 0) / 2 ** 20,
+        memory.get("limit", 0) / 2 ** 20,
+        sum(n.get("rx_bytes", 0) for n in networks),
+        sum(n.get("tx_bytes", 0) for n in networks),
+        throttled / periods if periods > 0 else 0.0,
+    )
+
+
+def _parse_size(text: str) -> float:
+    text = text.strip()
+    number = text.rstrip("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+    try:
+        return float(number) * _UNITS.get(text[len(number):].strip().lower(), 1)
+    except ValueError:
+        return 0.0
+
+
+def _parse_cli_sample(sample: dict, cpu_limit: float):
+    """Turns one `docker stats --format '{{json .}}'` line into StatsSeries.append arguments."""
+    # The CLI reports CPU relative to one core and has no throttling data.
+    cores = _parse_size(sample.get("CPUPerc", "0%").rstrip("%")) / 100
+    usage, _, limit = sample.get("MemUsage", "").partition("/")
+    rx, _, tx = sample.get("NetIO", "").partition("/")
+    return (time.time(), cores / (cpu_limit or os.cpu_count() or 1), _parse_size(usage) / 2 ** 20,
+            _parse_size(limit) / 2 ** 20, _parse_size(rx), _parse_size(tx), 0.0)
+
+
+class StatsSampler:
+    """
+    Samples CPU, memory, network and throttling of generator containers.
+
+    With the API backend each container gets a stats stream that ends by
+    itself when the container exits. With the CLI backend a single poller
+    runs `docker stats --no-stream` over all watched containers.
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._active = set()
+        self._cpu_limits = {}
+        self._lock = threading.Lock()
+        self._cli_poller = None
+
+    def watch(self, container_name: str) -> StatsSeries:
+        """Starts sampling a container; calling it again for the same container is a no-op."""
+        with self._lock:
+            series = self._series.get(container_name)
+            if series is not None:
+                return series
+            self._prune()
+            series = self._series[container_name] = StatsSeries(container_name)
+            self._active.add(container_name)
+            client = get_api_client()
+            if client is not None:
+                threading.Thread(target=self._stream, args=(client, series), name=f"stats-{container_name}",
+                                 daemon=True).start()
+            elif self._cli_poller is None:
+                self._cli_poller = threading.Thread(target=self._poll_cli, name="stats-cli", daemon=True)
+                self._cli_poller.start()
+            return series
+
+    def _prune(self):
+        finished = [s for s in self._series.values() if s.finished is not None]
+        if len(finished) > MAX_FINISHED_SERIES:
+            finished.sort(key=lambda s: s.finished)
+            for series in finished[:len(finished) - MAX_FINISHED_SERIES]:
+                del self._series[series.container_name]
+
+    def _finish(self, container_name: str):
+        with self._lock:
+            self._active.discard(container_name)
+            series = self._series.get(container_name)
+            if series is not None and series.finished is None:
+                series.finished = time.time()
+
+    def _stream(self, client, series: StatsSeries):
+        name = series.container_name
+        try:
+            info = client.request("GET", container_endpoint(name, "json"))
+            cpu_limit = ((info.get("HostConfig", {}).get("NanoCpus") or 0) / 1e9
+                         or _reserved_cpus(info.get("Config", {}).get("Labels")))
+            for sample in client.stream("GET", container_endpoint(name, "stats"), params={"stream": "true"}):
+                if sample.get("precpu_stats", {}).get("system_cpu_usage"):
+                    series.append(*_parse_api_sample(sample, cpu_limit))
+        except (OSError, http.client.HTTPException, DockerAPIError, ValueError):
+            pass
+        self._finish(name)
+
+    def _cli_cpu_limit(self, container_name: str) -> float:
+        if container_name not in self._cpu_limits:
+            try:
+                result = subprocess.run(
+                    ["docker", "inspect", "--format", "{{.HostConfig.NanoCpus}}\t{{json .Config.Labels}}",
+                     container_name],
+                    check=True, capture_output=True, text=True)
+                nano_cpus, _, labels = result.stdout.strip().partition("\t")
+                self._cpu_limits[container_name] = (int(nano_cpus or 0) / 1e9
+                                                    or _reserved_cpus(json.loads(labels or "null")))
+            except (subprocess.CalledProcessError, ValueError, OSError):
+                self._cpu_limits[container_name] = 0.0
+        return self._cpu_limits[container_name]
+
+    def _poll_cli(self):
+        while True:
+            with self._lock:
+                names = sorted(self._active)
+            if names:
+                try:
+                    result = subprocess.run(["docker", "stats", "--no-stream", "--format", "{{json .}}", *names],
+                                            capture_output=True, text=True)
+                    seen = set()
+                    for line in result.stdout.splitlines():
+                        sample = json.loads(line)
+                        name = sample.get("Name")
+                        series = self._series.get(name)
+                        if series is not None:
+                            seen.add(name)
+                            series.append(*_parse_cli_sample(sample, self._cli_cpu_limit(name)))
+                    for name in set(names) - seen:
+                        self._finish(name)
+                        self._cpu_limits.pop(name, None)
+                except (OSError, ValueError):
+                    pass
+            time.sleep(CLI_POLL_INTERVAL)
+
+    def series(self, container_name: str) -> Optional[StatsSeries]:
+        with self._lock:
+            return self._series.get(container_name)
+
+    def forget(self, container_name: str):
+        """Drops a container's series once it is no longer needed."""
+        with self._lock:
+            self._active.discard(container_name)
+            self._series.pop(container_name, None)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> StatsSampler:
+    """Returns the shared stats sampler."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = StatsSampler()
+    return _sampler
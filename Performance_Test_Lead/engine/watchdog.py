@@ -0,0 +1,94 @@
+import json
+import os
+import time
+from typing import Callable, Optional
+
+from slo_watchdog import DEFAULT_GRACE_SECONDS, DEFAULT_INTERVAL, SloRules, SloWatchdog, WatchdogRegistry
+
+# How long a watchdog waits for a queued test to start before giving up.
+MAX_WAIT_SECONDS = 3600
+
+
+class Watchdog(SloWatchdog):
+    """
+    Aborts a test whose live metrics keep breaking its SLO rules.
+
+    The watchdog waits for the test to start (it may be queued), lets the
+    grace period pass, then evaluates the rules every interval. After
+    BREACHES_TO_ABORT consecutive breaching evaluations it stops the test
+    and writes the reason to record_file.
+    """
+
+    def __init__(self, name: str, rules: SloRules, metrics: Callable[[], Optional[dict]], stop: Callable[[], dict],
+                 is_alive: Callable[[], bool], record_file: Optional[str] = None,
+                 grace_seconds: float = DEFAULT_GRACE_SECONDS, interval: float = DEFAULT_INTERVAL):
+        super().__init__(name, rules, grace_seconds, interval)
+        self.metrics = metrics
+        self.stop = stop
+        self.is_alive = is_alive
+        self.record_file = record_file
+        self.started_at = None
+        self.finished_at = None
+
+    def _finish(self, status: str, reason: Optional[str] = None):
+        self.status = status
+        self.reason = reason
+        self.finished_at = time.time()
+
+    def _run(self):
+        waited = 0.0
+        while not self.is_alive():
+            if waited >= MAX_WAIT_SECONDS:
+                return self._finish("expired", "the test never started")
+            if self._cancelled.wait(self.interval):
+                return self._finish("cancelled")
+            waited += self.interval
+
+        self.status = "grace"
+        self.started_at = time.time()
+        if self._cancelled.wait(self.grace_seconds):
+            return self._finish("cancelled")
+
+        self.status = "watching"
+        while not self._cancelled.wait(self.interval):
+            if not self.is_alive():
+                return self._finish("completed")
+            try:
+                metrics = self.metrics()
+            except (OSError, ValueError):
+                metrics = None
+            if not metrics:
+                continue
+            reason = self.evaluate(metrics)
+            if reason:
+                result = self.stop()
+                self._finish("aborted", reason)
+                self._record(result)
+                return
+        self._finish("cancelled")
+
+    def _record(self, stop_result: dict):
+        if not self.record_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.record_file), exist_ok=True)
+            with open(self.record_file, "w", encoding="utf-8") as f:
+                json.dump({**self.to_dict(), "stop_result": stop_result}, f, indent=2)
+        except OSError:
+            pass
+
+    def to_dict(self) -> dict:
+        return {**super().to_dict(), "started_at": self.started_at, "finished_at": self.finished_at}
+
+
+_watchdogs = WatchdogRegistry()
+
+
+def watch(name: str, rules: SloRules, metrics: Callable[[], Optional[dict]], stop: Callable[[], dict],
+          is_alive: Callable[[], bool], **options) -> Watchdog:
+    """Starts a watchdog for a run, replacing (and cancelling) any earlier one."""
+    return _watchdogs.watch(Watchdog(name, rules, metrics, stop, is_alive, **options))
+
+
+def get_watchdog(name: str) -> Optional[Watchdog]:
+    return _watchdogs.get(name)
@@ -1,55 +1,583 @@
 import os
-from .engine.docker_utils import stop_container, list_containers
+from concurrent.futures import ThreadPoolExecutor
+from tool_cache import cache_stats, cached_tool, invalidate, invalidates
+from .engine.docker_utils import stop_container
+from .engine.images import get_image_pins
+from .engine.inventory import get_inventory
+from .engine.pool import get_pool
+from .engine.scheduler import DEFAULT_RESOURCES, container_limits, get_scheduler
+from .engine.staging import prune_staging
+from .engine.stats import get_sampler
+from .engine import watchdog
+from .engine.providers.browser import browser_runner, duration_seconds
 from .engine.providers.jmeter import jmeter_runner
-from .engine.providers.k6 import k6_runner
+from .engine.providers.k6 import execution_segments, k6_runner
 from .engine.providers.locust import locust_runner
+from .engine.results import latency, live
+from .engine.results.browser import summarize_browser_csv
+from .engine.results import locust as locust_results
+from .engine.results import store
+from .engine.results.jtl import summarize_jtl
+from .engine.results.output import RESULTS_DIR, resolve_output, run_result_files
 
-def start_jmeter_test(test_plan: str, jtl_file: str, report_name: str, container_name: str = None) -> dict:
-    """Starts a JMeter test using a Docker container."""
+def _submit(tool: str, launch, priority: int, cpus: float, memory_mb: int, containers: int, description: str) -> dict:
+    """Hands a test start to the scheduler and returns the job handle, plus the start result if it ran."""
+    limits = container_limits(tool, cpus, memory_mb)
+    cpus = cpus or DEFAULT_RESOURCES[tool]["cpus"]
+    memory_mb = memory_mb or DEFAULT_RESOURCES[tool]["memory_mb"]
+
+    def start():
+        # Queued jobs start later on the scheduler thread, so invalidate when the containers exist.
+        try:
+            return launch(limits)
+        finally:
+            invalidate("tests")
+    job = get_scheduler().submit(tool, start, cpus * containers, memory_mb * containers, priority, description)
+    invalidate("tests")
+    if job.status == "queued":
+        return {
+            "status": "queued",
+            "job_id": job.job_id,
+            "message": "Not enough generator capacity right now; the test will start when capacity frees up. "
+                       "Poll it with 'get_job_status'.",
+        }
+    if job.result is None:
+        return {
+            "status": "starting",
+            "job_id": job.job_id,
+            "message": "The test is being started; poll it with 'get_job_status'.",
+        }
+    return {**job.result, "job_id": job.job_id, "job_status": job.status}
+
+def start_jmeter_test(test_plan: str, jtl_file: str, report_name: str = None, container_name: str = None,
+                      priority: int = 0, cpus: float = None, memory_mb: int = None, data_files: list[str] = None) -> dict:
+    """
+    Starts a JMeter test using a Docker container, once the host has capacity for it.
+
+    Args:
+        test_plan: The .jmx test plan, relative to the working directory. It is staged
+            read-only together with the files it references.
+        jtl_file: The JTL results file to write, inside the run's results directory.
+        report_name: Optional directory for JMeter's HTML dashboard. Generating it is slow
+            for large runs; use 'summarize_jmeter_results' on the JTL instead.
+        container_name: Optional container name.
+        priority: Higher priority jobs are started first when tests are queued.
+        cpus: CPUs reserved for the container; when given, also its Docker CPU limit.
+        memory_mb: Memory reserved for the container, in MiB; when given, also its Docker memory limit.
+        data_files: Extra files the test plan needs that are not named in it literally.
+    """
     if not container_name:
         container_name = f"jmeter_{os.urandom(4).hex()}"
-    return jmeter_runner(test_plan, jtl_file, report_name, container_name)
+    return _submit("jmeter", lambda resources: jmeter_runner(test_plan, jtl_file, report_name, container_name,
+                                                             resources=resources, data_files=data_files),
+                   priority, cpus, memory_mb, 1, f"JMeter {test_plan} as {container_name}")
+
+def summarize_jmeter_results(jtl_file: str) -> dict:
+    """
+    Summarizes a JMeter JTL file: per-label throughput, error rate and p50/p90/p95/p99 latency.
 
-def start_k6_test(test_script: str, container_name: str = None) -> dict:
-    """Starts a K6 test using a Docker container."""
+    Args:
+        jtl_file: The CSV JTL file, as reported by 'start_jmeter_test' or by the name it was started with.
+    """
+    jtl_file = resolve_output(jtl_file)
+    if not os.path.exists(jtl_file):
+        return {"status": "error", "message": f"JTL file not found: {jtl_file}"}
+    try:
+        summary = summarize_jtl(jtl_file)
+    except ValueError as e:
+        return {"status": "error", "message": f"Could not parse {jtl_file} as a CSV JTL: {e}"}
+    return {"status": "success", "jtl_file": jtl_file, **summary}
+
+def start_k6_test(test_script: str, container_name: str = None, shards: int = 1,
+                  priority: int = 0, cpus: float = None, memory_mb: int = None, data_files: list[str] = None) -> dict:
+    """
+    Starts a K6 test using one or more Docker containers, once the host has capacity for it.
+
+    Args:
+        test_script: The k6 script, relative to the working directory. It is staged
+            read-only together with the modules and files it references.
+        container_name: Optional container name. For sharded runs it is used as the run id
+            and shard containers are named '<container_name>_<index>'.
+        shards: Number of containers to split the load across. Each shard runs an equal
+            k6 execution segment, so together they generate exactly the scripted load.
+        priority: Higher priority jobs are started first when tests are queued.
+        cpus: CPUs reserved for each container; when given, also its Docker CPU limit.
+        memory_mb: Memory reserved for each container, in MiB; when given, also its Docker memory limit.
+        data_files: Extra files the script needs that are not named in it literally.
+    """
     if not container_name:
         container_name = f"k6_{os.urandom(4).hex()}"
-    return k6_runner(test_script, container_name)
+    shards = max(shards, 1)
+    return _submit("k6", lambda resources: _launch_k6(test_script, container_name, shards, resources, data_files),
+                   priority, cpus, memory_mb, shards, f"k6 {test_script} as {container_name} ({shards} shards)")
+
+def _launch_k6(test_script: str, container_name: str, shards: int, resources: dict, data_files: list) -> dict:
+    if shards == 1:
+        return k6_runner(test_script, container_name, resources=resources, data_files=data_files)
 
-def start_locust_test(locust_file: str, host: str, users: int = 10, spawn_rate: int = 1, run_time: str = "1m", container_name: str = None) -> dict:
-    """Starts a Locust test in headless mode using a Docker container."""
+    run_id = container_name
+    segments, sequence = execution_segments(shards)
+    started = []
+    for index, segment in enumerate(segments):
+        result = k6_runner(test_script, f"{run_id}_{index}", run_id, segment, sequence, resources, data_files)
+        if result["status"] != "success":
+            # A partial group would generate only part of the load; undo it.
+            _stop_containers(started)
+            return {"status": "error", "run_id": run_id,
+                    "message": f"Failed to start shard {index} of {shards}: {result['message']}"}
+        started.append(result["container_name"])
+    return {
+        "status": "success",
+        "message": f"Started {shards} k6 shards for run {run_id}.",
+        "run_id": run_id,
+        "containers": started,
+    }
+
+def start_locust_test(locust_file: str, host: str, users: int = 10, spawn_rate: int = 1, run_time: str = "1m",
+                      container_name: str = None, priority: int = 0, cpus: float = None, memory_mb: int = None,
+                      data_files: list[str] = None) -> dict:
+    """
+    Starts a Locust test in headless mode using a Docker container, once the host has capacity for it.
+
+    Args:
+        locust_file: The locustfile, relative to the working directory. It is staged
+            read-only together with the local modules and files it references.
+        host: The target host.
+        users: Peak number of concurrent users.
+        spawn_rate: Users started per second.
+        run_time: Test duration, e.g. '1m'.
+        container_name: Optional container name.
+        priority: Higher priority jobs are started first when tests are queued.
+        cpus: CPUs reserved for the container; when given, also its Docker CPU limit.
+        memory_mb: Memory reserved for the container, in MiB; when given, also its Docker memory limit.
+        data_files: Extra files the locustfile needs that are not named in it literally.
+    """
     if not container_name:
         container_name = f"locust_{os.urandom(4).hex()}"
-    return locust_runner(locust_file, container_name, host, users, spawn_rate, run_time)
+    return _submit("locust", lambda resources: locust_runner(locust_file, container_name, host, users, spawn_rate,
+                                                             run_time, resources=resources, data_files=data_files),
+                   priority, cpus, memory_mb, 1, f"Locust {locust_file} as {container_name}")
+
+def start_browser_test(journey_file: str, base_url: str = None, contexts: int = 5, browsers: int = 1,
+                       iterations: int = 0, duration: str = "1m", ramp_up: str = "0", think_time_ms: int = 0,
+                       stand_in_dir: str = None, container_name: str = None, priority: int = 0, cpus: float = None,
+                       memory_mb: int = None, data_files: list[str] = None) -> dict:
+    """
+    Starts a real-browser load test: a recorded user journey replayed over and over in concurrent,
+    isolated headless Chromium contexts, measuring TTFB, FCP, LCP, CLS and navigation timing.
+
+    Args:
+        journey_file: The journey JSON, relative to the working directory: a list of steps such as
+            {"goto": "/"}, {"click": "text=Login"}, {"fill": "#user", "value": "demo"},
+            {"press": "#user", "key": "Enter"}, {"wait_for": "#dashboard"} or {"wait_ms": 500}.
+        base_url: The URL the journey's paths are relative to.
+        contexts: Concurrent browser contexts (virtual users).
+        browsers: Chromium instances the contexts are spread over.
+        iterations: Journeys per context; 0 repeats the journey until 'duration' has passed.
+        duration: Test duration, e.g. '1m'; '0' runs 'iterations' journeys only.
+        ramp_up: Time over which the contexts are started, e.g. '30s'.
+        think_time_ms: Pause between two journeys of a context.
+        stand_in_dir: Optional directory of static pages to serve inside the container as a local
+            stand-in target instead of 'base_url'.
+        container_name: Optional container name.
+        priority: Higher priority jobs are started first when tests are queued.
+        cpus: CPUs reserved for the container; when given, also its Docker CPU limit.
+        memory_mb: Memory reserved for the container, in MiB; when given, also its Docker memory limit.
+        data_files: Extra files the journey needs that are not named in it literally.
+    """
+    seconds = duration_seconds(duration)
+    if seconds is None:
+        return {"status": "error", "message": f"Invalid duration '{duration}'; use e.g. '90s', '5m' or '1h'."}
+    if not iterations and not seconds:
+        return {"status": "error", "message": "Give a non-zero 'iterations' or 'duration'."}
+    if not container_name:
+        container_name = f"browser_{os.urandom(4).hex()}"
+    return _submit("browser", lambda resources: browser_runner(journey_file, container_name, base_url, contexts,
+                                                               browsers, iterations, duration, ramp_up,
+                                                               think_time_ms, stand_in_dir, resources=resources,
+                                                               data_files=data_files),
+                   priority, cpus, memory_mb, 1, f"Browser {journey_file} as {container_name} ({contexts} contexts)")
+
+def summarize_browser_results(run_id: str, relative_error: float = 0.01) -> dict:
+    """
+    Summarizes a browser load test: p50/p90/p95/p99 of TTFB, FCP, LCP, CLS and load time per page
+    view, of every journey step and of whole journeys, plus the failed journeys.
+
+    Args:
+        run_id: The run id reported when the test was started; it can still be running.
+        relative_error: Maximum relative error of the reported percentiles, e.g. 0.01 for 1%.
+    """
+    csv_files = run_result_files(run_id)["browser"]
+    if not csv_files:
+        return {"status": "error", "message": f"No browser results found for run {run_id} in {RESULTS_DIR}/{run_id}."}
+    try:
+        bits = latency.LatencyHistogram.for_relative_error(relative_error).sub_bucket_bits
+        summary = summarize_browser_csv(csv_files, bits)
+    except (OSError, ValueError) as e:
+        return {"status": "error", "message": f"Failed to summarize browser results of run {run_id}: {e}"}
+    return {"status": "success", "run_id": run_id, **summary}
 
+@cached_tool(ttl=3, tags=("tests",))
 def list_running_tests(tool_type: str = None) -> dict:
     """
-    Lists currently running load tests.
+    Lists currently running load tests, with a 'generator' verdict per container. A
+    'generator-bound' verdict means the load generator itself ran out of CPU or memory,
+    so the test measured the generator rather than the system under test.
     
     Args:
-        tool_type: Optional tool type to filter (jmeter, k6, locust).
+        tool_type: Optional tool type to filter (jmeter, k6, locust, browser).
     """
-    # Mapping tool_type to image patterns
-    image_map = {
-        "jmeter": "custmeter:latest",
-        "k6": "loadimpact/k6",
-        "locust": "locustio/locust"
-    }
-    
-    if tool_type and tool_type.lower() in image_map:
-        return list_containers(image_map[tool_type.lower()])
-    
-    # If no tool_type, search for all three
-    all_tests = []
-    for tool, pattern in image_map.items():
-        res = list_containers(pattern)
-        if res["status"] == "success":
-            for c in res.get("containers", []):
-                c["tool"] = tool
-                all_tests.append(c)
-                
-    return {"status": "success", "tests": all_tests}
+    tool = tool_type.lower() if tool_type else None
+    tests = get_inventory().snapshot(tool=tool)
+    if not tests:
+        return {"status": "success", "message": "No matching containers found.", "tests": []}
+    sampler = get_sampler()
+    for test in tests:
+        # The inventory starts sampling every test it finds, so this only reads.
+        series = sampler.series(test["container_name"])
+        test["generator"] = series.verdict() if series else {"verdict": "unknown"}
+        if test["tool"] == "locust":
+            follower = _locust_follower(test)
+            if follower:
+                test["live"] = follower.snapshot()["aggregate"]
+    return {"status": "success", "tests": tests}
+
+def _locust_follower(test: dict):
+    """Returns the stats follower for a Locust container, re-attaching after an agent restart."""
+    follower = locust_results.get_follower(test["container_name"])
+    if follower is None and test.get("run_id"):
+        csv_prefix = os.path.join(os.getcwd(), RESULTS_DIR, test["run_id"], test["container_name"])
+        follower = locust_results.follow(test["container_name"], csv_prefix)
+    return follower
+
+def get_locust_stats(container_name: str) -> dict:
+    """
+    Reports live per-endpoint RPS, failures and response time percentiles of a running Locust test.
+
+    Args:
+        container_name: The Locust test container name.
+    """
+    tests = [t for t in get_inventory().snapshot(tool="locust") if t["container_name"] == container_name]
+    follower = locust_results.get_follower(container_name) or (_locust_follower(tests[0]) if tests else None)
+    if follower is None:
+        return {"status": "error", "message": f"No Locust test found with container name: {container_name}"}
+    stats = follower.snapshot()
+    if stats["aggregate"] is None and not stats["endpoints"]:
+        return {"status": "success", "message": "No statistics written yet.", "container_name": container_name}
+    return {"status": "success", "container_name": container_name, **stats}
 
+@invalidates("tests")
 def stop_test(container_name: str) -> dict:
     """Stops a running load test container."""
-    return stop_container(container_name)
+    result = stop_container(container_name)
+    if result["status"] == "success":
+        get_inventory().remove(container_name)
+        locust_results.forget(container_name)
+        get_scheduler().notify()
+    return result
+
+def get_generator_stats(container_name: str, points: int = 60) -> dict:
+    """
+    Reports the CPU, memory, network and throttling time series of a load generator container.
+
+    Args:
+        container_name: The test container name.
+        points: Maximum number of points to return; longer series are downsampled.
+    """
+    series = get_sampler().series(container_name)
+    if series is None:
+        return {"status": "error", "message": f"No resource samples for container: {container_name}"}
+    return {"status": "success", **series.verdict(), "series": series.to_dict(points)}
+
+def get_tool_cache_stats() -> dict:
+    """
+    Reports the result cache of the read-only listing tools: per tool its TTL, entries,
+    hits, misses, hit rate, LRU evictions and invalidations by starting or stopping tests.
+    """
+    return {"status": "success", "tools": cache_stats(__package__)}
+
+def get_job_status(job_id: str) -> dict:
+    """
+    Reports the state of a test start job: queued, starting, running, finished, failed, cancelled or rejected.
+
+    Args:
+        job_id: The job id returned by a start_*_test tool.
+    """
+    job = get_scheduler().get(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Job not found: {job_id}"}
+    return {"status": "success", **job.to_dict()}
+
+@cached_tool(ttl=2, tags=("tests",))
+def list_jobs(include_finished: bool = False) -> dict:
+    """
+    Lists queued and running test start jobs together with the host capacity in use.
+
+    Args:
+        include_finished: Also include finished, failed and cancelled jobs.
+    """
+    scheduler = get_scheduler()
+    return {"status": "success", "jobs": scheduler.jobs(include_finished), "capacity": scheduler.capacity()}
+
+@invalidates("tests")
+def cancel_job(job_id: str) -> dict:
+    """
+    Cancels a test start job that is still waiting in the queue.
+
+    Args:
+        job_id: The job id returned by a start_*_test tool.
+    """
+    if get_scheduler().cancel(job_id):
+        return {"status": "success", "message": f"Cancelled queued job {job_id}."}
+    return {"status": "error", "message": f"Job {job_id} is not queued; stop its containers instead."}
+
+def prepare_generators(refresh_images: bool = False) -> dict:
+    """
+    Pulls and pins the generator images and fills the warm container pool, so later test starts skip both.
+
+    Args:
+        refresh_images: Re-pull images that are already pinned, moving each pin to the newest digest.
+    """
+    images = get_image_pins().prepull(refresh=refresh_images)
+    pool = get_pool().fill()
+    status = "success" if all(image["status"] == "success" for image in images.values()) else "error"
+    return {"status": status, "images": images, "pool": pool}
+
+def prune_staged_assets(max_age_hours: float = None) -> dict:
+    """
+    Frees disk space in the staging directory: removes staged test asset trees that no test has used
+    for a while, and the stored files no remaining tree needs.
+
+    Args:
+        max_age_hours: Hours since its last use after which a tree is removed; defaults to
+            LOAD_TEST_STAGING_MAX_AGE_HOURS (24). It must exceed the longest running test.
+    """
+    return prune_staging(max_age_hours)
+
+def drain_generator_pool() -> dict:
+    """Stops every idle container of the warm pool; running tests are not affected."""
+    stopped = get_pool().drain()
+    return {"status": "success", "message": f"Stopped {stopped} idle pool container(s)."}
+
+def _stop_containers(container_names: list) -> list:
+    """Stops containers in parallel and returns their individual results."""
+    if not container_names:
+        return []
+    with ThreadPoolExecutor(max_workers=min(16, len(container_names))) as pool:
+        return list(pool.map(stop_test, container_names))
+
+@cached_tool(ttl=3, tags=("tests",))
+def list_test_runs(tool_type: str = None) -> dict:
+    """
+    Lists running tests grouped by run id, e.g. all shards of a sharded k6 test.
+
+    Args:
+        tool_type: Optional tool type to filter (jmeter, k6, locust, browser).
+    """
+    runs = {}
+    for test in get_inventory().snapshot(tool=tool_type.lower() if tool_type else None):
+        run = runs.setdefault(test["run_id"], {
+            "run_id": test["run_id"],
+            "tool": test["tool"],
+            "script": test["script"],
+            "containers": [],
+        })
+        series = get_sampler().series(test["container_name"])
+        verdict = series.verdict()["verdict"] if series else "unknown"
+        run["containers"].append({"container_name": test["container_name"], "status": test["status"],
+                                  "generator": verdict})
+    for run in runs.values():
+        run["container_count"] = len(run["containers"])
+        run["generator_bound"] = any(c["generator"] == "generator-bound" for c in run["containers"])
+    return {"status": "success", "runs": list(runs.values())}
+
+@invalidates("tests")
+def stop_test_run(run_id: str) -> dict:
+    """
+    Stops every container of a test run, e.g. all shards of a sharded k6 test.
+
+    Args:
+        run_id: The run id reported when the test was started.
+    """
+    names = [t["container_name"] for t in get_inventory().snapshot(run_id=run_id)]
+    if not names:
+        return {"status": "error", "message": f"No running containers found for run {run_id}."}
+    results = _stop_containers(names)
+    failed = [r["message"] for r in results if r["status"] != "success"]
+    if failed:
+        return {"status": "error", "run_id": run_id, "message": f"Stopped {len(names) - len(failed)} of {len(names)} containers.",
+                "errors": failed}
+    return {"status": "success", "run_id": run_id, "message": f"Stopped {len(names)} containers of run {run_id}."}
+
+@invalidates("store")
+def store_run_results(run_id: str, jtl_file: str = None) -> dict:
+    """
+    Saves a finished run's results into the columnar result store for later comparison.
+
+    Args:
+        run_id: The run id reported when the test was started.
+        jtl_file: For JMeter runs, the JTL file the test wrote; defaults to the one in the run's results.
+    """
+    files = run_result_files(run_id)
+    history_files, k6_files = files["locust"], files["k6"]
+    if jtl_file or files["jmeter"]:
+        jtl_file = resolve_output(jtl_file, run_id) if jtl_file else files["jmeter"][0]
+    try:
+        if jtl_file:
+            if not os.path.exists(jtl_file):
+                return {"status": "error", "message": f"JTL file not found: {jtl_file}"}
+            summary = store.ingest_jtl(run_id, jtl_file)
+        elif history_files:
+            summary = store.ingest_locust_history(run_id, history_files)
+        elif k6_files:
+            summary = store.ingest_k6_csv(run_id, k6_files)
+        elif files["browser"]:
+            return {"status": "error", "message": f"Run {run_id} is a browser test; summarize it with "
+                                                  "'summarize_browser_results'."}
+        else:
+            return {"status": "error", "message": f"No result files found for run {run_id} in {RESULTS_DIR}/{run_id}."}
+    except (RuntimeError, ValueError, OSError, OverflowError, MemoryError) as e:
+        return {"status": "error", "message": f"Failed to store results for run {run_id}: {e}"}
+    return {"status": "success", "run_id": run_id, "summary": summary}
+
+@cached_tool(ttl=60, tags=("store",))
+def list_stored_runs(tool_type: str = None, limit: int = 20) -> dict:
+    """
+    Lists the most recent runs in the result store with their headline numbers.
+
+    Args:
+        tool_type: Optional tool type to filter (jmeter, k6, locust).
+        limit: Maximum number of runs to return.
+    """
+    runs = store.list_runs(tool_type.lower() if tool_type else None, limit)
+    return {"status": "success", "runs": runs}
+
+def compare_test_runs(baseline_run_id: str, candidate_run_id: str) -> dict:
+    """
+    Compares two stored runs per label: throughput, error rate and p50/p95/p99 latency.
+
+    Args:
+        baseline_run_id: The reference run, e.g. last week's.
+        candidate_run_id: The run to compare against the baseline.
+    """
+    try:
+        comparison = store.compare_runs(baseline_run_id, candidate_run_id)
+    except FileNotFoundError:
+        return {"status": "error", "message": "Both runs must be stored first with 'store_run_results'."}
+    except (RuntimeError, ValueError) as e:
+        return {"status": "error", "message": str(e)}
+    return {"status": "success", "baseline": baseline_run_id, "candidate": candidate_run_id, "labels": comparison}
+
+def aggregate_latency_percentiles(run_id: str, jtl_files: list[str] = None, relative_error: float = 0.01,
+                                  expected_interval_ms: int = 0) -> dict:
+    """
+    Merges the latency of every generator container in a run into one set of percentiles.
+
+    Args:
+        run_id: The run id reported when the test was started.
+        jtl_files: For JMeter runs, the JTL files the test wrote; defaults to those in the run's results.
+        relative_error: Maximum relative error of the reported percentiles, e.g. 0.01 for 1%.
+        expected_interval_ms: Expected time between requests per virtual user. When set,
+            latencies are corrected for coordinated omission.
+    """
+    try:
+        bits = latency.LatencyHistogram.for_relative_error(relative_error).sub_bucket_bits
+        jtl_files = [resolve_output(f, run_id) for f in jtl_files] if jtl_files else None
+        histogram, sources = latency.run_histogram(run_id, jtl_files, bits, expected_interval_ms)
+    except (OSError, ValueError) as e:
+        return {"status": "error", "message": f"Failed to aggregate latency for run {run_id}: {e}"}
+    if not sources:
+        return {"status": "error", "message": f"No result files found for run {run_id} in {RESULTS_DIR}/{run_id}."}
+    return {
+        "status": "success",
+        "run_id": run_id,
+        "sources": len(sources),
+        "coordinated_omission_corrected": expected_interval_ms > 0,
+        **latency.percentile_report(histogram),
+    }
+
+def _run_metrics(run_id: str, jtl_file: str, tails: dict):
+    """Live rps, error rate and p95 of a run over the last few seconds, or None before it has data."""
+    tests = get_inventory().snapshot(run_id=run_id)
+    if not tests:
+        return None
+    tool = tests[0]["tool"]
+    if tool == "browser":
+        # Browser tests time journeys, not requests; there is no rps or request error rate to watch.
+        return None
+    if tool == "locust":
+        follower = _locust_follower(tests[0])
+        aggregate = follower.snapshot()["aggregate"] if follower else None
+        if not aggregate:
+            return None
+        rps = aggregate["rolling_rps"]
+        return {"rps": rps, "error_rate": round(aggregate["rolling_failures_per_s"] / rps, 4) if rps else 0.0,
+                "p95_ms": aggregate["p95_ms"]}
+
+    if tool == "jmeter":
+        paths = [resolve_output(jtl_file, run_id)] if jtl_file else run_result_files(run_id)["jmeter"]
+    else:
+        run_dir = os.path.join(os.getcwd(), RESULTS_DIR, run_id)
+        paths = [os.path.join(run_dir, f"{t['container_name']}.csv") for t in tests]
+    samples = []
+    for path in paths:
+        if path not in tails:
+            tails[path] = live.jtl_tail(path) if tool == "jmeter" else live.k6_tail(path)
+        samples.extend(tails[path].samples())
+    return live.window_stats(samples)
+
+def _is_browser_run(run_id: str) -> bool:
+    """Whether a running, or still queued, run is a browser test."""
+    tests = get_inventory().snapshot(run_id=run_id)
+    if tests:
+        return tests[0]["tool"] == "browser"
+    return any(job["tool"] == "browser" and f" as {run_id} " in f"{job['description']} "
+               for job in get_scheduler().jobs())
+
+def watch_test_run(run_id: str, max_error_rate: float = None, max_p95_ms: float = None, min_rps: float = None,
+                   grace_seconds: int = 60, jtl_file: str = None) -> dict:
+    """
+    Watches a run's live metrics and stops it automatically when it keeps breaking its SLO.
+
+    Rules are checked every few seconds over a rolling window once the grace period has
+    passed; two consecutive failed checks stop every container of the run. The reason
+    is reported by 'get_watchdog_status' and written to <results>/<run_id>/watchdog.json.
+
+    Args:
+        run_id: The run id (or container name / queued job's container name) to watch.
+        max_error_rate: Highest acceptable share of failed requests (0.05 = 5%).
+        max_p95_ms: Highest acceptable p95 response time in milliseconds.
+        min_rps: Lowest acceptable throughput in requests per second.
+        grace_seconds: Time after the test starts before rules are enforced.
+        jtl_file: For JMeter runs, the JTL file the test writes; defaults to the one in the run's results.
+    """
+    rules = watchdog.SloRules(max_error_rate, max_p95_ms, min_rps)
+    if not rules:
+        return {"status": "error", "message": "Give at least one rule: max_error_rate, max_p95_ms or min_rps."}
+    if _is_browser_run(run_id):
+        return {"status": "error", "message": f"Run {run_id} is a browser test; it has no request rate or error "
+                                              "rate to watch, so SLO rules cannot be enforced on it."}
+    tails = {}
+    dog = watchdog.watch(
+        run_id, rules,
+        metrics=lambda: _run_metrics(run_id, jtl_file, tails),
+        stop=lambda: stop_test_run(run_id),
+        is_alive=lambda: bool(get_inventory().snapshot(run_id=run_id)),
+        record_file=os.path.join(os.getcwd(), RESULTS_DIR, run_id, "watchdog.json"),
+        grace_seconds=grace_seconds,
+    )
+    return {"status": "success", "message": f"Watching run {run_id}; rules apply after {grace_seconds}s.",
+            **dog.to_dict()}
+
+def get_watchdog_status(run_id: str) -> dict:
+    """
+    Reports a run's SLO watchdog: its rules, the latest live metrics and, if it stopped
+    the run, why.
+
+    Args:
+        run_id: The watched run id.
+    """
+    dog = watchdog.get_watchdog(run_id)
+    if dog is None:
+        return {"status": "error", "message": f"Run {run_id} is not being watched."}
+    return {"status": "success", **dog.to_dict()}
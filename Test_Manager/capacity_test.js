@@ -0,0 +1,20 @@
+import http from 'k6/http';
+import { check } from 'k6';
+
+// VUs are changed at runtime by the capacity search, which requires the
+// externally-controlled executor.
+export const options = {
+  scenarios: {
+    capacity: {
+      executor: 'externally-controlled',
+      vus: 1,
+      maxVUs: 200,
+      duration: '30m',
+    },
+  },
+};
+
+export default function () {
+  const res = http.get('https://httpbin.test.k6.io');
+  check(res, { 'status was 200': (r) => r.status == 200 });
+}
@@ -0,0 +1,224 @@
+import threading
+import time
+from typing import Optional
+
+import requests
+
+from .k6_api import get_metrics, get_status, metric_totals, patch_status
+
+# A step whose throughput grew by less than this share over the previous step,
+# despite more VUs, is past the knee even if the SLO still holds.
+PLATEAU_GAIN = 0.05
+
+
+class StepResult:
+    """Measurements of one VU level, taken from the deltas of k6's cumulative metrics."""
+
+    def __init__(self, vus: int, duration: float, requests_count: float, failures: float, mean_ms: float,
+                 p95_ms: Optional[float]):
+        self.vus = vus
+        self.duration = duration
+        self.requests = requests_count
+        self.failures = failures
+        self.mean_ms = mean_ms
+        self.p95_ms = p95_ms
+        self.breaches = []
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "vus": self.vus,
+            "throughput_rps": round(self.throughput, 2),
+            "error_rate": round(self.error_rate, 4),
+            "mean_ms": round(self.mean_ms, 1),
+            "cumulative_p95_ms": round(self.p95_ms, 1) if self.p95_ms is not None else None,
+            "within_slo": not self.breaches,
+            "breaches": self.breaches,
+        }
+
+
+class CapacitySearch:
+    """
+    Finds the highest VU level a running k6 test sustains within its SLO.
+
+    The search changes 'vus' on /v1/status (the script must use the
+    externally-controlled executor), lets each level settle, then measures
+    it from /v1/metrics. k6 only exposes cumulative metrics, so throughput,
+    error rate and mean latency are computed exactly from the deltas across
+    the step. The p95 is cumulative since the test began: while load only
+    rises it lags the step's true p95, so a breach of it is a real breach.
+    A level below one already measured would inherit the higher level's
+    tail, so there the latency SLO is checked against the step's exact
+    mean instead, which is optimistic.
+
+    'step' mode adds step_vus until the SLO breaks; 'binary' mode bisects
+    between start_vus and max_vus down to step_vus resolution.
+    """
+
+    def __init__(self, test_id: str, port: int, p95_slo_ms: float, max_error_rate: float, start_vus: int,
+                 max_vus: int, step_vus: int, step_seconds: float, settle_seconds: float, mode: str):
+        self.test_id = test_id
+        self.port = port
+        self.p95_slo_ms = p95_slo_ms
+        self.max_error_rate = max_error_rate
+        self.start_vus = max(start_vus, 1)
+        self.max_vus = max(max_vus, self.start_vus)
+        self.step_vus = max(step_vus, 1)
+        self.step_seconds = step_seconds
+        self.settle_seconds = settle_seconds
+        self.mode = mode
+        self.status = "running"
+        self.steps = []
+        self.capacity = None
+        self.stop_reason = None
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"capacity-{test_id}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _sleep(self, seconds: float):
+        if self._cancelled.wait(seconds):
+            raise InterruptedError("capacity search cancelled")
+
+    def _measure(self, vus: int) -> StepResult:
+        patch_status(self.port, vus=vus)
+        self._sleep(self.settle_seconds)
+        before = metric_totals(get_metrics(self.port))
+        started = time.monotonic()
+        self._sleep(self.step_seconds)
+        after = metric_totals(get_metrics(self.port))
+        requests_count = after[0] - before[0]
+        step = StepResult(vus, time.monotonic() - started, requests_count, max(after[1] - before[1], 0),
+                          (after[2] - before[2]) / requests_count if requests_count else 0.0, after[3])
+        ascending = all(vus >= earlier.vus for earlier in self.steps)
+        if ascending and step.p95_ms is not None and step.p95_ms > self.p95_slo_ms:
+            step.breaches.append(f"p95 {step.p95_ms:.0f} ms > {self.p95_slo_ms:g} ms")
+        elif not ascending and step.mean_ms > self.p95_slo_ms:
+            step.breaches.append(f"mean {step.mean_ms:.0f} ms > {self.p95_slo_ms:g} ms")
+        if step.error_rate > self.max_error_rate:
+            step.breaches.append(f"error rate {step.error_rate:.2%} > {self.max_error_rate:.2%}")
+        if requests_count == 0:
+            step.breaches.append("no requests completed")
+        self.steps.append(step)
+        return step
+
+    def _accept(self, step: StepResult):
+        if self.capacity is None or step.throughput > self.capacity.throughput:
+            self.capacity = step
+
+    def _step_search(self):
+        vus = self.start_vus
+        previous = None
+        while vus <= self.max_vus:
+            step = self._measure(vus)
+            if step.breaches:
+                self.stop_reason = f"SLO broken at {vus} VUs: " + "; ".join(step.breaches)
+                return
+            if previous is not None and step.throughput < previous.throughput * (1 + PLATEAU_GAIN):
+                self.stop_reason = (f"throughput plateaued at {vus} VUs ({step.throughput:.1f} rps vs "
+                                    f"{previous.throughput:.1f} rps at {previous.vus} VUs)")
+                return
+            self._accept(step)
+            previous = step
+            vus += self.step_vus
+        self.stop_reason = f"reached max_vus ({self.max_vus}) within the SLO"
+
+    def _binary_search(self):
+        low_step = self._measure(self.start_vus)
+        if low_step.breaches:
+            self.stop_reason = f"SLO already broken at start_vus ({self.start_vus}): " + "; ".join(low_step.breaches)
+            return
+        self._accept(low_step)
+        low, high = self.start_vus, self.max_vus + 1
+        while high - low > self.step_vus:
+            middle = (low + high) // 2
+            step = self._measure(middle)
+            if step.breaches:
+                high = middle
+            else:
+                low = middle
+                self._accept(step)
+        if high > self.max_vus:
+            self.stop_reason = f"SLO holds at {low} VUs, within step_vus of max_vus ({self.max_vus})"
+        else:
+            self.stop_reason = f"SLO holds at {low} VUs and breaks at {high} VUs"
+
+    def _run(self):
+        try:
+            status = get_status(self.port)
+            if self.max_vus > status.get("vus-max", self.max_vus):
+                patch_status(self.port, **{"vus-max": self.max_vus})
+            if status.get("paused"):
+                patch_status(self.port, paused=False)
+            if self.mode == "binary":
+                self._binary_search()
+            else:
+                self._step_search()
+            self.status = "finished"
+        except InterruptedError:
+            self.status = "cancelled"
+        except requests.exceptions.HTTPError as e:
+            self.status = "failed"
+            self.error = (f"{e}. Changing VUs at runtime needs a scenario with the "
+                          "'externally-controlled' executor.")
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            self.status = "failed"
+            self.error = f"Lost contact with the k6 REST API: {e}"
+        finally:
+            self.finished_at = time.time()
+            if self.capacity is not None and self.status in ("finished", "cancelled"):
+                # Leave the test at its sustainable level rather than past the knee.
+                try:
+                    patch_status(self.port, vus=self.capacity.vus)
+                except requests.exceptions.RequestException:
+                    pass
+
+    def report(self) -> dict:
+        report = {
+            "test_id": self.test_id,
+            "status": self.status,
+            "mode": self.mode,
+            "slo": {"p95_ms": self.p95_slo_ms, "max_error_rate": self.max_error_rate},
+            "steps": [step.to_dict() for step in self.steps],
+        }
+        if self.capacity is not None:
+            report["capacity"] = {"vus": self.capacity.vus, "throughput_rps": round(self.capacity.throughput, 2)}
+        if self.stop_reason:
+            report["stop_reason"] = self.stop_reason
+        if self.error:
+            report["error"] = self.error
+        return report
+
+
+_searches = {}
+_searches_lock = threading.Lock()
+
+
+def start_search(test_id: str, port: int, **options) -> CapacitySearch:
+    """Starts a background search for a test, replacing a finished earlier one."""
+    with _searches_lock:
+        existing = _searches.get(test_id)
+        if existing is not None and existing.status == "running":
+            raise RuntimeError(f"A capacity search is already running for test '{test_id}'")
+        search = _searches[test_id] = CapacitySearch(test_id, port, **options)
+    search.start()
+    return search
+
+
+def get_search(test_id: str) -> Optional[CapacitySearch]:
+    with _searches_lock:
+        return _searches.get(test_id)
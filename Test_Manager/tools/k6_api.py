@@ -0,0 +1,60 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts for calls to k6's REST API. k6 serves it on
+# localhost, so anything slower than this means the process is wedged.
+API_TIMEOUT = (float(os.environ.get("K6_API_CONNECT_TIMEOUT", "1")),
+               float(os.environ.get("K6_API_READ_TIMEOUT", "3")))
+POOL_SIZE = 32
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Returns a shared session that keeps connections to every k6 REST API alive."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def api_url(port: int, path: str) -> str:
+    return f"http://127.0.0.1:{port}/v1/{path}"
+
+
+def get_status(port: int) -> dict:
+    """Returns the attributes of /v1/status (paused, running, vus, vus-max, ...)."""
+    response = get_session().get(api_url(port, "status"), timeout=API_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["data"]["attributes"]
+
+
+def patch_status(port: int, **attributes) -> dict:
+    """Updates /v1/status, e.g. patch_status(port, paused=True), and returns the new attributes."""
+    response = get_session().patch(api_url(port, "status"), json={"data": {"attributes": attributes}},
+                                   timeout=API_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["data"]["attributes"]
+
+
+def get_metrics(port: int) -> dict:
+    """Returns /v1/metrics as {metric name: sample}, e.g. {'http_reqs': {'count': 10, 'rate': 2.5}}."""
+    response = get_session().get(api_url(port, "metrics"), timeout=API_TIMEOUT)
+    response.raise_for_status()
+    return {metric["id"]: metric["attributes"].get("sample", {}) for metric in response.json()["data"]}
+
+
+def metric_totals(metrics: dict):
+    """Returns cumulative (requests, failures, summed duration ms, p95 ms) from a get_metrics() snapshot."""
+    count = metrics.get("http_reqs", {}).get("count", 0)
+    failed_rate = metrics.get("http_req_failed", {}).get("rate", 0)
+    duration = metrics.get("http_req_duration", {})
+    return count, failed_rate * count, duration.get("avg", 0) * count, duration.get("p(95)")
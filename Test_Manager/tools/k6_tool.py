@@ -3,19 +3,12 @@ import uuid
 import time
 import requests
 import os
-
-# In-memory dictionary to store running test processes and their state
-# In a real-world scenario, you would use a more robust solution like a database.
-running_tests = {}
-BASE_PORT = 6565
-
-def _find_available_port():
-    """Finds an available port starting from BASE_PORT."""
-    port = BASE_PORT
-    used_ports = {test['port'] for test in running_tests.values()}
-    while port in used_ports:
-        port += 1
-    return port
+from concurrent.futures import ThreadPoolExecutor
+from . import capacity, watchdog
+from .k6_api import POOL_SIZE, patch_status
+from .output_buffer import OutputBuffer, SPILL_DIR
+from .readiness import ReadinessError, wait_for_k6
+from .registry import ACTIVE_STATUSES, get_registry
 
 def start_test(script_path: str) -> str:
     """
@@ -32,7 +25,11 @@ def start_test(script_path: str) -> str:
     if not os.path.exists(script_path):
         return f"Error: Test script not found at '{script_path}'"
 
-    port = _find_available_port()
+    registry = get_registry()
+    try:
+        port = registry.allocate_port()
+    except RuntimeError as e:
+        return f"Error: {e}"
     test_id = f"test_{uuid.uuid4().hex[:8]}"
     api_address = f"127.0.0.1:{port}"
 
@@ -47,47 +44,64 @@ def start_test(script_path: str) -> str:
         # Start the K6 process in the background
         process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
-        # Store the process information
-        running_tests[test_id] = {
-            "process": process,
-            "port": port,
-            "script": script_path,
-            "status": "paused", # Initial state
-            "pid": process.pid
-        }
+        # Keep draining the pipes so k6 never blocks on a full pipe buffer
+        spill_path = os.path.join(SPILL_DIR, f"{test_id}.log") if SPILL_DIR else None
+        output = OutputBuffer(spill_path=spill_path)
+        output.attach(process)
+
+        # Record the test; it starts in the paused state
+        registry.add(test_id, process, port, script_path, output)
 
-        # Give it a moment to start up the API server
-        time.sleep(2)
+        # Wait until the REST API answers, failing fast if k6 exits during startup
+        try:
+            ready_after = wait_for_k6(process, port)
+        except ReadinessError as e:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            registry.finish(test_id, "failed", process.returncode)
+            startup_output = "\n".join(output.tail(20))
+            return f"Error: K6 test failed to start ({e}).\n{startup_output}".rstrip()
 
-        return f"Successfully started K6 test with ID: {test_id}. The test is currently PAUSED. Use 'resume_test' to begin."
+        return (f"Successfully started K6 test with ID: {test_id} (ready in {ready_after * 1000:.0f} ms). "
+                "The test is currently PAUSED. Use 'resume_test' to begin.")
     except FileNotFoundError:
+        registry.release_port(port)
         return "Error: The 'k6' command was not found. Please ensure K6 is installed and in your system's PATH."
     except Exception as e:
+        if registry.get(test_id) is None:
+            registry.release_port(port)
         return f"An unexpected error occurred while starting the test: {e}"
 
-def list_tests() -> dict:
+def list_tests(status: str = None) -> dict:
     """
-    Lists all currently running K6 tests and their statuses.
+    Lists K6 tests, both active and historical, newest first.
+
+    Args:
+        status: Optional status to filter on: paused, running, finished, stopped, aborted, failed or lost.
 
     Returns:
-        A dictionary containing the details of all active tests.
+        A dictionary containing the details of the matching tests.
     """
-    if not running_tests:
-        return {"message": "No tests are currently running."}
+    tests = get_registry().tests(status.lower() if status else None)
+    if not tests:
+        return {"message": "No matching tests found." if status else "No tests have been run yet."}
 
     test_details = {}
-    for test_id, data in running_tests.items():
-        # Check if the process is still running
-        if data["process"].poll() is not None:
-            # Process has terminated, update status
-            data["status"] = "finished"
-
-        test_details[test_id] = {
-            "pid": data["pid"],
-            "script": data["script"],
-            "port": data["port"],
-            "status": data["status"]
+    for test in tests:
+        test_details[test["test_id"]] = {
+            "pid": test["pid"],
+            "script": test["script"],
+            "port": test["port"],
+            "status": test["status"],
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(test["started_at"])),
         }
+        if test["finished_at"] is not None:
+            test_details[test["test_id"]]["finished_at"] = time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(test["finished_at"]))
+            test_details[test["test_id"]]["exit_code"] = test["exit_code"]
+        if test["note"]:
+            test_details[test["test_id"]]["note"] = test["note"]
     return test_details
 
 def stop_test(test_id: str) -> str:
@@ -100,58 +114,65 @@ def stop_test(test_id: str) -> str:
     Returns:
         A confirmation message or an error if the test ID is not found.
     """
-    if test_id not in running_tests:
+    registry = get_registry()
+    test_info = registry.get(test_id)
+    if test_info is None:
         return f"Error: Test with ID '{test_id}' not found."
+    process = test_info["process"]
+    if process is None:
+        return f"Test '{test_id}' is not running (status: {test_info['status']})."
+    search = capacity.get_search(test_id)
+    if search is not None:
+        search.cancel()
 
-    test_info = running_tests[test_id]
     try:
-        test_info["process"].terminate()  # Send SIGTERM
-        test_info["process"].wait(timeout=5)  # Wait for process to terminate
-        del running_tests[test_id]
+        process.terminate()  # Send SIGTERM
+        process.wait(timeout=5)  # Wait for process to terminate
+        registry.finish(test_id, "stopped", process.returncode)
         return f"Successfully stopped test '{test_id}'."
     except subprocess.TimeoutExpired:
-        test_info["process"].kill()  # Force kill if it doesn't terminate
-        del running_tests[test_id]
+        process.kill()  # Force kill if it doesn't terminate
+        process.wait()
+        registry.finish(test_id, "stopped", process.returncode)
         return f"Test '{test_id}' did not respond to termination, forcing it to stop."
     except Exception as e:
         return f"An error occurred while stopping the test: {e}"
 
+def get_test_output(test_id: str, tail: int = 50) -> str:
+    """
+    Returns the most recent console output of a K6 test.
+
+    Args:
+        test_id: The unique ID of the test.
+        tail: The number of trailing lines to return.
+
+    Returns:
+        The last lines of combined stdout/stderr, or an error message.
+    """
+    output = get_registry().output(test_id)
+    if output is None:
+        if get_registry().get(test_id) is None:
+            return f"Error: Test with ID '{test_id}' not found."
+        return f"No output kept for test '{test_id}'; it was started by an earlier agent session or has been pruned."
+    lines = output.tail(tail)
+    if not lines:
+        return f"No output captured yet for test '{test_id}'."
+    return f"Last {len(lines)} of {output.total_lines} lines for test '{test_id}':\n" + "\n".join(lines)
+
 def _update_test_status(test_id: str, paused_state: bool) -> str:
     """Helper function to pause or resume a test via the K6 API."""
-    if test_id not in running_tests:
+    registry = get_registry()
+    test_info = registry.get(test_id)
+    if test_info is None:
         return f"Error: Test with ID '{test_id}' not found."
+    if test_info["process"] is None:
+        return f"Error: Test '{test_id}' is not running (status: {test_info['status']})."
 
-    test_info = running_tests[test_id]
-    port = test_info["port"]
-    url = f"http://127.0.0.1:{port}/v1/status"
     action = "pause" if paused_state else "resume"
     new_status = "paused" if paused_state else "running"
-
-    print(paused_state)
-    # new_state = "true" if paused_state else "false"
-
-    # if new_state:
-    #     running_state = "false"
-    # else:
-    #     running_state = "true"
-
-    # print("new_state", new_state)
-    # print("running_state", running_state)
-
     try:
-        response = requests.patch(url, json={
-    "data": {
-        "attributes": {
-            "paused": paused_state
-        }
-    }
-})
-        # response = requests.get(url)
-        # response1 = requests.patch(url, json={"running": "true"})
-        print(response.json())
-        # print(response1.json())
-        response.raise_for_status() # Raise an exception for bad status codes
-        test_info["status"] = new_status
+        patch_status(test_info["port"], paused=paused_state)
+        registry.set_status(test_id, new_status)
         return f"Successfully sent {action} signal to test '{test_id}'. New status: {new_status}."
     except requests.exceptions.RequestException as e:
         return f"Error communicating with K6 API for test '{test_id}': {e}"
@@ -179,3 +200,217 @@ def resume_test(test_id: str) -> str:
         A confirmation message or an error.
     """
     return _update_test_status(test_id, paused_state=False)
+
+def _select_tests(targets: str) -> list:
+    """Resolves 'all', 'status=<status>', 'script=<path>' or comma-separated test IDs to active tests."""
+    registry = get_registry()
+    registry.refresh()
+    active = [registry.get(test["test_id"])
+              for status in ACTIVE_STATUSES for test in registry.tests(status, limit=None)]
+    active = [test for test in active if test and test["process"] is not None]
+    targets = targets.strip()
+    if targets.lower() == "all":
+        return active
+    key, sep, value = targets.partition("=")
+    if sep and key.strip().lower() in ("status", "script"):
+        field = key.strip().lower()
+        value = value.strip().lower() if field == "status" else value.strip()
+        return [test for test in active if test[field] == value]
+    wanted = {test_id.strip() for test_id in targets.split(",") if test_id.strip()}
+    return [test for test in active if test["test_id"] in wanted]
+
+def _bulk_report(action: str, targets: str, results: dict, elapsed: float) -> str:
+    succeeded = sum(1 for ok, _ in results.values() if ok)
+    lines = [f"{action} {succeeded} of {len(results)} test(s) matching '{targets}' in {elapsed:.2f}s."]
+    lines += [f"- {test_id}: {message}" for test_id, (ok, message) in sorted(results.items())]
+    return "\n".join(lines)
+
+def _update_tests_status(targets: str, paused_state: bool) -> str:
+    """Pauses or resumes many tests at once over the pooled API session."""
+    tests = _select_tests(targets)
+    if not tests:
+        return f"No active tests match '{targets}'."
+    new_status = "paused" if paused_state else "running"
+    registry = get_registry()
+
+    def update(test):
+        try:
+            patch_status(test["port"], paused=paused_state)
+            registry.set_status(test["test_id"], new_status)
+            return test["test_id"], (True, new_status)
+        except requests.exceptions.RequestException as e:
+            return test["test_id"], (False, f"error: {e}")
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=min(POOL_SIZE, len(tests))) as pool:
+        results = dict(pool.map(update, tests))
+    return _bulk_report("Paused" if paused_state else "Resumed", targets, results, time.monotonic() - started)
+
+def pause_tests(targets: str) -> str:
+    """
+    Pauses many K6 tests at once. All requests are sent in parallel, so the call takes
+    about as long as the slowest single request (bounded by the API timeout).
+
+    Args:
+        targets: 'all', 'status=<status>', 'script=<script path>' or comma-separated test IDs.
+
+    Returns:
+        One combined result with a line per test.
+    """
+    return _update_tests_status(targets, paused_state=True)
+
+def resume_tests(targets: str) -> str:
+    """
+    Resumes many K6 tests at once. All requests are sent in parallel, so the tests
+    restart within milliseconds of each other.
+
+    Args:
+        targets: 'all', 'status=<status>', 'script=<script path>' or comma-separated test IDs.
+
+    Returns:
+        One combined result with a line per test.
+    """
+    return _update_tests_status(targets, paused_state=False)
+
+def stop_tests(targets: str, grace_seconds: float = 5) -> str:
+    """
+    Stops many K6 tests at once. Every process gets SIGTERM together, the grace period
+    is shared rather than per test, and survivors are then killed, so the whole call
+    takes at most about grace_seconds.
+
+    Args:
+        targets: 'all', 'status=<status>', 'script=<script path>' or comma-separated test IDs.
+        grace_seconds: How long to wait for a clean shutdown before killing.
+
+    Returns:
+        One combined result with a line per test.
+    """
+    tests = _select_tests(targets)
+    if not tests:
+        return f"No active tests match '{targets}'."
+    registry = get_registry()
+    started = time.monotonic()
+    results = {}
+    terminated = []
+    for test in tests:
+        search = capacity.get_search(test["test_id"])
+        if search is not None:
+            search.cancel()
+        try:
+            test["process"].terminate()
+            terminated.append(test)
+        except Exception as e:
+            results[test["test_id"]] = (False, f"error: {e}")
+
+    deadline = started + grace_seconds
+    for test in terminated:
+        process = test["process"]
+        try:
+            process.wait(timeout=max(deadline - time.monotonic(), 0))
+            results[test["test_id"]] = (True, "stopped")
+        except subprocess.TimeoutExpired:
+            process.kill()
+            results[test["test_id"]] = (True, "killed after the grace period")
+    for test in terminated:
+        test["process"].wait()
+        registry.finish(test["test_id"], "stopped", test["process"].returncode)
+    return _bulk_report("Stopped", targets, results, time.monotonic() - started)
+
+def find_capacity(test_id: str, p95_slo_ms: float = 500, max_error_rate: float = 0.01, start_vus: int = 1,
+                  max_vus: int = 100, step_vus: int = 5, step_seconds: int = 30, settle_seconds: int = 10,
+                  mode: str = "step") -> str:
+    """
+    Starts a background search for the maximum sustainable throughput of a test by
+    changing its VU count live and measuring each level. The script must use the
+    'externally-controlled' executor. Poll the outcome with 'get_capacity_result'.
+
+    Args:
+        test_id: The unique ID of the test (it is resumed if paused).
+        p95_slo_ms: Highest acceptable p95 response time in milliseconds.
+        max_error_rate: Highest acceptable share of failed requests (0.01 = 1%).
+        start_vus: First VU level to measure.
+        max_vus: Highest VU level to try.
+        step_vus: VUs added per step, or the resolution of the binary search.
+        step_seconds: How long each level is measured.
+        settle_seconds: How long to let each level settle before measuring.
+        mode: 'step' to climb until the SLO breaks, 'binary' to bisect between start_vus and max_vus.
+
+    Returns:
+        A confirmation message or an error.
+    """
+    test_info = get_registry().get(test_id)
+    if test_info is None:
+        return f"Error: Test with ID '{test_id}' not found."
+    if test_info["process"] is None:
+        return f"Error: Test '{test_id}' is not running (status: {test_info['status']})."
+    if mode not in ("step", "binary"):
+        return "Error: mode must be 'step' or 'binary'."
+    try:
+        capacity.start_search(test_id, test_info["port"], p95_slo_ms=p95_slo_ms, max_error_rate=max_error_rate,
+                              start_vus=start_vus, max_vus=max_vus, step_vus=step_vus, step_seconds=step_seconds,
+                              settle_seconds=settle_seconds, mode=mode)
+    except RuntimeError as e:
+        return f"Error: {e}"
+    get_registry().set_status(test_id, "running")
+    return (f"Started a {mode} capacity search on test '{test_id}' ({start_vus}-{max_vus} VUs, "
+            f"{settle_seconds + step_seconds}s per level). Use 'get_capacity_result' to follow it.")
+
+def get_capacity_result(test_id: str) -> dict:
+    """
+    Reports the progress or outcome of a capacity search: every measured VU level and,
+    once known, the highest level that stayed within the SLO.
+
+    Args:
+        test_id: The unique ID of the test.
+
+    Returns:
+        A dictionary with the search status, steps and capacity.
+    """
+    search = capacity.get_search(test_id)
+    if search is None:
+        return {"error": f"No capacity search has been run for test '{test_id}'."}
+    return search.report()
+
+def watch_test(test_id: str, max_error_rate: float = None, max_p95_ms: float = None, min_rps: float = None,
+               grace_seconds: int = 60) -> str:
+    """
+    Watches a test's live metrics and stops it automatically when it keeps breaking its SLO.
+    Rules are checked every few seconds once the test has run (unpaused) for the grace
+    period; two consecutive failed checks stop the test and record why in its history.
+
+    Args:
+        test_id: The unique ID of the test.
+        max_error_rate: Highest acceptable share of failed requests (0.05 = 5%).
+        max_p95_ms: Highest acceptable p95 response time in milliseconds.
+        min_rps: Lowest acceptable throughput in requests per second.
+        grace_seconds: Running time before the rules are enforced.
+
+    Returns:
+        A confirmation message or an error.
+    """
+    test_info = get_registry().get(test_id)
+    if test_info is None:
+        return f"Error: Test with ID '{test_id}' not found."
+    if test_info["process"] is None:
+        return f"Error: Test '{test_id}' is not running (status: {test_info['status']})."
+    if max_error_rate is None and max_p95_ms is None and min_rps is None:
+        return "Error: Give at least one rule: max_error_rate, max_p95_ms or min_rps."
+    watchdog.watch(test_id, test_info["port"], lambda: stop_test(test_id), max_error_rate=max_error_rate,
+                   max_p95_ms=max_p95_ms, min_rps=min_rps, grace_seconds=grace_seconds)
+    return f"SLO watchdog armed for test '{test_id}'; rules apply after {grace_seconds}s of running time."
+
+def get_watchdog_status(test_id: str) -> dict:
+    """
+    Reports a test's SLO watchdog: its rules, the latest live metrics and, if it stopped
+    the test, why.
+
+    Args:
+        test_id: The unique ID of the test.
+
+    Returns:
+        A dictionary with the watchdog state.
+    """
+    dog = watchdog.get_watchdog(test_id)
+    if dog is None:
+        return {"error": f"Test '{test_id}' is not being watched."}
+    return dog.to_dict()
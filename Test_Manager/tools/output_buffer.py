@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import deque
+
+# Number of lines kept in memory per test.
+DEFAULT_MAX_LINES = int(os.environ.get("K6_OUTPUT_MAX_LINES", "1000"))
+
+# Directory to spill full output to; spilling is disabled when unset.
+SPILL_DIR = os.environ.get("K6_OUTPUT_SPILL_DIR")
+SPILL_MAX_BYTES = int(os.environ.get("K6_OUTPUT_SPILL_MAX_BYTES", str(10 * 1024 * 1024)))
+SPILL_BACKUP_COUNT = int(os.environ.get("K6_OUTPUT_SPILL_BACKUPS", "3"))
+
+
+class RotatingSpillFile:
+    """Append-only log file that rotates to .1, .2, ... once it grows past max_bytes."""
+
+    def __init__(self, path: str, max_bytes: int = SPILL_MAX_BYTES, backup_count: int = SPILL_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, line: str):
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+        self._file.write(line + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class OutputBuffer:
+    """
+    Drains a process's stdout and stderr on background threads.
+
+    Only the last max_lines lines are kept in memory. When a spill path is
+    given, every line is also appended to a rotating file on disk.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, spill_path: str = None):
+        self._lines = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self._spill = RotatingSpillFile(spill_path) if spill_path else None
+        self._threads = []
+        self.total_lines = 0
+
+    def attach(self, process):
+        """Starts one reader thread per captured stream of the given Popen object."""
+        for name, stream in (("stdout", process.stdout), ("stderr", process.stderr)):
+            if stream is None:
+                continue
+            thread = threading.Thread(target=self._drain, args=(name, stream), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _drain(self, name: str, stream):
+        try:
+            for raw in iter(stream.readline, b""):
+                line = f"[{name}] {raw.decode('utf-8', errors='replace').rstrip()}"
+                with self._lock:
+                    self._lines.append(line)
+                    self.total_lines += 1
+                    if self._spill:
+                        self._spill.write(line)
+        finally:
+            stream.close()
+
+    def tail(self, n: int) -> list:
+        """Returns up to the last n buffered lines."""
+        with self._lock:
+            if n <= 0:
+                return []
+            return list(self._lines)[-n:]
+
+    def close(self, timeout: float = 1.0):
+        """Waits briefly for the readers to hit EOF and closes the spill file."""
+        for thread in self._threads:
+            thread.join(timeout)
+        with self._lock:
+            if self._spill:
+                self._spill.close()
+                self._spill = None
@@ -0,0 +1,57 @@
+import os
+import time
+from typing import Callable, Optional
+
+import requests
+
+# Seconds to wait for a freshly started k6 process to answer on its REST API.
+K6_READY_TIMEOUT = float(os.environ.get("K6_READY_TIMEOUT", "30"))
+
+
+class ReadinessError(Exception):
+    """Raised when a process exits or times out before becoming ready."""
+
+
+def wait_until(probe: Callable[[], bool], timeout: float, process=None, initial_delay: float = 0.05,
+               max_delay: float = 1.0, factor: float = 2.0) -> float:
+    """
+    Polls a probe with exponential backoff until it succeeds.
+
+    Args:
+        probe: Callable returning True once the target is ready.
+        timeout: Seconds to wait before giving up.
+        process: Optional Popen whose exit aborts the wait immediately.
+
+    Returns:
+        The seconds it took to become ready.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    delay = initial_delay
+    while True:
+        if process is not None and process.poll() is not None:
+            raise ReadinessError(f"process exited with code {process.returncode} before becoming ready")
+        if probe():
+            return time.monotonic() - started
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ReadinessError(f"not ready after {timeout:g} seconds")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * factor, max_delay)
+
+
+def http_probe(url: str, request_timeout: float = 0.5, session: Optional[requests.Session] = None) -> Callable[[], bool]:
+    """Builds a probe that succeeds once the URL answers with a non-error status."""
+    getter = session or requests
+
+    def probe() -> bool:
+        try:
+            return getter.get(url, timeout=request_timeout).status_code < 400
+        except requests.exceptions.RequestException:
+            return False
+    return probe
+
+
+def wait_for_k6(process, port: int, timeout: float = K6_READY_TIMEOUT) -> float:
+    """Waits until a k6 process serves /v1/status on its REST API port."""
+    return wait_until(http_probe(f"http://127.0.0.1:{port}/v1/status"), timeout, process=process)
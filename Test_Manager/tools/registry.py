@@ -0,0 +1,251 @@
+import heapq
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# SQLite file holding active and historical tests; it survives agent restarts.
+REGISTRY_PATH = os.environ.get("K6_REGISTRY_DB", "k6_registry.db")
+
+# Ports handed to k6's REST API (--address).
+BASE_PORT = int(os.environ.get("K6_BASE_PORT", "6565"))
+PORT_RANGE = int(os.environ.get("K6_PORT_RANGE", "200"))
+
+ACTIVE_STATUSES = ("paused", "running")
+
+# Output buffers of finished tests kept for get_test_output.
+MAX_FINISHED_OUTPUTS = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tests (
+    test_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    port INTEGER NOT NULL,
+    script TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    exit_code INTEGER,
+    note TEXT
+);
+CREATE INDEX IF NOT EXISTS tests_status ON tests (status);
+CREATE INDEX IF NOT EXISTS tests_started_at ON tests (started_at);
+"""
+
+
+def port_is_free(port: int) -> bool:
+    """Checks with a real bind that nothing on this host holds the port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind(("127.0.0.1", port))
+            return True
+        except OSError:
+            return False
+
+
+def _pid_is_k6(pid: int) -> bool:
+    """Checks that a PID is alive and, where /proc is available, still a k6 process."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"k6" in f.read().split(b"\0")[0]
+    except OSError:
+        return True
+
+
+class ReattachedProcess:
+    """Minimal Popen stand-in for a k6 process started by a previous agent instance."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None and not _pid_is_k6(self.pid):
+            # Not our child, so the real exit code is unknown.
+            self.returncode = -1
+        return self.returncode
+
+    def terminate(self):
+        self._signal(signal.SIGTERM)
+
+    def kill(self):
+        self._signal(getattr(signal, "SIGKILL", signal.SIGTERM))
+
+    def _signal(self, signum):
+        try:
+            os.kill(self.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def wait(self, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(f"pid {self.pid}", timeout)
+            time.sleep(0.05)
+        return self.returncode
+
+
+class TestRegistry:
+    """
+    Registry of k6 tests backed by SQLite in WAL mode.
+
+    Rows outlive the process, so finished tests remain listable as history
+    and live k6 processes are re-attached by PID after an agent restart.
+    Process handles and output buffers only exist in memory. A single lock
+    serialises concurrent tool calls. Ports come from a free-list and are
+    checked with a real bind before being handed out.
+    """
+
+    def __init__(self, path: str = REGISTRY_PATH, base_port: int = BASE_PORT, port_range: int = PORT_RANGE):
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(tests)")}
+        if "note" not in columns:
+            self._db.execute("ALTER TABLE tests ADD COLUMN note TEXT")
+        self._processes = {}
+        self._outputs = OrderedDict()
+        self._free_ports = list(range(base_port, base_port + port_range))
+        self._reattach()
+
+    def _reattach(self):
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT test_id, pid, port FROM tests WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                ACTIVE_STATUSES).fetchall()
+            held = set()
+            for row in rows:
+                if _pid_is_k6(row["pid"]):
+                    self._processes[row["test_id"]] = ReattachedProcess(row["pid"])
+                    held.add(row["port"])
+                else:
+                    self._db.execute("UPDATE tests SET status = 'lost', finished_at = ? WHERE test_id = ?",
+                                     (time.time(), row["test_id"]))
+            self._free_ports = [port for port in self._free_ports if port not in held]
+            heapq.heapify(self._free_ports)
+
+    def allocate_port(self) -> int:
+        """Takes the lowest free port that the OS confirms is bindable."""
+        with self._lock:
+            busy = []
+            try:
+                while self._free_ports:
+                    port = heapq.heappop(self._free_ports)
+                    if port_is_free(port):
+                        return port
+                    busy.append(port)
+            finally:
+                # Ports held by other programs go back for a later retry.
+                for port in busy:
+                    heapq.heappush(self._free_ports, port)
+            raise RuntimeError("No free port left for the k6 REST API")
+
+    def release_port(self, port: int):
+        with self._lock:
+            if port not in self._free_ports:
+                heapq.heappush(self._free_ports, port)
+
+    def add(self, test_id: str, process, port: int, script: str, output, status: str = "paused"):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO tests (test_id, pid, port, script, status, started_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (test_id, process.pid, port, script, status, time.time()))
+            self._processes[test_id] = process
+            self._outputs[test_id] = output
+
+    def get(self, test_id: str) -> Optional[dict]:
+        """Returns a test's row, with its process handle when it is still active."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM tests WHERE test_id = ?", (test_id,)).fetchone()
+            if row is None:
+                return None
+            test = dict(row)
+            test["process"] = self._processes.get(test_id)
+            return test
+
+    def output(self, test_id: str):
+        with self._lock:
+            return self._outputs.get(test_id)
+
+    def set_status(self, test_id: str, status: str):
+        with self._lock:
+            self._db.execute("UPDATE tests SET status = ? WHERE test_id = ?", (status, test_id))
+
+    def annotate(self, test_id: str, note: str, status: Optional[str] = None):
+        """Records why a test ended the way it did, optionally overriding its status."""
+        with self._lock:
+            if status:
+                self._db.execute("UPDATE tests SET note = ?, status = ? WHERE test_id = ?", (note, status, test_id))
+            else:
+                self._db.execute("UPDATE tests SET note = ? WHERE test_id = ?", (note, test_id))
+
+    def finish(self, test_id: str, status: str, exit_code: Optional[int] = None):
+        """Moves a test to history and returns its port to the free-list."""
+        with self._lock:
+            row = self._db.execute("SELECT port, finished_at FROM tests WHERE test_id = ?", (test_id,)).fetchone()
+            if row is None:
+                return
+            if row["finished_at"] is None:
+                self._db.execute("UPDATE tests SET status = ?, finished_at = ?, exit_code = ? WHERE test_id = ?",
+                                 (status, time.time(), exit_code, test_id))
+            if self._processes.pop(test_id, None) is not None or row["finished_at"] is None:
+                self.release_port(row["port"])
+            output = self._outputs.get(test_id)
+            if output is not None:
+                output.close()
+                self._outputs.move_to_end(test_id)
+            while len(self._outputs) > len(self._processes) + MAX_FINISHED_OUTPUTS:
+                oldest = next(test for test in self._outputs if test not in self._processes)
+                del self._outputs[oldest]
+
+    def refresh(self):
+        """Moves tests whose k6 process has exited on its own into history."""
+        with self._lock:
+            for test_id, process in list(self._processes.items()):
+                exit_code = process.poll()
+                if exit_code is not None:
+                    self.finish(test_id, "finished", exit_code)
+
+    def tests(self, status: Optional[str] = None, limit: Optional[int] = 100) -> list:
+        """Returns tests newest first, optionally only those in one status; limit=None returns them all."""
+        self.refresh()
+        with self._lock:
+            query = "SELECT * FROM tests"
+            params = []
+            if status:
+                query += " WHERE status = ?"
+                params.append(status)
+            query += " ORDER BY started_at DESC"
+            if limit is not None:
+                query += " LIMIT ?"
+                params.append(limit)
+            return [dict(row) for row in self._db.execute(query, params)]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> TestRegistry:
+    """Returns the shared registry, opening it (and re-attaching live tests) on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TestRegistry()
+    return _registry
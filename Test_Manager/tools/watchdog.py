@@ -0,0 +1,88 @@
+import time
+from typing import Callable, Optional
+
+import requests
+from slo_watchdog import DEFAULT_GRACE_SECONDS, DEFAULT_INTERVAL, SloRules, SloWatchdog, WatchdogRegistry
+
+from .k6_api import get_metrics, metric_totals
+from .registry import get_registry
+
+
+class K6Watchdog(SloWatchdog):
+    """
+    Stops a k6 test whose live metrics keep breaking its SLO rules.
+
+    Every interval the watchdog reads /v1/metrics and works out the error
+    rate and throughput of that interval from the change in k6's cumulative
+    counters. k6 exposes no windowed percentiles, so p95 is the cumulative
+    figure since the test started. Rules are enforced once the test has
+    been running for the grace period; paused time does not count. After
+    BREACHES_TO_ABORT consecutive breaching intervals the test is stopped
+    and the reason is stored with it in the registry.
+    """
+
+    def __init__(self, test_id: str, port: int, stop: Callable[[], str], max_error_rate: Optional[float] = None,
+                 max_p95_ms: Optional[float] = None, min_rps: Optional[float] = None,
+                 grace_seconds: float = DEFAULT_GRACE_SECONDS, interval: float = DEFAULT_INTERVAL):
+        super().__init__(test_id, SloRules(max_error_rate, max_p95_ms, min_rps), grace_seconds, interval)
+        self.test_id = test_id
+        self.port = port
+        self.stop = stop
+        self.running_seconds = 0.0
+
+    def _run(self):
+        registry = get_registry()
+        previous = None
+        while not self._cancelled.wait(self.interval):
+            test = registry.get(self.test_id)
+            if test is None or test["process"] is None:
+                self.status = "completed"
+                return
+            if test["status"] != "running":
+                # Paused: no traffic, so nothing to judge; restart the interval baseline.
+                previous = None
+                continue
+            try:
+                totals = metric_totals(get_metrics(self.port))
+            except (requests.exceptions.RequestException, KeyError, ValueError):
+                continue
+            now = time.monotonic()
+            if previous is not None:
+                self.running_seconds += now - previous[0]
+            if previous is None or self.running_seconds < self.grace_seconds:
+                self.status = "grace"
+                previous = (now, totals)
+                continue
+
+            self.status = "watching"
+            elapsed = now - previous[0]
+            requests_count = totals[0] - previous[1][0]
+            failures = max(totals[1] - previous[1][1], 0)
+            previous = (now, totals)
+            reason = self.evaluate({
+                "rps": round(requests_count / elapsed, 2) if elapsed else 0.0,
+                "error_rate": round(failures / requests_count, 4) if requests_count else 0.0,
+                "p95_ms": totals[3],
+            })
+            if reason:
+                self.reason = reason
+                self.stop()
+                registry.annotate(self.test_id, f"Aborted by SLO watchdog: {self.reason}", status="aborted")
+                self.status = "aborted"
+                return
+        self.status = "cancelled"
+
+    def to_dict(self) -> dict:
+        return {"test_id": self.test_id, **super().to_dict(), "running_seconds": round(self.running_seconds, 1)}
+
+
+_watchdogs = WatchdogRegistry()
+
+
+def watch(test_id: str, port: int, stop: Callable[[], str], **options) -> K6Watchdog:
+    """Starts a watchdog for a test, replacing (and cancelling) any earlier one."""
+    return _watchdogs.watch(K6Watchdog(test_id, port, stop, **options))
+
+
+def get_watchdog(test_id: str) -> Optional[K6Watchdog]:
+    return _watchdogs.get(test_id)
@@ -1,128 +1,453 @@
+import argparse
+import collections
+import hashlib
+import logging
+import logging.handlers
+import os
 import sys
+import threading
 import time
 import subprocess
 import signal
+import socket
+import urllib.error
+import urllib.request
+from fnmatch import fnmatch
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+# Port adk web serves on, and how long to wait for it to come up or be released.
+ADK_WEB_PORT = 8000
+READY_TIMEOUT = 60
+RELEASE_TIMEOUT = 10
+
+# Files that can change what adk web serves, and files that never should: bytecode,
+# editor swap/backup files, VCS data and the results, reports and staging that tests write.
+DEFAULT_INCLUDE = ["*.py", "*.yaml", "*.yml", "*.json", "*.toml", ".env"]
+DEFAULT_EXCLUDE = ["__pycache__", "*.pyc", ".git", ".venv", "venv", "node_modules", "*.swp", "*.swo", "*.swx",
+                   "*~", ".#*", "4913", "*.tmp", "*.jtl", "*.log", "results", ".staging"]
+
+# Seconds without relevant events before a burst of changes triggers a restart.
+QUIET_PERIOD = 1.0
+
+# Blue/green reloads: how long the old instance may keep serving open connections,
+# and how long a connection to it must sit idle after a response before the proxy closes it.
+DRAIN_TIMEOUT = 30
+DRAIN_IDLE = 5
+
+# adk web output goes to a rotating log instead of an unread pipe.
+LOG_FILE = "adk_web.log"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+
+def wait_until(probe, timeout, process=None, initial_delay=0.05, max_delay=1.0):
+    """Polls probe() with exponential backoff; returns the seconds taken or raises TimeoutError/RuntimeError"""
+    started = time.monotonic()
+    delay = initial_delay
+    while True:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"process exited with code {process.returncode}")
+        if probe():
+            return time.monotonic() - started
+        remaining = started + timeout - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"gave up after {timeout} seconds")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+def http_responds(port):
+    """True once something answers HTTP on the local port (any status code counts)"""
+    try:
+        urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=0.5).close()
+        return True
+    except urllib.error.HTTPError:
+        return True
+    except (urllib.error.URLError, OSError):
+        return False
+
+def port_free(port):
+    """True when nothing is listening on the local port any more"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.5)
+        return sock.connect_ex(("127.0.0.1", port)) != 0
+
+def file_hash(path):
+    """SHA-256 of a file's content, or None when it no longer exists"""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+def output_logger(log_file, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+    """Logger writing adk web output to a size-rotated file"""
+    logger = logging.getLogger("adk_web")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups,
+                                                   encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(handler)
+    return logger
+
+def drain_output(process, logger, port, tail):
+    """Copies a child's output to the log until it exits, so the pipe never fills up and blocks it"""
+    def pump():
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            tail.append(line)
+            logger.info("[port %s] %s", port, line)
+        process.stdout.close()
+    thread = threading.Thread(target=pump, name=f"adk-web-output-{port}", daemon=True)
+    thread.start()
+    return thread
+
+class TcpProxy:
+    """
+    Minimal local TCP proxy in front of adk web.
+
+    New connections go to the current backend port; switching the backend
+    leaves established connections on the old one until they close, so
+    in-flight requests and streams finish there.
+    """
+
+    def __init__(self, listen_port, backend_port=None):
+        self.listen_port = listen_port
+        self.backend_port = backend_port
+        self.connections = {}
+        self.lock = threading.Lock()
+        self.server = None
+
+    def start(self):
+        self.server = socket.create_server(("127.0.0.1", self.listen_port))
+        threading.Thread(target=self.accept_loop, name="adk-web-proxy", daemon=True).start()
+
+    def switch(self, backend_port):
+        self.backend_port = backend_port
+
+    def accept_loop(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            backend_port = self.backend_port
+            try:
+                upstream = socket.create_connection(("127.0.0.1", backend_port), timeout=5)
+                upstream.settimeout(None)
+            except OSError:
+                client.close()
+                continue
+            connection = {"sockets": (client, upstream), "last_active": time.monotonic(), "awaiting_response": False,
+                          "open": 2}
+            with self.lock:
+                self.connections.setdefault(backend_port, []).append(connection)
+            for source, target in ((client, upstream), (upstream, client)):
+                threading.Thread(target=self.pump, args=(backend_port, connection, source, target),
+                                 daemon=True).start()
+
+    def pump(self, backend_port, connection, source, target):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                connection["last_active"] = time.monotonic()
+                connection["awaiting_response"] = source is connection["sockets"][0]
+                target.sendall(data)
+            target.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        with self.lock:
+            connection["open"] -= 1
+            if connection["open"]:
+                return
+            self.connections[backend_port].remove(connection)
+        for sock in connection["sockets"]:
+            sock.close()
+
+    def close_idle(self, backend_port, idle_seconds):
+        """
+        Closes connections to a backend that have been quiet for idle_seconds since the backend
+        last sent data (so no request is waiting on it); returns how many are still open
+        """
+        now = time.monotonic()
+        with self.lock:
+            connections = list(self.connections.get(backend_port, []))
+        for connection in connections:
+            if not connection["awaiting_response"] and now - connection["last_active"] >= idle_seconds:
+                for sock in connection["sockets"]:
+                    try:
+                        sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+        with self.lock:
+            return len(self.connections.get(backend_port, []))
+
+    def close(self):
+        if self.server:
+            self.server.close()
+
 class AdkRestartHandler(FileSystemEventHandler):
-    """Handler for file system events that restarts adk web"""
-    
-    def __init__(self, restart_callback):
+    """
+    Handler for file system events that restarts adk web.
+
+    Events are filtered by include/exclude glob patterns and coalesced on the
+    trailing edge: a restart happens once no relevant event has arrived for
+    quiet_period seconds, so a burst of saves causes exactly one restart that
+    includes the last one. Files whose content hash is unchanged (touched,
+    or rewritten with the same content) do not count as changes.
+    """
+
+    def __init__(self, restart_callback, watch_path, include=None, exclude=None, quiet_period=QUIET_PERIOD):
         self.restart_callback = restart_callback
-        self.last_restart = 0
-        self.debounce_seconds = 2  # Wait 2 seconds before restarting to avoid multiple rapid restarts
-        
-    def on_modified(self, event):
-        # Only respond to file modification events (actual writes)
-        if event.is_directory:
-            return
-            
-        # Debounce: don't restart if we just restarted recently
-        current_time = time.time()
-        if current_time - self.last_restart < self.debounce_seconds:
-            return
-            
-        print(f"\n[CHANGE DETECTED] File modified: {event.src_path}")
-        self.last_restart = current_time
-        self.restart_callback()
-    
-    def on_created(self, event):
-        # Respond to new file creation
+        self.watch_path = Path(watch_path).resolve()
+        self.include = list(include or DEFAULT_INCLUDE)
+        self.exclude = list(DEFAULT_EXCLUDE) + list(exclude or [])
+        self.quiet_period = quiet_period
+        self.hashes = {}
+        self.pending = set()
+        self.timer = None
+        self.lock = threading.Lock()
+        self.restart_lock = threading.Lock()
+        for root, dirs, files in os.walk(self.watch_path):
+            # Don't descend into excluded directories at all
+            dirs[:] = [d for d in dirs if not any(fnmatch(d, pattern) for pattern in self.exclude)]
+            for name in files:
+                path = os.path.join(root, name)
+                if self.is_relevant(path):
+                    self.hashes[path] = file_hash(Path(path))
+
+    def is_relevant(self, src_path):
+        """True for files matching an include pattern and no exclude pattern"""
+        try:
+            relative = Path(src_path).resolve().relative_to(self.watch_path)
+        except ValueError:
+            return False
+        rel_path = relative.as_posix()
+        if any(fnmatch(part, pattern) for part in relative.parts for pattern in self.exclude):
+            return False
+        if any(fnmatch(rel_path, pattern) for pattern in self.exclude):
+            return False
+        return any(fnmatch(relative.name, pattern) or fnmatch(rel_path, pattern) for pattern in self.include)
+
+    def on_any_event(self, event):
         if event.is_directory:
             return
-            
-        current_time = time.time()
-        if current_time - self.last_restart < self.debounce_seconds:
-            return
-            
-        print(f"\n[CHANGE DETECTED] File created: {event.src_path}")
-        self.last_restart = current_time
-        self.restart_callback()
-    
-    def on_deleted(self, event):
-        # Respond to file deletion
-        if event.is_directory:
+        paths = [event.src_path, getattr(event, "dest_path", None)]
+        relevant = [os.path.abspath(path) for path in paths if path and self.is_relevant(path)]
+        if not relevant:
             return
-            
-        current_time = time.time()
-        if current_time - self.last_restart < self.debounce_seconds:
+        with self.lock:
+            self.pending.update(relevant)
+            # Trailing edge: every relevant event pushes the restart back.
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.quiet_period, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Runs once things are quiet: restarts if any pending file's content really changed"""
+        with self.lock:
+            pending, self.pending = self.pending, set()
+            self.timer = None
+        changed = []
+        for path in sorted(pending):
+            digest = file_hash(Path(path))
+            if digest != self.hashes.get(path):
+                changed.append(path)
+            if digest is None:
+                self.hashes.pop(path, None)
+            else:
+                self.hashes[path] = digest
+        if not changed:
             return
-            
-        print(f"\n[CHANGE DETECTED] File deleted: {event.src_path}")
-        self.last_restart = current_time
-        self.restart_callback()
+        print(f"\n[CHANGE DETECTED] {len(changed)} file(s) changed: "
+              + ", ".join(str(Path(path).relative_to(self.watch_path)) for path in changed[:5])
+              + (" ..." if len(changed) > 5 else ""))
+        with self.restart_lock:
+            self.restart_callback()
+
+    def cancel(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
 
 class AdkWebWatcher:
-    """Watches a directory and manages adk web process"""
+    """
+    Watches a directory and manages adk web process.
+
+    In blue/green mode adk web runs behind a local proxy on the public port.
+    A reload starts the new instance on the alternate backend port, switches
+    the proxy once it answers, then drains and stops the old instance; if
+    the new instance fails to start, the old one keeps serving.
+    """
     
-    def __init__(self, watch_path):
+    def __init__(self, watch_path, port=ADK_WEB_PORT, include=None, exclude=None, quiet_period=QUIET_PERIOD,
+                 blue_green=False, drain_timeout=DRAIN_TIMEOUT, log_file=LOG_FILE):
         self.watch_path = Path(watch_path).resolve()
+        self.port = port
+        self.include = include
+        self.exclude = exclude
+        self.quiet_period = quiet_period
+        self.blue_green = blue_green
+        self.drain_timeout = drain_timeout
+        self.log_file = log_file
+        self.logger = output_logger(log_file)
         self.process = None
+        self.backend_port = port
+        self.draining = {}
+        self.proxy = TcpProxy(port) if blue_green else None
         self.observer = None
+        self.event_handler = None
         
         if not self.watch_path.exists():
             raise ValueError(f"Path does not exist: {self.watch_path}")
         if not self.watch_path.is_dir():
             raise ValueError(f"Path is not a directory: {self.watch_path}")
     
-    def start_adk_web(self):
-        """Start the adk web process"""
-        if self.process:
-            self.stop_adk_web()
-        
+    def launch(self, port):
+        """Start adk web on a port and wait until it answers; returns the process or None if it failed"""
         print(f"\n{'='*60}")
-        print("[STARTING] adk web...")
+        print(f"[STARTING] adk web on port {port}...")
         print(f"{'='*60}")
         
         try:
-            self.process = subprocess.Popen(
-                ["adk", "web"],
+            process = subprocess.Popen(
+                ["adk", "web", "--port", str(port)],
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
                 bufsize=1
             )
-            print(f"[SUCCESS] adk web started (PID: {self.process.pid})")
         except FileNotFoundError:
             print("[ERROR] 'adk' command not found. Make sure it's installed and in PATH.")
             sys.exit(1)
         except Exception as e:
             print(f"[ERROR] Failed to start adk web: {e}")
             sys.exit(1)
+
+        tail = collections.deque(maxlen=20)
+        output = drain_output(process, self.logger, port, tail)
+        try:
+            ready_after = wait_until(lambda: http_responds(port), READY_TIMEOUT, process=process)
+            print(f"[SUCCESS] adk web ready on port {port} in {ready_after:.2f}s (PID: {process.pid})")
+        except RuntimeError as e:
+            output.join(timeout=1)
+            print(f"[ERROR] adk web failed to start: {e} (output in {self.log_file})")
+            if tail:
+                print("\n".join(tail))
+            return None
+        except TimeoutError:
+            if self.blue_green:
+                # Never switch the proxy to an instance that is not answering
+                print(f"[ERROR] adk web (PID: {process.pid}) is not answering on port {port} "
+                      f"after {READY_TIMEOUT}s (output in {self.log_file})")
+                self.terminate(process)
+                return None
+            print(f"[WARNING] adk web (PID: {process.pid}) is not answering on port {port} "
+                  f"after {READY_TIMEOUT}s")
+        return process
     
-    def stop_adk_web(self):
-        """Stop the adk web process"""
+    def start_adk_web(self):
+        """Start the adk web process"""
         if self.process:
-            print(f"\n[STOPPING] adk web (PID: {self.process.pid})...")
-            
+            self.stop_adk_web()
+        if not self.blue_green:
+            self.process = self.launch(self.port)
+            return
+        if self.proxy.server is None:
+            self.proxy.start()
+            print(f"[INFO] Proxying port {self.port} to adk web (blue/green reloads)")
+        self.backend_port = self.port + 1
+        self.process = self.launch(self.backend_port)
+        if self.process:
+            self.proxy.switch(self.backend_port)
+    
+    def terminate(self, process):
+        """Stop one adk web process"""
+        print(f"\n[STOPPING] adk web (PID: {process.pid})...")
+        
+        try:
+            process.terminate()
             try:
-                self.process.terminate()
-                try:
-                    self.process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    print("[WARNING] Process didn't terminate, forcing kill...")
-                    self.process.kill()
-                    self.process.wait()
-                
-                print("[SUCCESS] adk web stopped")
-            except Exception as e:
-                print(f"[ERROR] Failed to stop process: {e}")
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                print("[WARNING] Process didn't terminate, forcing kill...")
+                process.kill()
+                process.wait()
             
+            print("[SUCCESS] adk web stopped")
+        except Exception as e:
+            print(f"[ERROR] Failed to stop process: {e}")
+    
+    def stop_adk_web(self):
+        """Stop the adk web process, and any instance still draining"""
+        for port, process in list(self.draining.items()):
+            self.draining.pop(port, None)
+            self.terminate(process)
+        if self.process:
+            self.terminate(self.process)
             self.process = None
     
     def restart_adk_web(self):
         """Restart the adk web process"""
+        if self.blue_green:
+            self.swap_adk_web()
+            return
         self.stop_adk_web()
-        time.sleep(1)  # Brief pause between stop and start
+        # Start as soon as the old server has released its port
+        try:
+            wait_until(lambda: port_free(self.port), RELEASE_TIMEOUT)
+        except TimeoutError:
+            print(f"[WARNING] Port {self.port} is still in use, starting anyway")
         self.start_adk_web()
     
+    def swap_adk_web(self):
+        """Blue/green reload: bring up the new instance, switch the proxy, then drain the old one"""
+        old_process, old_port = self.process, self.backend_port
+        new_port = self.port + 2 if old_port == self.port + 1 else self.port + 1
+        # A previous old instance may still be draining on the port we need
+        previous = self.draining.pop(new_port, None)
+        if previous:
+            self.terminate(previous)
+        try:
+            wait_until(lambda: port_free(new_port), RELEASE_TIMEOUT)
+        except TimeoutError:
+            print(f"[WARNING] Port {new_port} is still in use, starting anyway")
+        
+        process = self.launch(new_port)
+        if process is None:
+            if old_process:
+                print(f"[INFO] Keeping the running adk web on port {old_port}")
+            return
+        self.proxy.switch(new_port)
+        self.process, self.backend_port = process, new_port
+        print(f"[SWITCHED] Port {self.port} now serves adk web on port {new_port}")
+        if old_process:
+            self.draining[old_port] = old_process
+            threading.Thread(target=self.drain, args=(old_process, old_port), daemon=True).start()
+    
+    def drain(self, process, port):
+        """Let connections to an old instance finish (closing idle keep-alives), then stop it"""
+        try:
+            drained_after = wait_until(lambda: self.proxy.close_idle(port, DRAIN_IDLE) == 0, self.drain_timeout)
+            print(f"[DRAINED] adk web on port {port} after {drained_after:.1f}s")
+        except TimeoutError:
+            print(f"[WARNING] Connections to port {port} still open after {self.drain_timeout}s, stopping anyway")
+        if self.draining.get(port) is process:
+            self.draining.pop(port)
+            self.terminate(process)
+    
     def start_watching(self):
         """Start watching the directory for changes"""
         print(f"\n{'='*60}")
         print(f"[WATCHING] {self.watch_path}")
-        print(f"[INFO] Monitoring all files in root and subdirectories")
+        print(f"[INFO] Including: {', '.join(self.include or DEFAULT_INCLUDE)}")
+        print(f"[INFO] Excluding: {', '.join(DEFAULT_EXCLUDE + (self.exclude or []))}")
+        print(f"[INFO] Restarting {self.quiet_period}s after the last change")
         print(f"[INFO] Press Ctrl+C to stop")
         print(f"{'='*60}")
         
@@ -130,9 +455,10 @@ class AdkWebWatcher:
         self.start_adk_web()
         
         # Set up file system observer
-        event_handler = AdkRestartHandler(self.restart_adk_web)
+        self.event_handler = AdkRestartHandler(self.restart_adk_web, self.watch_path, self.include, self.exclude,
+                                               self.quiet_period)
         self.observer = Observer()
-        self.observer.schedule(event_handler, str(self.watch_path), recursive=True)
+        self.observer.schedule(self.event_handler, str(self.watch_path), recursive=True)
         self.observer.start()
         
         try:
@@ -144,11 +470,15 @@ class AdkWebWatcher:
     
     def cleanup(self):
         """Clean up resources"""
+        if self.event_handler:
+            self.event_handler.cancel()
         if self.observer:
             self.observer.stop()
             self.observer.join()
         
         self.stop_adk_web()
+        if self.proxy:
+            self.proxy.close()
         print("[EXIT] File watcher stopped")
 
 def main():
@@ -156,13 +486,28 @@ def main():
     print("ADK Web File Watcher")
     print("="*60)
     
-    if len(sys.argv) > 1:
-        watch_path = sys.argv[1]
-    else:
-        watch_path = input("Enter the path to watch: ").strip()
+    parser = argparse.ArgumentParser(description="Restart adk web when watched files change")
+    parser.add_argument("path", nargs="?", help="Directory to watch")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help=f"Only watch matching files (repeatable; default: {' '.join(DEFAULT_INCLUDE)})")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+                        help="Also ignore matching files or directories (repeatable)")
+    parser.add_argument("--quiet-period", type=float, default=QUIET_PERIOD, metavar="SECONDS",
+                        help="Restart once no change has been seen for this long")
+    parser.add_argument("--port", type=int, default=ADK_WEB_PORT, help="Port for adk web")
+    parser.add_argument("--blue-green", action="store_true",
+                        help="Reload without downtime: serve through a local proxy on --port and swap between "
+                             "instances on the next two ports")
+    parser.add_argument("--drain-timeout", type=float, default=DRAIN_TIMEOUT, metavar="SECONDS",
+                        help="How long an old instance may finish open connections after a blue/green swap")
+    parser.add_argument("--log-file", default=LOG_FILE, help="Rotating log file for adk web output")
+    args = parser.parse_args()
+    
+    watch_path = args.path or input("Enter the path to watch: ").strip()
     
     try:
-        watcher = AdkWebWatcher(watch_path)
+        watcher = AdkWebWatcher(watch_path, args.port, args.include, args.exclude, args.quiet_period,
+                                args.blue_green, args.drain_timeout, args.log_file)
         watcher.start_watching()
     except ValueError as e:
         print(f"[ERROR] {e}")
@@ -5,8 +5,10 @@ root_agent = Agent(
         model='gemini-2.5-flash',
         name='root_agent',
         description='A File management assistant',
-        instruction='You are a file management assistant. When a user provides a directory keyword, use the list_files_tool to retrieve the files. Present the list exactly as the tool returns it. After listing, wait for the user to provide a serial number. Do not perform any other actions until a number is selected.',
+        instruction='You are a file management assistant. When a user provides a directory keyword, use the list_files_tool to retrieve the files. Present the list exactly as the tool returns it. When the user is looking for particular files (by part of the name, a pattern like *.log or a time such as yesterday), including in subdirectories or without naming a directory, use search_files instead of paging through listings. To add a new directory keyword, use register_directory. If the user asks for more (older) files, call list_files_tool again with the cursor given at the end of the previous list. After listing, wait for the user to provide a serial number. Do not perform any other actions until a number is selected.',
         tools=[
-            file_lister.list_files_tool
+            file_lister.list_files_tool,
+            file_lister.search_files,
+            file_lister.register_directory
             ]
         )
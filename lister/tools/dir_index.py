@@ -0,0 +1,180 @@
+import base64
+import heapq
+import json
+import os
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional; fall back to directory mtime checks
+    FileSystemEventHandler = object
+    Observer = None
+
+# Without watchdog, an index is trusted for this long before files are re-stat'ed.
+# Creations, deletions and renames are still noticed at once through the directory's mtime.
+FALLBACK_TTL_SECONDS = 5.0
+
+
+def encode_cursor(mtime: float, name: str, offset: int) -> str:
+    """Opaque cursor pointing just past (mtime, name), the last file of a page."""
+    raw = json.dumps([mtime, name, offset]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    """Returns ((mtime, name), offset) from a cursor, or raises ValueError."""
+    try:
+        mtime, name, offset = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (float(mtime), str(name)), int(offset)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class _IndexEvents(FileSystemEventHandler):
+    """Applies file events of one directory to its index."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            if path and os.path.dirname(path) == self.index.path:
+                self.index.refresh_entry(os.path.basename(path))
+
+
+class DirectoryIndex:
+    """
+    In-memory index of the regular files of one directory and their mtimes.
+
+    The index is built with a single os.scandir pass. With watchdog available
+    it is kept current from file events (one stat per changed file); without
+    it, it is rebuilt when the directory's mtime changes or the index is
+    older than FALLBACK_TTL_SECONDS.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._files = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._changed_during_build = None
+        self._built_at = 0.0
+        self._dir_mtime = None
+        self._observer = None
+        self._stale = True
+
+    def _scan(self):
+        files = {}
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        files[entry.name] = entry.stat().st_mtime
+                except OSError:
+                    continue
+        return files
+
+    def _watch(self):
+        if Observer is None or self._observer is not None:
+            return
+        try:
+            observer = Observer()
+            observer.schedule(_IndexEvents(self), self.path, recursive=False)
+            observer.daemon = True
+            observer.start()
+        except OSError:
+            # e.g. out of inotify watches; keep using the mtime/TTL checks
+            return
+        self._observer = observer
+
+    def _is_current(self) -> bool:
+        if self._stale:
+            return False
+        if self._observer is not None and self._observer.is_alive():
+            return True
+        try:
+            dir_mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        return dir_mtime == self._dir_mtime and time.monotonic() - self._built_at < FALLBACK_TTL_SECONDS
+
+    def _ensure(self):
+        with self._build_lock:
+            if self._is_current():
+                return
+            # Start watching before scanning so no change between the two is missed;
+            # files changed while scanning are re-read once the scan is in place.
+            with self._lock:
+                self._changed_during_build = set()
+            self._watch()
+            dir_mtime = os.stat(self.path).st_mtime_ns
+            files = self._scan()
+            with self._lock:
+                self._files = files
+                self._dir_mtime = dir_mtime
+                self._built_at = time.monotonic()
+                self._stale = False
+                changed, self._changed_during_build = self._changed_during_build, None
+            for name in changed:
+                self.refresh_entry(name)
+
+    def refresh_entry(self, name: str):
+        """Re-reads one file after an event; removes it if it is gone or not a regular file."""
+        path = os.path.join(self.path, name)
+        try:
+            mtime = os.stat(path).st_mtime if os.path.isfile(path) else None
+        except OSError:
+            mtime = None
+        with self._lock:
+            if self._changed_during_build is not None:
+                self._changed_during_build.add(name)
+            if mtime is None:
+                self._files.pop(name, None)
+            else:
+                self._files[name] = mtime
+
+    def invalidate(self):
+        self._stale = True
+
+    def count(self) -> int:
+        self._ensure()
+        with self._lock:
+            return len(self._files)
+
+    def newest(self, limit: int, after=None) -> list:
+        """
+        Returns up to limit (mtime, name) pairs, newest first.
+
+        Args:
+            limit: Number of files to return.
+            after: (mtime, name) of the last file already shown; only older files are returned.
+        """
+        self._ensure()
+        with self._lock:
+            items = ((mtime, name) for name, mtime in self._files.items())
+            if after is not None:
+                items = (item for item in items if item < after)
+            return heapq.nlargest(limit, items)
+
+    def close(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(path: str) -> DirectoryIndex:
+    """Returns the shared index of a directory, creating it on first use."""
+    path = os.path.abspath(path)
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = DirectoryIndex(path)
+    return index
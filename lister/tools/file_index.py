@@ -0,0 +1,348 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional; fall back to periodic rescans
+    FileSystemEventHandler = object
+    Observer = None
+
+from .roots import get_roots
+
+# SQLite file holding the recursive name index of every registered root.
+INDEX_PATH = os.environ.get("LISTER_INDEX_DB", "lister_index.db")
+
+# Rows written per transaction while scanning, and how long filesystem events are
+# collected before they are written together.
+BATCH_SIZE = 5000
+FLUSH_INTERVAL = 0.5
+
+# Without watchdog a root is rescanned in the background when its last scan is older than this.
+RESCAN_INTERVAL = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    scan INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (root, path)
+);
+CREATE INDEX IF NOT EXISTS files_mtime ON files (mtime);
+CREATE TABLE IF NOT EXISTS roots (
+    root TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    scan INTEGER NOT NULL DEFAULT 0,
+    scanned_at REAL
+);
+"""
+
+# Trigram tokens let MATCH find any substring of three or more characters of a name.
+# Rows are never renamed in place (a rename is a delete plus an insert), so no update trigger is needed.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(name, content='files', content_rowid='id', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts (files_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+
+_UPSERT = ("INSERT INTO files (root, path, name, size, mtime, scan) VALUES (?, ?, ?, ?, ?, ?) "
+           "ON CONFLICT (root, path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, scan = excluded.scan")
+
+# '0' sorts right after '/', so [prefix + '/', prefix + '0') is everything below a directory.
+_DELETE_TREE = "DELETE FROM files WHERE root = ? AND (path = ? OR (path >= ? AND path < ?))"
+
+_GLOB_CHARS = re.compile(r"[*?\[\]]")
+# A glob character class such as [0-9] or [!a]; ']' right after the opening bracket is a member.
+_GLOB_CLASS = re.compile(r"\[!?\]?[^\]]*\]")
+
+
+def _text(name: str) -> str:
+    """Makes a file name storable: bytes that are not UTF-8 (surrogate-escaped by os) become U+FFFD."""
+    return os.fsencode(name).decode("utf-8", "replace")
+
+
+def parse_since(since: str) -> float:
+    """
+    Turns 'today', 'yesterday', a relative age ('30m', '24h', '7d', '2w') or an ISO date/time
+    into a Unix timestamp.
+    """
+    text = since.strip().lower()
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    if text == "today":
+        return midnight.timestamp()
+    if text == "yesterday":
+        return (midnight - timedelta(days=1)).timestamp()
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([mhdw])", text)
+    if match:
+        unit = {"m": 60, "h": 3600, "d": 86400, "w": 604800}[match.group(2)]
+        return time.time() - float(match.group(1)) * unit
+    try:
+        return datetime.fromisoformat(since.strip()).timestamp()
+    except ValueError:
+        raise ValueError(f"Unrecognised 'since' value: {since}. Use e.g. 'yesterday', '24h', '7d' or '2024-05-01'.")
+
+
+class _RootEvents(FileSystemEventHandler):
+    """Queues the filesystem events of one root for the index writer."""
+
+    def __init__(self, index, root, directory):
+        self.index = index
+        self.root = root
+        self.directory = directory
+
+    def on_any_event(self, event):
+        if event.event_type not in ("created", "modified", "deleted", "moved"):
+            return
+        self.index.events.put((self.root, self.directory, event.event_type, event.is_directory,
+                               event.src_path, getattr(event, "dest_path", None)))
+
+
+class FileIndex:
+    """
+    Recursive index of file names, sizes and mtimes under the registered roots.
+
+    All writes happen on one writer thread: full scans (one os.scandir walk,
+    upserting in batches and then dropping rows the walk did not see) and
+    filesystem events, which are applied in small batches. Searches open
+    their own connection and read the WAL database concurrently.
+    """
+
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        self.events = queue.Queue()
+        self._observers = {}
+        self._scanning = set()
+        self._lock = threading.Lock()
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        try:
+            conn.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite without FTS5 trigram support: substring searches scan the names instead.
+            self.fts = False
+        conn.close()
+        self._writer = threading.Thread(target=self._write_loop, name="file-index-writer", daemon=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def start(self):
+        self._writer.start()
+        for root, directory in get_roots().items():
+            self.sync_root(root, directory)
+
+    def sync_root(self, root: str, directory: str):
+        """Queues a (re)scan of a root and starts watching it."""
+        directory = os.path.abspath(directory)
+        if not os.path.isdir(directory):
+            return
+        with self._lock:
+            if root in self._scanning:
+                return
+            self._scanning.add(root)
+        self.events.put((root, directory, "scan", True, directory, None))
+        self._watch(root, directory)
+
+    def _watch(self, root: str, directory: str):
+        if Observer is None:
+            return
+        with self._lock:
+            previous = self._observers.get(root)
+            if previous is not None and previous[0] == directory:
+                return
+            try:
+                observer = Observer()
+                observer.schedule(_RootEvents(self, root, directory), directory, recursive=True)
+                observer.daemon = True
+                observer.start()
+            except OSError:
+                # e.g. out of inotify watches; the root is then kept current by rescans
+                return
+            if previous is not None:
+                previous[1].stop()
+            self._observers[root] = (directory, observer)
+
+    def _is_watched(self, root: str) -> bool:
+        with self._lock:
+            watched = self._observers.get(root)
+        return watched is not None and watched[1].is_alive()
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self.events.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while batch[-1][2] != "scan":
+                try:
+                    batch.append(self.events.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    for event in batch:
+                        if event[2] == "scan":
+                            self._scan_root(conn, event[0], event[1])
+                        else:
+                            self._apply(conn, *event)
+            except Exception:
+                # Drop the batch but keep the writer alive; the next rescan repairs the index.
+                continue
+
+    def _scan_root(self, conn: sqlite3.Connection, root: str, directory: str):
+        try:
+            row = conn.execute("SELECT directory, scan FROM roots WHERE root = ?", (root,)).fetchone()
+            if row is not None and row[0] != directory:
+                conn.execute("DELETE FROM files WHERE root = ?", (root,))
+            scan = (row[1] if row else 0) + 1
+            self._walk(conn, root, directory, directory, scan)
+            conn.execute("DELETE FROM files WHERE root = ? AND scan < ?", (root, scan))
+            conn.execute("INSERT INTO roots (root, directory, scan, scanned_at) VALUES (?, ?, ?, ?) "
+                         "ON CONFLICT (root) DO UPDATE SET directory = excluded.directory, scan = excluded.scan, "
+                         "scanned_at = excluded.scanned_at", (root, directory, scan, time.time()))
+        finally:
+            with self._lock:
+                self._scanning.discard(root)
+
+    def _walk(self, conn: sqlite3.Connection, root: str, directory: str, start: str, scan: int):
+        """Upserts every regular file below start, committing every BATCH_SIZE rows."""
+        prefix = len(directory) + 1
+        batch = []
+        stack = [start]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                st = entry.stat(follow_symlinks=False)
+                                batch.append((root, _text(entry.path[prefix:]), _text(entry.name), st.st_size,
+                                              st.st_mtime, scan))
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            if len(batch) >= BATCH_SIZE:
+                conn.executemany(_UPSERT, batch)
+                conn.commit()
+                batch = []
+        conn.executemany(_UPSERT, batch)
+
+    def _current_scan(self, conn: sqlite3.Connection, root: str) -> int:
+        row = conn.execute("SELECT scan FROM roots WHERE root = ?", (root,)).fetchone()
+        return row[0] if row else 0
+
+    def _apply(self, conn: sqlite3.Connection, root: str, directory: str, kind: str, is_directory: bool,
+               src_path: str, dest_path: str):
+        prefix = len(directory) + 1
+        if kind in ("deleted", "moved"):
+            rel = _text(src_path[prefix:])
+            if is_directory:
+                conn.execute(_DELETE_TREE, (root, rel, f"{rel}/", f"{rel}0"))
+            else:
+                conn.execute("DELETE FROM files WHERE root = ? AND path = ?", (root, rel))
+        if kind == "deleted":
+            return
+        path = dest_path if kind == "moved" else src_path
+        if not path or not path.startswith(directory + os.sep):
+            return
+        if is_directory:
+            # A directory moved or copied in brings files that raise no events of their own.
+            if kind != "modified":
+                self._walk(conn, root, directory, path, self._current_scan(conn, root))
+            return
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            conn.execute("DELETE FROM files WHERE root = ? AND path = ?", (root, _text(path[prefix:])))
+            return
+        conn.execute(_UPSERT, (root, _text(path[prefix:]), _text(os.path.basename(path)), st.st_size, st.st_mtime,
+                               self._current_scan(conn, root)))
+
+    def status(self, roots: list) -> dict:
+        """Reports per root whether its first scan is still running and when it was last scanned."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            scanned = dict(conn.execute("SELECT root, scanned_at FROM roots"))
+        finally:
+            conn.close()
+        with self._lock:
+            scanning = set(self._scanning)
+        return {root: {"indexing": root in scanning, "scanned_at": scanned.get(root)} for root in roots}
+
+    def refresh_stale(self, roots: dict):
+        """Without a watcher, queues a background rescan of roots whose last scan is too old."""
+        status = self.status(list(roots))
+        for root, directory in roots.items():
+            scanned_at = status[root]["scanned_at"]
+            if not self._is_watched(root) and (scanned_at is None or time.time() - scanned_at > RESCAN_INTERVAL):
+                self.sync_root(root, directory)
+
+    def search(self, roots: list, pattern: str = None, since: float = None, limit: int = 20) -> list:
+        """
+        Returns up to limit (root, path, size, mtime) rows, newest first.
+
+        Args:
+            roots: Root keywords to search.
+            pattern: Name substring, or a glob like 'error*.log' when it contains * ? or [].
+            since: Only files modified at or after this Unix timestamp.
+            limit: Maximum number of rows.
+        """
+        clauses = [f"root IN ({', '.join('?' * len(roots))})"]
+        params = list(roots)
+        if pattern:
+            is_glob = bool(_GLOB_CHARS.search(pattern))
+            # A class matches one character, so its members are no literal part of the name.
+            literal = _GLOB_CLASS.sub("?", pattern) if is_glob else pattern
+            fragments = [f for f in _GLOB_CHARS.split(literal) if len(f) >= 3] if is_glob else [pattern]
+            if self.fts and fragments and all(len(f) >= 3 for f in fragments):
+                clauses.append("id IN (SELECT rowid FROM files_fts WHERE files_fts MATCH ?)")
+                params.append(" AND ".join('"' + f.replace('"', '""') + '"' for f in fragments))
+            if is_glob:
+                clauses.append("lower(name) GLOB ?")
+                params.append(pattern.lower())
+            else:
+                clauses.append("name LIKE ? ESCAPE '\\'")
+                params.append("%" + re.sub(r"([\\%_])", r"\\\1", pattern) + "%")
+        if since is not None:
+            clauses.append("mtime >= ?")
+            params.append(since)
+        params.append(limit)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            return conn.execute(f"SELECT root, path, size, mtime FROM files WHERE {' AND '.join(clauses)} "
+                                "ORDER BY mtime DESC LIMIT ?", params).fetchall()
+        finally:
+            conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_file_index() -> FileIndex:
+    """Returns the shared file index, scanning and watching the registered roots on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FileIndex()
+            _index.start()
+    return _index
@@ -1,52 +1,138 @@
 from datetime import datetime
 import os
 
-def list_files_tool(keyword: str, threshold: int = 10, limit: int = 5):
+from tool_cache import cached_tool, invalidates
+
+from .dir_index import decode_cursor, encode_cursor, get_index
+from .file_index import get_file_index, parse_since
+from .roots import ALLOWED_BASES, get_roots, is_allowed, register_root, resolve_root
+
+def _answered(result) -> bool:
+    """Apologies and errors are never cached, so a retry looks at the directory again."""
+    return not result.startswith(("Sorry", "Invalid", "Error"))
+
+# Listings are served from a short-lived cache; registering a directory refreshes them.
+@cached_tool(ttl=5, tags=("roots",), cache_if=_answered)
+def list_files_tool(keyword: str, threshold: int = 10, limit: int = 5, cursor: str = None):
     """
     Lists files in a directory. If the total count exceeds 'threshold', 
     it only returns the top 'limit' files sorted by modification time.
+    Pass the 'cursor' from a previous answer to get the next 'limit' older files.
     """
 
-    directory_map = {
-        "test": "/home/butcher/test",
-        "nalalogs": "/var/log/nala",
-    }
-    
-    path = directory_map.get(keyword.lower())
+    path = resolve_root(keyword)
     if not path or not os.path.exists(path):
         return f"Sorry, I couldn't find a directory for '{keyword}'."
 
-    # 1. Get all files with their modification times
-    all_files = []
-    for filename in os.listdir(path):
-        full_path = os.path.join(path, filename)
-        if os.path.isfile(full_path):
-            mod_time = os.path.getmtime(full_path)
-            all_files.append({
-                "name": filename,
-                "time": mod_time
-            })
-
-    if not all_files:
+    # 1. Files and their modification times come from the in-memory directory index
+    index = get_index(path)
+    total_count = index.count()
+
+    if not total_count:
         return f"The directory '{keyword}' is empty."
 
-    # 2. Sort by modified time (Newest first)
-    all_files.sort(key=lambda x: x['time'], reverse=True)
+    after, offset = None, 0
+    if cursor:
+        try:
+            after, offset = decode_cursor(cursor)
+        except ValueError as e:
+            return str(e)
 
-    # 3. Apply the logic: If > 10 files, only show top 5
-    total_count = len(all_files)
-    display_files = all_files
+    # 2. Apply the logic: If > 10 files, only show top 5 (newest first, picked with a heap
+    #    rather than by sorting every file), continuing after the cursor when one is given
     note = ""
+    if total_count >= threshold or cursor:
+        display_files = index.newest(limit, after)
+        if not display_files:
+            return f"There are no more files in '{keyword}'."
+        note = (f"(Showing files {offset + 1} to {offset + len(display_files)}, newest first, "
+                f"out of {total_count} total)\n")
+    else:
+        display_files = index.newest(total_count)
 
-    if total_count >= threshold:
-        display_files = all_files[:limit]
-        note = f"(Showing top {limit} newest files out of {total_count} total)\n"
-
-    # 4. Format the output
+    # 3. Format the output
     output = f"Files present in {keyword} are,\n{note}\n"
-    for idx, file_info in enumerate(display_files, 1):
-        readable_time = datetime.fromtimestamp(file_info['time']).strftime('%Y-%m-%d %H:%M:%S')
-        output += f"{idx}. {file_info['name']} (Modified: {readable_time})\n"
+    for idx, (mod_time, name) in enumerate(display_files, offset + 1):
+        readable_time = datetime.fromtimestamp(mod_time).strftime('%Y-%m-%d %H:%M:%S')
+        output += f"{idx}. {name} (Modified: {readable_time})\n"
+
+    shown = offset + len(display_files)
+    if note and shown < total_count:
+        last_time, last_name = display_files[-1]
+        next_cursor = encode_cursor(last_time, last_name, shown)
+        output += f"\nMore files are available; use cursor '{next_cursor}' to see the next {limit}.\n"
 
-    output += f"\nLet me know which file you want by mentioning the serial number 1 to {len(display_files)}."
+    output += f"\nLet me know which file you want by mentioning the serial number {offset + 1} to {shown}."
     return output
+
+
+def _readable_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+@cached_tool(ttl=10, tags=("roots",), cache_if=_answered)
+def search_files(keyword: str = None, pattern: str = None, since: str = None, limit: int = 20):
+    """
+    Searches the file index of the registered directories (including all subdirectories)
+    and returns the newest matching files.
+
+    Args:
+        keyword: Directory keyword to search; leave empty to search every registered directory.
+        pattern: Part of the file name (e.g. 'error'), or a glob such as 'error*.log'.
+        since: Only files modified since then: 'today', 'yesterday', '24h', '7d' or a date like '2024-05-01'.
+        limit: Maximum number of files to return.
+    """
+    roots = get_roots()
+    if keyword and keyword.lower() not in ("all", "*"):
+        if keyword.lower() not in roots:
+            return f"Sorry, I couldn't find a directory for '{keyword}'."
+        roots = {keyword.lower(): roots[keyword.lower()]}
+    try:
+        since_ts = parse_since(since) if since else None
+    except ValueError as e:
+        return str(e)
+
+    index = get_file_index()
+    index.refresh_stale(roots)
+    rows = index.search(list(roots), pattern, since_ts, limit)
+    building = [root for root, state in index.status(list(roots)).items()
+                if state["indexing"] and state["scanned_at"] is None]
+
+    criteria = []
+    if pattern:
+        criteria.append(f"matching '{pattern}'")
+    if since:
+        criteria.append(f"modified since {since}")
+    where = keyword if keyword and len(roots) == 1 else "all directories"
+    note = f"(Still indexing {', '.join(building)}; results may be incomplete)\n" if building else ""
+    if not rows:
+        return f"{note}No files {' and '.join(criteria) or 'found'} in {where}."
+
+    output = f"Files {' and '.join(criteria) or 'present'} in {where} are,\n{note}\n"
+    for idx, (root, rel_path, size, mod_time) in enumerate(rows, 1):
+        readable_time = datetime.fromtimestamp(mod_time).strftime('%Y-%m-%d %H:%M:%S')
+        output += f"{idx}. {os.path.join(roots[root], rel_path)} (Modified: {readable_time}, {_readable_size(size)})\n"
+
+    output += f"\nLet me know which file you want by mentioning the serial number 1 to {len(rows)}."
+    return output
+
+@invalidates("roots")
+def register_directory(keyword: str, path: str):
+    """
+    Registers a directory under a keyword so it can be listed and searched, and starts indexing it.
+    Only directories below the allowed base directories (LISTER_ALLOWED_BASES) can be registered.
+
+    Args:
+        keyword: Short name for the directory, e.g. 'applogs'.
+        path: The directory path.
+    """
+    if not os.path.isdir(os.path.expanduser(path)):
+        return f"Sorry, '{path}' is not a directory."
+    if not is_allowed(path):
+        allowed = ", ".join(ALLOWED_BASES) or "none configured"
+        return f"Sorry, '{path}' is outside the directories that may be registered ({allowed})."
+    directory = register_root(keyword, path)
+    get_file_index().sync_root(keyword.lower(), directory)
+    return f"Registered '{keyword.lower()}' as {directory}. It is being indexed for search now."
@@ -0,0 +1,72 @@
+import json
+import os
+import threading
+
+# Directories the agent knows by keyword. More can be added in the roots file
+# (a JSON object of keyword -> path) or with the register_directory tool.
+DEFAULT_ROOTS = {
+    "test": "/home/butcher/test",
+    "nalalogs": "/var/log/nala",
+}
+
+# register_directory only accepts directories at or below one of these bases
+# (separated by os.pathsep), so the agent cannot index the whole filesystem.
+# By default only subdirectories of the default roots can be registered.
+ALLOWED_BASES = [base for base in os.environ.get("LISTER_ALLOWED_BASES", os.pathsep.join(DEFAULT_ROOTS.values()))
+                 .split(os.pathsep) if base]
+
+# Kept outside the source tree, so registering a directory does not look like a
+# code change to file_watcher and restart adk web mid-conversation.
+CONFIG_HOME = os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))
+ROOTS_FILE = os.environ.get("LISTER_ROOTS_FILE", os.path.join(CONFIG_HOME, "gadk-lister", "roots.json"))
+# Where earlier versions kept the roots file; read until the new one is first written.
+_LEGACY_ROOTS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "roots.json")
+
+_lock = threading.Lock()
+
+
+def _load_file() -> dict:
+    path = ROOTS_FILE
+    if not os.path.exists(path) and "LISTER_ROOTS_FILE" not in os.environ:
+        path = _LEGACY_ROOTS_FILE
+    try:
+        with open(path, encoding="utf-8") as f:
+            roots = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {str(k).lower(): str(v) for k, v in roots.items()} if isinstance(roots, dict) else {}
+
+
+def get_roots() -> dict:
+    """Returns every registered keyword and its directory."""
+    with _lock:
+        return {**DEFAULT_ROOTS, **_load_file()}
+
+
+def resolve_root(keyword: str):
+    """Returns the directory registered for a keyword, or None."""
+    return get_roots().get(keyword.lower())
+
+
+def is_allowed(path: str) -> bool:
+    """True when a directory, with symlinks resolved, lies at or below one of the allowed bases."""
+    path = os.path.realpath(os.path.expanduser(path))
+    for base in ALLOWED_BASES:
+        base = os.path.realpath(os.path.expanduser(base))
+        if path == base or path.startswith(base.rstrip(os.sep) + os.sep):
+            return True
+    return False
+
+
+def register_root(keyword: str, path: str) -> str:
+    """Adds or replaces a keyword in the roots file and returns the absolute directory."""
+    path = os.path.abspath(os.path.expanduser(path))
+    with _lock:
+        roots = _load_file()
+        roots[keyword.lower()] = path
+        os.makedirs(os.path.dirname(os.path.abspath(ROOTS_FILE)), exist_ok=True)
+        tmp = f"{ROOTS_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(roots, f, indent=2)
+        os.replace(tmp, ROOTS_FILE)
+    return path
@@ -1,7 +1,12 @@
 import os # Required for path operations
+import sys
 from google.adk.agents import LlmAgent
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
 
+# The pinned server runs warm under the local MCP supervisor (see mcp_supervisor.py);
+# this process only bridges the session to it once the agent first lists its tools.
+MCP_SUPERVISOR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp_supervisor.py")
+
 root_agent = LlmAgent(
     model='gemini-2.5-flash',
     name='hello_world',
@@ -9,10 +14,11 @@ root_agent = LlmAgent(
     tools=[
         MCPToolset(
             connection_params=StdioServerParameters(
-                command='npx',
+                command=sys.executable,
                 args=[
-                    "-y",
-                    "@playwright/mcp@latest",
+                    MCP_SUPERVISOR,
+                    "connect",
+                    "playwright",
                 ],
             ),
         )
@@ -0,0 +1,549 @@
+"""
+Local supervisor keeping the agents' MCP servers warm.
+
+Servers are pinned in mcp_servers.json and installed once into MCP_HOME with
+`python mcp_supervisor.py install`, so nothing is resolved or downloaded when
+an agent starts. Agents run `python mcp_supervisor.py connect <server> [args]`
+as their stdio MCP server; the connector starts the supervisor if it is not
+running and pipes the session to it over a unix socket. The supervisor is its
+own process, so it outlives adk web reloads:
+
+- shared servers run once per argument list and serve every session, with
+  request ids rewritten so each response reaches the session that asked;
+- the others keep one pre-started spare, handed to the next session whole.
+"""
+import argparse
+import fcntl
+import json
+import logging
+import logging.handlers
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+MCP_HOME = os.environ.get("MCP_HOME", os.path.expanduser("~/.cache/gadk-mcp"))
+CONFIG_FILE = os.environ.get("MCP_SERVERS_FILE", str(Path(__file__).resolve().with_name("mcp_servers.json")))
+SOCKET_PATH = os.environ.get("MCP_SUPERVISOR_SOCKET", os.path.join(MCP_HOME, "supervisor.sock"))
+LOCK_FILE = os.path.join(MCP_HOME, "supervisor.lock")
+LOG_FILE = os.path.join(MCP_HOME, "supervisor.log")
+
+# Server/argument lists used before; started ahead of the first session when the supervisor starts.
+WARM_FILE = os.path.join(MCP_HOME, "warm.json")
+
+# How long a connector waits for the supervisor to come up, and a shared server to initialize.
+START_TIMEOUT = 15
+INIT_TIMEOUT = 60
+
+# Protocol version the supervisor initializes shared servers with; every session gets that handshake.
+PROTOCOL_VERSION = "2025-03-26"
+_INIT_ID = "supervisor-initialize"
+
+log = logging.getLogger("mcp_supervisor")
+
+
+def load_config(config_file=CONFIG_FILE):
+    """Pinned servers by name: package, version, bin and whether sessions share one process"""
+    with open(config_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def server_command(name, args, config):
+    """Command line of an installed server; raises when it is unknown, missing or not the pinned version"""
+    if name not in config:
+        raise KeyError(f"Unknown MCP server '{name}'; configured: {', '.join(sorted(config))}")
+    spec = config[name]
+    binary = os.path.join(MCP_HOME, "node_modules", ".bin", spec["bin"])
+    try:
+        with open(os.path.join(MCP_HOME, "node_modules", spec["package"], "package.json"), encoding="utf-8") as f:
+            installed = json.load(f).get("version")
+    except (OSError, ValueError):
+        installed = None
+    if installed is None or not os.path.exists(binary):
+        raise FileNotFoundError(f"{spec['package']}@{spec['version']} is not installed; "
+                                f"run: python mcp_supervisor.py install")
+    if installed != spec["version"]:
+        raise RuntimeError(f"{spec['package']} {installed} is installed but {spec['version']} is pinned; "
+                           f"run: python mcp_supervisor.py install")
+    return [binary, *args]
+
+
+def install(config):
+    """Installs the pinned servers into MCP_HOME; the only step that needs the network"""
+    os.makedirs(MCP_HOME, exist_ok=True)
+    specs = [f"{spec['package']}@{spec['version']}" for spec in config.values()]
+    print(f"[INSTALL] {' '.join(specs)} -> {MCP_HOME}")
+    return subprocess.run(["npm", "install", "--prefix", MCP_HOME, "--save-exact", "--no-audit", "--no-fund",
+                           *specs]).returncode
+
+
+def setup_logging(log_file=LOG_FILE):
+    handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=3,
+                                                   encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+
+
+def spawn(command, label):
+    """Starts a server process with its stderr copied to the supervisor log"""
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               start_new_session=True)
+
+    def pump():
+        for line in process.stderr:
+            log.info("[%s] %s", label, line.decode("utf-8", errors="replace").rstrip())
+    threading.Thread(target=pump, name=f"mcp-stderr-{label}", daemon=True).start()
+    log.info("[%s] started pid %s", label, process.pid)
+    return process
+
+
+def stop_process(process, timeout=5):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class Session:
+    """One client connection, speaking newline-delimited JSON-RPC"""
+
+    def __init__(self, conn, rfile):
+        self.conn = conn
+        self.rfile = rfile
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        data = json.dumps(message).encode("utf-8") + b"\n"
+        try:
+            with self.lock:
+                self.conn.sendall(data)
+        except OSError:
+            self.close()
+
+    def messages(self):
+        for line in self.rfile:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                log.warning("dropping malformed client message: %r", line[:200])
+
+    def close(self):
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class SharedServer:
+    """
+    One server process serving any number of sessions.
+
+    The supervisor performs the initialize handshake itself and replays the
+    result to every session. Request ids are rewritten to process-wide ones on
+    the way in and restored on the way out; requests the server sends go to the
+    most recent session, and notifications go to all of them.
+    """
+
+    def __init__(self, label, command):
+        self.label = label
+        self.command = command
+        self.process = None
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.sessions = []
+        self.pending = {}
+        self.server_requests = {}
+        self.next_id = 0
+        self.init_response = None
+        self.ready = threading.Event()
+
+    def start(self):
+        self.process = spawn(self.command, self.label)
+        threading.Thread(target=self.read_loop, name=f"mcp-{self.label}", daemon=True).start()
+        self.write({"jsonrpc": "2.0", "id": _INIT_ID, "method": "initialize",
+                    "params": {"protocolVersion": PROTOCOL_VERSION, "capabilities": {},
+                               "clientInfo": {"name": "mcp_supervisor", "version": "1.0"}}})
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def write(self, message):
+        with self.write_lock:
+            self.process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+            self.process.stdin.flush()
+
+    def read_loop(self):
+        for line in self.process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                log.warning("[%s] dropping malformed server message: %r", self.label, line[:200])
+                continue
+            self.dispatch(message)
+        log.info("[%s] exited with code %s", self.label, self.process.wait())
+        self.ready.set()
+        with self.lock:
+            sessions, self.sessions = self.sessions, []
+        for session in sessions:
+            session.close()
+
+    def dispatch(self, message):
+        if "method" not in message:
+            if message.get("id") == _INIT_ID:
+                self.init_response = message
+                self.write({"jsonrpc": "2.0", "method": "notifications/initialized"})
+                self.ready.set()
+                log.info("[%s] initialized", self.label)
+                return
+            with self.lock:
+                target = self.pending.pop(message.get("id"), None)
+            if target is not None:
+                session, client_id = target
+                session.send({**message, "id": client_id})
+        elif "id" in message:
+            with self.lock:
+                session = self.sessions[-1] if self.sessions else None
+                if session is not None:
+                    self.server_requests[message["id"]] = session
+            if session is None:
+                self.write({"jsonrpc": "2.0", "id": message["id"],
+                            "error": {"code": -32601, "message": "No client session attached"}})
+            else:
+                session.send(message)
+        else:
+            with self.lock:
+                sessions = list(self.sessions)
+            for session in sessions:
+                session.send(message)
+
+    def from_client(self, session, message):
+        method = message.get("method")
+        if method is None:
+            # The session's answer to a request the server sent it
+            with self.lock:
+                self.server_requests.pop(message.get("id"), None)
+            self.write(message)
+        elif method == "initialize":
+            session.send({"jsonrpc": "2.0", "id": message.get("id"), "result": self.init_response["result"]})
+        elif method == "notifications/initialized":
+            return
+        elif "id" not in message:
+            params = message.get("params") or {}
+            if method == "notifications/cancelled":
+                with self.lock:
+                    mapped = [child_id for child_id, (owner, client_id) in self.pending.items()
+                              if owner is session and client_id == params.get("requestId")]
+                if not mapped:
+                    return
+                message = {**message, "params": {**params, "requestId": mapped[0]}}
+            self.write(message)
+        else:
+            with self.lock:
+                self.next_id += 1
+                child_id = self.next_id
+                self.pending[child_id] = (session, message["id"])
+            self.write({**message, "id": child_id})
+
+    def wait_ready(self):
+        if not self.ready.wait(INIT_TIMEOUT):
+            raise RuntimeError(f"{self.label} did not initialize within {INIT_TIMEOUT}s")
+        if self.init_response is None or "result" not in self.init_response:
+            raise RuntimeError(f"{self.label} failed to initialize: {self.init_response}; see {LOG_FILE}")
+
+    def serve(self, conn, rfile):
+        session = Session(conn, rfile)
+        with self.lock:
+            self.sessions.append(session)
+        try:
+            for message in session.messages():
+                self.from_client(session, message)
+        except (OSError, ValueError) as e:
+            log.warning("[%s] session ended: %s", self.label, e)
+        finally:
+            with self.lock:
+                if session in self.sessions:
+                    self.sessions.remove(session)
+                self.pending = {k: v for k, v in self.pending.items() if v[0] is not session}
+                self.server_requests = {k: v for k, v in self.server_requests.items() if v is not session}
+
+    def stop(self):
+        if self.process is not None:
+            stop_process(self.process)
+
+
+class SpareServer:
+    """
+    A server that keeps per-session state (e.g. a browser), so every session
+    gets its own process: one is always started ahead, so the Node startup is
+    already paid when a session arrives.
+    """
+
+    def __init__(self, label, command):
+        self.label = label
+        self.command = command
+        self.spare = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.spare is None or self.spare.poll() is not None:
+                self.spare = spawn(self.command, self.label)
+
+    def alive(self):
+        return True
+
+    def wait_ready(self):
+        return
+
+    def take(self):
+        with self.lock:
+            process = self.spare
+            self.spare = None
+        if process is None or process.poll() is not None:
+            process = spawn(self.command, self.label)
+        threading.Thread(target=self.start, daemon=True).start()
+        return process
+
+    def serve(self, conn, rfile):
+        process = self.take()
+
+        def pump_out():
+            for chunk in iter(lambda: process.stdout.read1(65536), b""):
+                try:
+                    conn.sendall(chunk)
+                except OSError:
+                    break
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        output = threading.Thread(target=pump_out, name=f"mcp-{self.label}-out", daemon=True)
+        output.start()
+        try:
+            for chunk in iter(lambda: rfile.read1(65536), b""):
+                process.stdin.write(chunk)
+                process.stdin.flush()
+        except (OSError, ValueError):
+            pass
+        finally:
+            stop_process(process)
+            output.join(timeout=5)
+
+    def stop(self):
+        with self.lock:
+            if self.spare is not None:
+                stop_process(self.spare)
+                self.spare = None
+
+
+class McpSupervisor:
+    """Accepts connector sessions on a unix socket and routes them to warm servers"""
+
+    def __init__(self, config, socket_path=SOCKET_PATH):
+        self.config = config
+        self.socket_path = socket_path
+        self.servers = {}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+
+    def server(self, name, args):
+        """The running server for a name and argument list, started on first use"""
+        key = (name, tuple(args))
+        with self.lock:
+            server = self.servers.get(key)
+            if server is None or not server.alive():
+                command = server_command(name, args, self.config)
+                label = name if not args else f"{name} {' '.join(args)}"
+                kind = SharedServer if self.config[name].get("shared") else SpareServer
+                server = self.servers[key] = kind(label, command)
+                server.start()
+                self.remember(name, args)
+        return server
+
+    def remember(self, name, args):
+        warm = self.load_warm()
+        if [name, list(args)] not in warm:
+            warm.append([name, list(args)])
+            tmp = f"{WARM_FILE}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(warm, f, indent=2)
+            os.replace(tmp, WARM_FILE)
+
+    @staticmethod
+    def load_warm():
+        try:
+            with open(WARM_FILE, encoding="utf-8") as f:
+                warm = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [entry for entry in warm if isinstance(entry, list) and len(entry) == 2]
+
+    def prewarm(self):
+        for name, args in self.load_warm():
+            try:
+                self.server(name, args)
+            except (KeyError, OSError, RuntimeError) as e:
+                log.warning("not pre-starting %s %s: %s", name, args, e)
+
+    def status(self):
+        with self.lock:
+            return [{"server": key[0], "args": list(key[1]), "shared": isinstance(server, SharedServer),
+                     "alive": server.alive()} for key, server in self.servers.items()]
+
+    def handle(self, conn):
+        rfile = conn.makefile("rb")
+        try:
+            hello = json.loads(rfile.readline() or b"{}")
+            if hello.get("command") == "status":
+                conn.sendall(json.dumps({"ok": True, "servers": self.status()}).encode("utf-8") + b"\n")
+                return
+            if hello.get("command") == "stop":
+                conn.sendall(b'{"ok": true}\n')
+                self.stopping.set()
+                # Wake the accept loop so it sees the flag
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as wake:
+                    wake.connect_ex(self.socket_path)
+                return
+            server = self.server(hello.get("server", ""), [str(arg) for arg in hello.get("args", [])])
+            server.wait_ready()
+            conn.sendall(b'{"ok": true}\n')
+            server.serve(conn, rfile)
+        except (KeyError, OSError, RuntimeError, ValueError) as e:
+            log.warning("session refused: %s", e)
+            try:
+                conn.sendall(json.dumps({"ok": False, "error": str(e)}).encode("utf-8") + b"\n")
+            except OSError:
+                pass
+        finally:
+            rfile.close()
+            conn.close()
+
+    def serve_forever(self):
+        os.makedirs(MCP_HOME, exist_ok=True)
+        lock = open(LOCK_FILE, "w")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            print("[INFO] MCP supervisor already running")
+            return
+        setup_logging()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        listener.listen(64)
+        log.info("listening on %s (pid %s)", self.socket_path, os.getpid())
+        threading.Thread(target=self.prewarm, name="mcp-prewarm", daemon=True).start()
+        try:
+            while not self.stopping.is_set():
+                conn, _ = listener.accept()
+                if self.stopping.is_set():
+                    conn.close()
+                    break
+                threading.Thread(target=self.handle, args=(conn,), name="mcp-session", daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.close()
+            os.unlink(self.socket_path)
+            with self.lock:
+                servers = list(self.servers.values())
+            for server in servers:
+                server.stop()
+            log.info("stopped")
+
+
+def open_supervisor(autostart=True):
+    """Socket connected to the supervisor, starting it in the background first if needed"""
+    def attempt():
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(SOCKET_PATH)
+            return sock
+        except OSError:
+            sock.close()
+            return None
+
+    sock = attempt()
+    if sock is not None or not autostart:
+        return sock
+    os.makedirs(MCP_HOME, exist_ok=True)
+    subprocess.Popen([sys.executable, str(Path(__file__).resolve()), "serve"], stdin=subprocess.DEVNULL,
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + START_TIMEOUT
+    delay = 0.05
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        sock = attempt()
+        if sock is not None:
+            return sock
+        delay = min(delay * 2, 0.5)
+    raise TimeoutError(f"MCP supervisor did not start within {START_TIMEOUT}s; see {LOG_FILE}")
+
+
+def request(command):
+    """Sends a control command (status, stop) to a running supervisor"""
+    sock = open_supervisor(autostart=False)
+    if sock is None:
+        return {"ok": False, "error": "MCP supervisor is not running"}
+    with sock, sock.makefile("rb") as rfile:
+        sock.sendall(json.dumps({"command": command}).encode("utf-8") + b"\n")
+        return json.loads(rfile.readline() or b"{}")
+
+
+def connect(name, args):
+    """Bridges this process's stdio to a supervised server session; used as the agents' MCP command"""
+    sock = open_supervisor()
+    rfile = sock.makefile("rb")
+    sock.sendall(json.dumps({"server": name, "args": args}).encode("utf-8") + b"\n")
+    reply = json.loads(rfile.readline() or b"{}")
+    if not reply.get("ok"):
+        print(f"[ERROR] {reply.get('error', 'MCP supervisor closed the connection')}", file=sys.stderr)
+        return 1
+
+    def pump_in():
+        for chunk in iter(lambda: os.read(sys.stdin.fileno(), 65536), b""):
+            sock.sendall(chunk)
+        sock.shutdown(socket.SHUT_WR)
+    threading.Thread(target=pump_in, name="mcp-stdin", daemon=True).start()
+    for chunk in iter(lambda: rfile.read1(65536), b""):
+        sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep pinned MCP servers warm for the ADK agents")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("install", help="Install the pinned servers from mcp_servers.json (needs the network once)")
+    sub.add_parser("serve", help="Run the supervisor in the foreground")
+    sub.add_parser("status", help="List the servers a running supervisor keeps warm")
+    sub.add_parser("stop", help="Stop a running supervisor and its servers")
+    connect_parser = sub.add_parser("connect", help="Bridge stdio to a server session (the agents' MCP command)")
+    connect_parser.add_argument("server", help="Server name from mcp_servers.json")
+    connect_parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the server")
+    args = parser.parse_args()
+
+    if args.command == "install":
+        sys.exit(install(load_config()))
+    if args.command == "serve":
+        McpSupervisor(load_config()).serve_forever()
+    elif args.command in ("status", "stop"):
+        print(json.dumps(request(args.command), indent=2))
+    else:
+        try:
+            sys.exit(connect(args.server, args.args))
+        except (OSError, TimeoutError) as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,28 @@
 from google.adk.agents import Agent
 import os
-from typing import List
 
-def list_directory(path: str = ".") -> List[str]:
-        """Lists files and directories in the given path."""
-        try:
-            items = os.listdir(path)
-            return [os.path.join(path, item) for item in items]
-        except FileNotFoundError:
-            return [f"Error: Directory not found at {path}"]
-        except Exception as e:
-            return [f"Error listing directory: {e}"]
+from .file_reader import MAX_INLINE_BYTES, grep, head, list_directory_page, read_range, tail
+
+def list_directory(path: str = ".", offset: int = 0, limit: int = 100) -> dict:
+        """
+        Lists files and directories in the given path with their type, size and modification time.
+        Large directories are returned in pages; pass 'next_offset' as 'offset' to get the next page.
+        """
+        return list_directory_page(path, offset, limit)
 
 def view_file_content(file_path: str) -> str:
-    """Reads and returns the content of a text file."""
+    """
+    Reads and returns the content of a text file. Files larger than 256 KiB are not read
+    whole: the first lines are returned instead, and head, tail, read_range and grep
+    give access to the rest.
+    """
     try:
+        size = os.path.getsize(file_path)
+        if size > MAX_INLINE_BYTES:
+            first = head(file_path, 100)
+            return (f"{file_path} is {size / (1024 * 1024):.1f} MB, too large to show whole. "
+                    f"First {first['lines']} lines:\n{first['content']}\n"
+                    "Use 'tail' for the end, 'read_range' for a byte range or 'grep' to find lines.")
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         return content
@@ -27,7 +35,12 @@ root_agent = Agent(
     model='gemini-2.0-flash-001',
     name='file_management',
     description='A helpful assistant for user file management operations.',
-    instruction='You are a helpful file management assistant. You can list directories, view file contents and show it to user even if it is long not just read. Be polite and informative.',
+    instruction=(
+        'You are a helpful file management assistant. You can list directories, view file contents and show it '
+        'to user even if it is long not just read. Be polite and informative. Large files (such as JTL results '
+        'or logs) cannot be shown whole: use head or tail for the start or end, read_range to page through '
+        'them by byte offset, and grep to find matching lines. Large directories are listed in pages.'
+    ),
     output_key="output_response",
-    tools=[list_directory, view_file_content]
+    tools=[list_directory, view_file_content, head, tail, read_range, grep]
 )
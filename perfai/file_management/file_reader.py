@@ -0,0 +1,199 @@
+import mmap
+import os
+import re
+from contextlib import contextmanager
+
+# Files up to this size are returned whole by view_file_content; larger ones are
+# only ever read in ranges, so a multi-GB JTL or log never lands in memory.
+MAX_INLINE_BYTES = 256 * 1024
+
+# Upper bound on the bytes any single call returns.
+MAX_READ_BYTES = 64 * 1024
+
+# Matched lines longer than this are cut in grep results.
+MAX_LINE_CHARS = 500
+
+# grep counts line numbers over the gaps between matches in chunks of this size.
+_COUNT_CHUNK = 1024 * 1024
+
+
+@contextmanager
+def _mapped(path: str):
+    """Maps a file read-only; yields None for empty files, which cannot be mapped."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield None
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+def _error(path: str, e: Exception) -> dict:
+    if isinstance(e, FileNotFoundError):
+        return {"status": "error", "message": f"File not found at {path}"}
+    if isinstance(e, IsADirectoryError):
+        return {"status": "error", "message": f"{path} is a directory; use list_directory"}
+    return {"status": "error", "message": f"Error reading {path}: {e}"}
+
+
+def read_range(path: str, offset: int = 0, length: int = MAX_READ_BYTES) -> dict:
+    """
+    Reads a byte range of a file of any size.
+
+    Args:
+        path: The file to read.
+        offset: Byte offset to start at.
+        length: Number of bytes to read, at most 64 KiB per call.
+    """
+    try:
+        with _mapped(path) as mm:
+            size = len(mm) if mm is not None else 0
+            offset = min(max(offset, 0), size)
+            end = min(offset + max(min(length, MAX_READ_BYTES), 0), size)
+            content = _decode(mm[offset:end]) if mm is not None else ""
+    except OSError as e:
+        return _error(path, e)
+    return {
+        "status": "success",
+        "path": path,
+        "size": size,
+        "offset": offset,
+        "length": end - offset,
+        "next_offset": end if end < size else None,
+        "content": content,
+    }
+
+
+def head(path: str, n: int = 50) -> dict:
+    """
+    Returns the first n lines of a file (up to 64 KiB).
+
+    Args:
+        path: The file to read.
+        n: Number of lines.
+    """
+    try:
+        with _mapped(path) as mm:
+            if mm is None:
+                return {"status": "success", "path": path, "size": 0, "lines": 0, "content": ""}
+            end, lines = 0, 0
+            limit = min(len(mm), MAX_READ_BYTES)
+            while lines < n and end < limit:
+                newline = mm.find(b"\n", end, limit)
+                end = limit if newline < 0 else newline + 1
+                lines += 1
+            return {"status": "success", "path": path, "size": len(mm), "lines": lines,
+                    "next_offset": end if end < len(mm) else None, "content": _decode(mm[:end])}
+    except OSError as e:
+        return _error(path, e)
+
+
+def tail(path: str, n: int = 50) -> dict:
+    """
+    Returns the last n lines of a file (up to 64 KiB), reading backwards from the end.
+
+    Args:
+        path: The file to read.
+        n: Number of lines.
+    """
+    try:
+        with _mapped(path) as mm:
+            if mm is None:
+                return {"status": "success", "path": path, "size": 0, "lines": 0, "content": ""}
+            size = len(mm)
+            floor = max(size - MAX_READ_BYTES, 0)
+            # A trailing newline ends the last line rather than starting an empty one.
+            start = size - 1 if mm[size - 1:size] == b"\n" else size
+            lines = 0
+            while lines < n and start > floor:
+                newline = mm.rfind(b"\n", floor, start)
+                start = floor if newline < 0 else newline
+                lines += 1
+            if start > 0 and mm[start:start + 1] == b"\n":
+                start += 1
+            return {"status": "success", "path": path, "size": size, "lines": lines, "offset": start,
+                    "content": _decode(mm[start:])}
+    except OSError as e:
+        return _error(path, e)
+
+
+def grep(path: str, regex: str, max_hits: int = 50, ignore_case: bool = False) -> dict:
+    """
+    Finds the lines of a file matching a regular expression without loading the file.
+
+    Args:
+        path: The file to search.
+        regex: Python regular expression, matched against each line.
+        max_hits: Stop after this many matching lines.
+        ignore_case: Match case-insensitively.
+    """
+    try:
+        pattern = re.compile(regex.encode("utf-8"), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    except re.error as e:
+        return {"status": "error", "message": f"Invalid regular expression: {e}"}
+    hits = []
+    try:
+        with _mapped(path) as mm:
+            if mm is None:
+                return {"status": "success", "path": path, "hits": [], "truncated": False, "scanned_bytes": 0}
+            size = len(mm)
+            line_no, counted_to, next_pos = 1, 0, 0
+            while len(hits) < max_hits and next_pos <= size:
+                match = pattern.search(mm, next_pos)
+                if match is None:
+                    next_pos = size
+                    break
+                line_start = mm.rfind(b"\n", 0, match.start()) + 1
+                line_end = mm.find(b"\n", match.start())
+                line_end = size if line_end < 0 else line_end
+                for chunk_start in range(counted_to, line_start, _COUNT_CHUNK):
+                    line_no += mm[chunk_start:min(chunk_start + _COUNT_CHUNK, line_start)].count(b"\n")
+                counted_to = max(counted_to, line_start)
+                text = _decode(mm[line_start:min(line_end, line_start + MAX_LINE_CHARS * 4)])
+                hits.append({"line": line_no, "offset": line_start, "text": text[:MAX_LINE_CHARS]})
+                # One hit per line; continue on the next line.
+                next_pos = line_end + 1
+            return {"status": "success", "path": path, "hits": hits, "truncated": next_pos < size,
+                    "scanned_bytes": min(next_pos, size)}
+    except OSError as e:
+        return _error(path, e)
+
+
+def list_directory_page(path: str = ".", offset: int = 0, limit: int = 100) -> dict:
+    """
+    Lists a directory page by page with each entry's type, size and modification time.
+
+    Entries are sorted by name; only the entries of the requested page are stat'ed.
+
+    Args:
+        path: The directory to list.
+        offset: Index of the first entry to return.
+        limit: Number of entries to return.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return {"status": "error", "message": f"Directory not found at {path}"}
+    except OSError as e:
+        return {"status": "error", "message": f"Error listing directory: {e}"}
+    offset = max(offset, 0)
+    page = []
+    for entry in entries[offset:offset + limit]:
+        try:
+            st = entry.stat(follow_symlinks=False)
+            kind = "directory" if entry.is_dir() else "symlink" if entry.is_symlink() else "file"
+        except OSError:
+            continue
+        page.append({"name": entry.name, "path": entry.path, "type": kind, "size": st.st_size,
+                     "modified": st.st_mtime})
+    next_offset = offset + limit if offset + limit < len(entries) else None
+    return {"status": "success", "path": path, "total": len(entries), "offset": offset,
+            "entries": page, "next_offset": next_offset}
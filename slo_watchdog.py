@@ -0,0 +1,122 @@
+"""
+SLO rules and the watchdog plumbing shared by the load test agents.
+
+Each agent package subclasses SloWatchdog with its own way of reading live
+metrics and stopping a test; the rule checks, the consecutive-breach count
+and the per-test registry live here. Like tool_cache, it sits next to the
+agent packages, in the directory adk web puts on sys.path.
+"""
+import threading
+from typing import Optional
+
+# Evaluation cadence, and how many consecutive failed evaluations abort a test,
+# so a single noisy window does not kill a healthy run.
+DEFAULT_INTERVAL = 5.0
+DEFAULT_GRACE_SECONDS = 60.0
+BREACHES_TO_ABORT = 2
+
+
+class SloRules:
+    """Thresholds a running test must stay within; unset rules are not checked."""
+
+    def __init__(self, max_error_rate: Optional[float] = None, max_p95_ms: Optional[float] = None,
+                 min_rps: Optional[float] = None):
+        self.max_error_rate = max_error_rate
+        self.max_p95_ms = max_p95_ms
+        self.min_rps = min_rps
+
+    def __bool__(self) -> bool:
+        return any(rule is not None for rule in (self.max_error_rate, self.max_p95_ms, self.min_rps))
+
+    def breaches(self, metrics: dict) -> list:
+        """Returns a description of every rule the metrics violate."""
+        found = []
+        error_rate = metrics.get("error_rate")
+        if self.max_error_rate is not None and error_rate is not None and error_rate > self.max_error_rate:
+            found.append(f"error rate {error_rate:.2%} > {self.max_error_rate:.2%}")
+        p95 = metrics.get("p95_ms")
+        if self.max_p95_ms is not None and p95 is not None and p95 > self.max_p95_ms:
+            found.append(f"p95 {p95:.0f} ms > {self.max_p95_ms:g} ms")
+        rps = metrics.get("rps")
+        if self.min_rps is not None and rps is not None and rps < self.min_rps:
+            found.append(f"throughput {rps:.1f} rps < {self.min_rps:g} rps")
+        return found
+
+    def to_dict(self) -> dict:
+        return {"max_error_rate": self.max_error_rate, "max_p95_ms": self.max_p95_ms, "min_rps": self.min_rps}
+
+
+class SloWatchdog:
+    """
+    Background thread that stops a test whose live metrics keep breaking its SLO rules.
+
+    Subclasses implement _run(): read the metrics every interval, pass them
+    to evaluate() and stop the test once it returns a reason.
+    """
+
+    def __init__(self, name: str, rules: SloRules, grace_seconds: float = DEFAULT_GRACE_SECONDS,
+                 interval: float = DEFAULT_INTERVAL):
+        self.name = name
+        self.rules = rules
+        self.grace_seconds = grace_seconds
+        self.interval = interval
+        self.status = "waiting"
+        self.reason = None
+        self.last_metrics = None
+        self.consecutive_breaches = 0
+        self.evaluations = 0
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"watchdog-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _run(self):
+        raise NotImplementedError
+
+    def evaluate(self, metrics: dict) -> Optional[str]:
+        """Checks one window's metrics; returns the abort reason after BREACHES_TO_ABORT breaching ones in a row."""
+        self.evaluations += 1
+        self.last_metrics = metrics
+        breaches = self.rules.breaches(metrics)
+        self.consecutive_breaches = self.consecutive_breaches + 1 if breaches else 0
+        if self.consecutive_breaches >= BREACHES_TO_ABORT:
+            return "; ".join(breaches)
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "rules": self.rules.to_dict(),
+            "grace_seconds": self.grace_seconds,
+            "interval": self.interval,
+            "evaluations": self.evaluations,
+            "consecutive_breaches": self.consecutive_breaches,
+            "last_metrics": self.last_metrics,
+            "reason": self.reason,
+        }
+
+
+class WatchdogRegistry:
+    """The watchdog of each test by name; a new watchdog for a test replaces (and cancels) the old one."""
+
+    def __init__(self):
+        self._watchdogs = {}
+        self._lock = threading.Lock()
+
+    def watch(self, watchdog: SloWatchdog) -> SloWatchdog:
+        with self._lock:
+            previous = self._watchdogs.get(watchdog.name)
+            if previous is not None:
+                previous.cancel()
+            self._watchdogs[watchdog.name] = watchdog
+        watchdog.start()
+        return watchdog
+
+    def get(self, name: str) -> Optional[SloWatchdog]:
+        with self._lock:
+            return self._watchdogs.get(name)
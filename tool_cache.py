@@ -0,0 +1,170 @@
+"""
+TTL/LRU result cache for read-only agent tools, shared by the agent packages.
+
+It lives next to the agent packages, in the directory adk web puts on
+sys.path. Each package decides which of its results are cacheable (errors
+never are) with cache_if at the decorator, as they report errors differently.
+"""
+import copy
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+DEFAULT_MAX_ENTRIES = 128
+
+
+def _cacheable(result) -> bool:
+    """Error dicts are never cached, so a retry after a transient failure does real work."""
+    return not (isinstance(result, dict) and result.get("status") == "error")
+
+
+class ToolCache:
+    """
+    TTL cache of one tool's results, keyed by its arguments.
+
+    Entries expire ttl seconds after they were computed and the least
+    recently used entry is evicted once max_entries are held. Concurrent
+    misses on the same key may both compute; the later result wins. A result
+    computed while the cache was invalidated is not stored, as it may
+    predate the change that invalidated it.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int = DEFAULT_MAX_ENTRIES, tags: tuple = ()):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.tags = set(tags)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Returns (True, value) for a fresh entry, or (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[0]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "ttl_seconds": self.ttl,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def cached_tool(ttl: float, tags: tuple = (), max_entries: int = DEFAULT_MAX_ENTRIES,
+                cache_if: Callable = _cacheable):
+    """
+    Caches a read-only tool's results for ttl seconds per distinct set of arguments.
+
+    The wrapper keeps the tool's name, signature and docstring, so agents see
+    the same tool. Results are deep-copied on the way in and out, so a caller
+    changing a returned object does not change the cache.
+
+    Args:
+        ttl: Seconds a result stays valid.
+        tags: What the result depends on, e.g. ("tests",); invalidate(tag) drops it.
+        max_entries: Distinct argument sets kept before the least recently used is evicted.
+        cache_if: Returns whether a result may be cached; by default anything but a {"status": "error"} dict.
+    """
+    def decorate(func):
+        cache = ToolCache(func.__name__, ttl, max_entries, tags)
+        with _caches_lock:
+            _caches[(func.__module__, func.__qualname__)] = cache
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = json.dumps(bound.arguments, sort_keys=True, default=repr)
+            generation = cache.generation
+            hit, value = cache.get(key)
+            if hit:
+                return copy.deepcopy(value)
+            result = func(*args, **kwargs)
+            if cache_if(result):
+                cache.put(key, copy.deepcopy(result), generation)
+            return result
+        wrapper.cache = cache
+        return wrapper
+    return decorate
+
+
+def invalidates(*tags: str):
+    """Marks a mutating tool: once it has run, cached results with any of the tags are dropped."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                for tag in tags:
+                    invalidate(tag)
+        return wrapper
+    return decorate
+
+
+def invalidate(tag: Optional[str] = None):
+    """Drops the cached results of every tool with the tag, or of all tools."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        if tag is None or tag in cache.tags:
+            cache.clear()
+
+
+def cache_stats(package: Optional[str] = None) -> dict:
+    """
+    Returns the hit, miss, eviction and invalidation counters of every cached tool, by tool name.
+
+    Args:
+        package: Only report the tools of this package, e.g. __package__ of the caller.
+    """
+    with _caches_lock:
+        caches = dict(_caches)
+    return {cache.name: cache.stats() for (module, _), cache in caches.items()
+            if package is None or module == package or module.startswith(f"{package}.")}